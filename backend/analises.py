@@ -0,0 +1,136 @@
+"""
+Tempos da cozinha e da entrega a partir de historico_status
+
+Cada etapa vai da entrada em um status até a entrada no seguinte. As
+durações e os percentis (p50/p90, método nearest-rank) são calculados no
+banco com funções de janela (LEAD e ROW_NUMBER), então só as linhas já
+agregadas por grupo e etapa chegam à aplicação.
+"""
+
+from sqlalchemy import Integer, case, cast, func, literal, select
+
+from models import db, Pedido, ItemPedido, Prato, Endereco, HistoricoStatus, StatusPedido
+from arquivo import tabela_periodo
+
+# Etapa -> (status que a inicia, status que a encerra)
+ETAPAS = {
+    'espera': (StatusPedido.ACEITO, StatusPedido.PREPARO),
+    'preparo': (StatusPedido.PREPARO, StatusPedido.ENTREGA),
+    'entrega': (StatusPedido.ENTREGA, StatusPedido.FINALIZADO),
+}
+
+AGRUPAMENTOS = ('hora', 'prato', 'bairro')
+
+PERCENTIS = (50, 90)
+
+
+def _segundos_entre(inicio, fim):
+    if db.engine.dialect.name == 'sqlite':
+        return (func.julianday(fim) - func.julianday(inicio)) * 86400.0
+    return func.extract('epoch', fim - inicio)
+
+
+def _hora(coluna):
+    if db.engine.dialect.name == 'sqlite':
+        return cast(func.strftime('%H', coluna), Integer)
+    return cast(func.extract('hour', coluna), Integer)
+
+
+def tempos_por_etapa(agrupar, inicio, fim, fuso_horas=0):
+    """p50/p90 e média (segundos) de cada etapa, por hora, prato ou bairro.
+
+    Considera os pedidos criados entre inicio e fim. Etapas encerradas por
+    cancelamento ficam de fora.
+    """
+    if agrupar not in AGRUPAMENTOS:
+        raise ValueError(f"Agrupamento inválido. Use: {', '.join(AGRUPAMENTOS)}")
+
+    # Pedidos arquivados entram quando o período os alcança
+    historico = tabela_periodo(HistoricoStatus, inicio)
+    pedidos = tabela_periodo(Pedido, inicio)
+
+    janela = {
+        'partition_by': historico.c.pedido_id,
+        'order_by': (historico.c.created_at, historico.c.id),
+    }
+    transicoes = select(
+        historico.c.pedido_id.label('pedido_id'),
+        historico.c.status_novo.label('status'),
+        historico.c.created_at.label('inicio'),
+        func.lead(historico.c.created_at, type_=historico.c.created_at.type).over(**janela).label('fim'),
+        func.lead(historico.c.status_novo, type_=historico.c.status_novo.type).over(**janela).label('proximo'),
+    ).join(pedidos, pedidos.c.id == historico.c.pedido_id).where(
+        pedidos.c.created_at >= inicio, pedidos.c.created_at <= fim
+    ).subquery('transicoes')
+
+    etapa = case(
+        *[
+            ((transicoes.c.status == de) & (transicoes.c.proximo == para), literal(nome))
+            for nome, (de, para) in ETAPAS.items()
+        ],
+        else_=None
+    )
+
+    if agrupar == 'hora':
+        grupo = _hora(transicoes.c.inicio)
+        origem = transicoes
+    elif agrupar == 'bairro':
+        grupo = Endereco.bairro
+        origem = transicoes.join(pedidos, pedidos.c.id == transicoes.c.pedido_id) \
+            .join(Endereco, Endereco.id == pedidos.c.endereco_id)
+    else:
+        # Um pedido conta uma vez para cada prato diferente que contém
+        itens = tabela_periodo(ItemPedido, inicio)
+        pratos_pedido = select(itens.c.pedido_id, itens.c.prato_id).distinct().subquery('pratos_pedido')
+        grupo = Prato.nome
+        origem = transicoes.join(pratos_pedido, pratos_pedido.c.pedido_id == transicoes.c.pedido_id) \
+            .join(Prato, Prato.id == pratos_pedido.c.prato_id)
+
+    duracoes = select(
+        grupo.label('grupo'),
+        etapa.label('etapa'),
+        _segundos_entre(transicoes.c.inicio, transicoes.c.fim).label('segundos'),
+    ).select_from(origem).where(etapa.is_not(None)).subquery('duracoes')
+
+    particao = (duracoes.c.grupo, duracoes.c.etapa)
+    ordenadas = select(
+        duracoes.c.grupo,
+        duracoes.c.etapa,
+        duracoes.c.segundos,
+        func.row_number().over(partition_by=particao, order_by=duracoes.c.segundos).label('posicao'),
+        func.count().over(partition_by=particao).label('total'),
+    ).subquery('ordenadas')
+
+    # Posição do percentil p (nearest-rank): ceil(p * total / 100), em aritmética inteira
+    percentis = [
+        func.max(case(
+            (ordenadas.c.posicao == (ordenadas.c.total * p + 99) // 100, ordenadas.c.segundos),
+            else_=None
+        )).label(f'p{p}')
+        for p in PERCENTIS
+    ]
+    linhas = db.session.execute(
+        select(
+            ordenadas.c.grupo,
+            ordenadas.c.etapa,
+            func.count().label('quantidade'),
+            func.avg(ordenadas.c.segundos).label('media'),
+            *percentis,
+        ).group_by(ordenadas.c.grupo, ordenadas.c.etapa).order_by(ordenadas.c.grupo, ordenadas.c.etapa)
+    ).all()
+
+    grupos = {}
+    for linha in linhas:
+        chave = linha.grupo
+        if agrupar == 'hora' and chave is not None:
+            chave = (chave + fuso_horas) % 24
+        grupos.setdefault(chave, {})[linha.etapa] = {
+            'quantidade': linha.quantidade,
+            'media_s': round(linha.media, 1),
+            **{f'p{p}_s': round(getattr(linha, f'p{p}'), 1) for p in PERCENTIS},
+        }
+
+    return [
+        {agrupar: chave, 'etapas': etapas}
+        for chave, etapas in sorted(grupos.items(), key=lambda item: (item[0] is None, item[0]))
+    ]
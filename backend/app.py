@@ -1,33 +1,67 @@
-from flask import Flask, jsonify
+import hmac
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from config import Config
 from models import db
-from database import init_database
 
-# Importar blueprints
-from routes.cardapio import cardapio_bp
-from routes.pedidos import pedidos_bp
-from routes.caixa import caixa_bp
-from routes.auth import auth_bp
-from routes.admin import admin_bp
+def create_app(config=None):
+    """Factory function para criar a aplicação Flask.
+
+    Não acessa o banco: tabelas e dados iniciais são criados por
+    `flask db init` / `flask db seed` (ou por init_database em run.py).
+    Os módulos da aplicação são importados aqui para que `import app` seja leve.
+    """
+    from database import opcoes_engine, configurar_sqlite
+    from comandos import db_cli
+    from metricas import registrar_metricas
+    from perfilamento import registrar_perfilamento
+    from provedor_json import criar_provedor_json
+    from compressao import registrar_compressao
+    from eventos import registrar_eventos
+    import resumo  # registra a atualização do resumo_diario nas movimentações
 
-def create_app():
-    """Factory function para criar a aplicação Flask"""
     app = Flask(__name__)
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+    app.json = criar_provedor_json(app)
 
     # Configurar CORS
     CORS(app, origins=Config.CORS_ORIGINS, supports_credentials=True)
 
     # Inicializar banco de dados
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', opcoes_engine(app.config))
     db.init_app(app)
+    configurar_sqlite(app)
+    registrar_metricas(app)
+    registrar_perfilamento(app)
+    registrar_eventos(app)
+    # Depois das métricas: os ganchos after_request rodam na ordem inversa,
+    # então as métricas medem os bytes já comprimidos
+    registrar_compressao(app)
+    app.cli.add_command(db_cli)
 
     # Registrar blueprints
+    from routes.cardapio import cardapio_bp
+    from routes.pedidos import pedidos_bp
+    from routes.caixa import caixa_bp
+    from routes.auth import auth_bp
+    from routes.admin import admin_bp
+    from routes.taxas import taxas_bp
+    from routes.clientes import clientes_bp
+    from routes.export import export_bp
+    from routes.perfil import perfil_bp
+    from routes.admin import require_admin
+
     app.register_blueprint(cardapio_bp)
     app.register_blueprint(pedidos_bp)
     app.register_blueprint(caixa_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(taxas_bp)
+    app.register_blueprint(clientes_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(perfil_bp)
 
     # Rota de teste
     @app.route('/api/health', methods=['GET'])
@@ -38,6 +72,24 @@ def create_app():
             'version': '1.0.0'
         })
 
+    # Métricas de desempenho por endpoint (formato Prometheus), para
+    # administradores ou para o coletor com o METRICAS_TOKEN
+    @require_admin
+    def metrics_admin():
+        return Response(
+            app.extensions['metricas'].exportar(),
+            mimetype='text/plain; version=0.0.4'
+        )
+
+    @app.route('/api/metrics', methods=['GET'])
+    def metrics():
+        token = app.config['METRICAS_TOKEN']
+        if token and hmac.compare_digest(
+            request.headers.get('Authorization', '').encode('utf-8'), f'Bearer {token}'.encode('utf-8')
+        ):
+            return metrics_admin.__wrapped__()
+        return metrics_admin()
+
     # Rota para informações da API
     @app.route('/api/info', methods=['GET'])
     def api_info():
@@ -70,13 +122,12 @@ def create_app():
             'error': 'Erro interno do servidor'
         }), 500
 
-    # Inicializar banco de dados
-    init_database(app)
-
     return app
 
 if __name__ == '__main__':
+    from database import init_database
     app = create_app()
+    init_database(app)
     print("🍔 Iniciando API da Garagem do Lanche...")
     print("📊 Banco de dados SQLite configurado")
     print("🌐 CORS habilitado para frontend")
@@ -84,11 +135,13 @@ if __name__ == '__main__':
     print("\n📋 Endpoints disponíveis:")
     print("   GET  /api/health - Status da API")
     print("   GET  /api/info - Informações da API")
+    print("   GET  /api/metrics - Métricas de desempenho (Prometheus, admin ou METRICAS_TOKEN)")
     print("   GET  /api/cardapio - Listar pratos")
     print("   GET  /api/acompanhamentos - Listar acompanhamentos")
     print("   POST /api/pedidos - Criar pedido")
     print("   GET  /api/pedidos - Listar pedidos")
     print("   GET  /api/pedidos/cozinha - Pedidos para cozinha")
+    print("   GET  /api/pedidos/cozinha/stream - Stream de pedidos (SSE)")
     print("   GET  /api/caixa/relatorio - Relatório do caixa")
     print("   GET  /api/caixa/dashboard - Dashboard do caixa")
     print("   POST /api/auth/login - Login da cozinha")
@@ -0,0 +1,147 @@
+"""
+Arquivamento de pedidos encerrados (dados frios)
+
+Pedidos FINALIZADO ou CANCELADO mais antigos que ARQUIVO_IDADE_DIAS são
+movidos, com itens, histórico de status e movimentações do caixa, para as
+tabelas *_arquivo do mesmo banco. As telas do dia a dia continuam lendo só
+as tabelas quentes; relatórios cujo período alcança o arquivo leem a união
+das duas (tabela_periodo).
+
+As tabelas de arquivo ficam no mesmo arquivo SQLite em vez de um banco
+anexado com ATTACH: em modo WAL o commit entre bancos anexados não é
+atômico, e uma falha no meio deixaria pedidos duplicados ou perdidos.
+
+As tabelas quentes usam AUTOINCREMENT (migração 7), então um id arquivado
+nunca é reaproveitado por uma linha nova.
+"""
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, func, insert, select, union_all
+
+from cache import CacheTTL
+from config import Config
+from models import db, Pedido, ItemPedido, HistoricoStatus, MovimentacaoCaixa, Arquivamento
+from models import StatusPedido, TABELAS_ARQUIVO
+
+STATUS_ARQUIVAVEIS = (StatusPedido.FINALIZADO, StatusPedido.CANCELADO)
+
+# Ordem de remoção: as tabelas que referenciam pedidos antes dele
+DEPENDENTES_PEDIDO = (ItemPedido, HistoricoStatus, MovimentacaoCaixa)
+
+
+# engine -> (created_at mais recente arquivado,); limpo a cada lote arquivado
+# neste processo e, nos demais, após ARQUIVO_CACHE_TTL
+cache_limite = CacheTTL(Config.ARQUIVO_CACHE_TTL)
+
+
+def limite_arquivado():
+    """created_at mais recente já arquivado, ou None se nada foi arquivado"""
+    item = cache_limite.get(db.engine)
+    if item is None:
+        item = (db.session.scalar(select(func.max(Arquivamento.ate))),)
+        cache_limite.set(db.engine, item)
+    return item[0]
+
+
+def tabela_completa(modelo, colunas=None):
+    """União (UNION ALL) da tabela quente com o seu arquivo.
+
+    colunas limita a união às colunas (nomes) usadas pela consulta.
+    """
+    quente = modelo.__table__
+    arquivo = TABELAS_ARQUIVO[quente.name]
+    nomes = colunas or [coluna.name for coluna in quente.c]
+    return union_all(
+        select(*[quente.c[nome] for nome in nomes]),
+        select(*[arquivo.c[nome] for nome in nomes])
+    ).subquery(f'{quente.name}_todos')
+
+
+def tabela_periodo(modelo, inicio, colunas=None):
+    """Tabela a consultar para um período que começa em inicio (None = desde sempre).
+
+    Só inclui o arquivo quando o período chega a datas já arquivadas; use
+    as colunas por .c, que valem para os dois casos.
+    """
+    ultimo = limite_arquivado()
+    if ultimo is not None and (inicio is None or inicio <= ultimo):
+        return tabela_completa(modelo, colunas)
+    return modelo.__table__
+
+
+def _mover(modelo, condicao):
+    """Copia as linhas para o arquivo e as apaga da tabela quente.
+
+    Retorna (quantidade, created_at mais recente entre as linhas movidas).
+    """
+    quente = modelo.__table__
+    mais_recente = None
+    if 'created_at' in quente.c:
+        mais_recente = db.session.scalar(select(func.max(quente.c.created_at)).where(condicao))
+
+    db.session.execute(
+        insert(TABELAS_ARQUIVO[quente.name]).from_select(
+            [coluna.name for coluna in quente.c], select(quente).where(condicao)
+        )
+    )
+    movidas = db.session.execute(delete(quente).where(condicao)).rowcount
+    return movidas, mais_recente
+
+
+def _registrar(registro, mais_recente):
+    if mais_recente is not None and (registro.ate is None or mais_recente > registro.ate):
+        registro.ate = mais_recente
+
+
+def arquivar(idade_dias, lote=1000):
+    """Move os pedidos encerrados há mais de idade_dias (e as movimentações
+    avulsas do mesmo período) para o arquivo, em transações de até `lote`
+    pedidos. Retorna o registro da execução.
+    """
+    limite = datetime.utcnow() - timedelta(days=idade_dias)
+
+    registro = Arquivamento(limite=limite, pedidos=0, movimentacoes=0)
+    db.session.add(registro)
+    db.session.commit()
+
+    while True:
+        ids = db.session.scalars(
+            select(Pedido.id).where(
+                Pedido.status.in_(STATUS_ARQUIVAVEIS),
+                Pedido.created_at < limite
+            ).order_by(Pedido.id).limit(lote)
+        ).all()
+        if not ids:
+            break
+
+        for modelo in DEPENDENTES_PEDIDO:
+            movidas, mais_recente = _mover(modelo, modelo.pedido_id.in_(ids))
+            _registrar(registro, mais_recente)
+            if modelo is MovimentacaoCaixa:
+                registro.movimentacoes += movidas
+        movidas, mais_recente = _mover(Pedido, Pedido.id.in_(ids))
+        _registrar(registro, mais_recente)
+        registro.pedidos += movidas
+        # O registro é atualizado no mesmo commit, então os relatórios nunca
+        # deixam de ver um lote já movido
+        db.session.commit()
+        cache_limite.invalidar()
+
+    # Movimentações sem pedido (saídas, ajustes)
+    while True:
+        ids = db.session.scalars(
+            select(MovimentacaoCaixa.id).where(
+                MovimentacaoCaixa.pedido_id.is_(None),
+                MovimentacaoCaixa.created_at < limite
+            ).order_by(MovimentacaoCaixa.id).limit(lote)
+        ).all()
+        if not ids:
+            break
+
+        movidas, mais_recente = _mover(MovimentacaoCaixa, MovimentacaoCaixa.id.in_(ids))
+        _registrar(registro, mais_recente)
+        registro.movimentacoes += movidas
+        db.session.commit()
+        cache_limite.invalidar()
+
+    return registro
@@ -0,0 +1,131 @@
+"""
+Autenticação dos usuários administrativos
+
+Depois do login o usuário recebe um token assinado (id, tipo, versão e data
+de emissão), validado só com HMAC: as rotas protegidas não consultam o banco.
+A verificação de senha (PBKDF2/scrypt, cara de propósito) acontece apenas
+no login, em um pool de threads limitado. Tipo e situação (ativo) atuais
+de cada usuário ficam em um cache LRU/TTL, para que desativações e
+mudanças de perfil valham na hora sem uma consulta por requisição. O mesmo
+cache guarda a versão atual dos tokens do usuário: o logout a incrementa,
+revogando os tokens já emitidos (inclusive os enviados como Bearer).
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as TempoEsgotado
+from datetime import datetime, timezone
+
+from flask import current_app, request, session
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from werkzeug.security import check_password_hash
+
+from cache import CacheLRU
+from config import Config
+
+SALT_TOKEN = 'garagem-token-admin'
+
+
+class LoginSobrecarregado(Exception):
+    """Há logins demais aguardando a verificação de senha"""
+
+
+_pool_senhas = ThreadPoolExecutor(
+    max_workers=Config.LOGIN_MAX_CONCORRENTES, thread_name_prefix='verifica-senha'
+)
+# Logins em verificação + na fila; acima disso o login é recusado na hora
+_vagas_login = threading.BoundedSemaphore(Config.LOGIN_MAX_CONCORRENTES * 4)
+
+
+# user_id -> (tipo, ativo, versao_token); invalidado ao alterar, desativar ou deslogar o usuário
+cache_autorizacao = CacheLRU(Config.AUTORIZACAO_CACHE_MAX, Config.AUTORIZACAO_CACHE_TTL)
+
+
+def permissoes_usuario(user_id):
+    """(tipo, ativo, versao_token) atuais do usuário, ou None se ele não existir"""
+    from models import db, Usuario
+
+    def carregar():
+        linha = db.session.query(Usuario.tipo, Usuario.ativo, Usuario.versao_token) \
+            .filter(Usuario.id == user_id).first()
+        return (linha.tipo.value, bool(linha.ativo), linha.versao_token) if linha else None
+
+    return cache_autorizacao.obter(user_id, carregar)
+
+
+def revogar_tokens(user_id):
+    """Invalida todos os tokens já emitidos para o usuário (em todos os dispositivos)"""
+    from models import db, Usuario
+
+    db.session.query(Usuario).filter(Usuario.id == user_id).update(
+        {Usuario.versao_token: Usuario.versao_token + 1}, synchronize_session=False
+    )
+    db.session.commit()
+    cache_autorizacao.invalidar(user_id)
+
+
+def verificar_senha(password_hash, senha):
+    """Verifica a senha no pool limitado, sem ocupar mais threads que o previsto"""
+    if not _vagas_login.acquire(blocking=False):
+        raise LoginSobrecarregado()
+    try:
+        futuro = _pool_senhas.submit(check_password_hash, password_hash, senha)
+    except BaseException:
+        _vagas_login.release()
+        raise
+    # A vaga só volta quando a verificação termina (ou é cancelada ainda na
+    # fila): uma verificação abandonada por timeout continua ocupando o pool
+    futuro.add_done_callback(lambda _: _vagas_login.release())
+    try:
+        return futuro.result(timeout=Config.LOGIN_TIMEOUT)
+    except TempoEsgotado:
+        futuro.cancel()
+        raise LoginSobrecarregado()
+
+
+def _serializador():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=SALT_TOKEN)
+
+
+def gerar_token(user_id, tipo, versao):
+    """Gera o token assinado de um usuário (versao = versao_token atual)"""
+    return _serializador().dumps({'id': user_id, 'tipo': tipo, 'versao': versao})
+
+
+def ler_token(token):
+    """Valida o token e retorna (dados, emitido_em), ou (None, None) se inválido/expirado"""
+    try:
+        dados, emitido_em = _serializador().loads(
+            token, max_age=current_app.config['TOKEN_VALIDADE'], return_timestamp=True
+        )
+        return dados, emitido_em
+    except (BadSignature, SignatureExpired):
+        return None, None
+
+
+def token_da_requisicao():
+    """Token enviado no cabeçalho Authorization: Bearer ou guardado na sessão"""
+    cabecalho = request.headers.get('Authorization', '')
+    if cabecalho.startswith('Bearer '):
+        return cabecalho[7:].strip(), False
+    return session.get('token'), True
+
+
+def usuario_autenticado():
+    """Dados do usuário logado ({'id', 'tipo'}) ou None.
+
+    Tokens de sessão (cookie) são renovados quando passam da metade da
+    validade, para que o administrador ativo não precise logar de novo.
+    """
+    token, da_sessao = token_da_requisicao()
+    if not token:
+        return None
+
+    dados, emitido_em = ler_token(token)
+    if dados is None:
+        return None
+
+    if da_sessao:
+        idade = (datetime.now(timezone.utc) - emitido_em).total_seconds()
+        if idade > current_app.config['TOKEN_VALIDADE'] / 2:
+            session['token'] = gerar_token(dados['id'], dados['tipo'], dados.get('versao', 1))
+    return dados
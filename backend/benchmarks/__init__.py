@@ -0,0 +1 @@
+# Benchmarks da API (execute a partir de backend/: python -m benchmarks.carga)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark das requisições administrativas
+
+Compara, na mesma aplicação, o custo da autorização antiga (consulta ao
+Usuario a cada requisição) com o require_admin atual (token assinado),
+e mede uma rajada de logins simultâneos contra o pool de verificação de
+senha.
+
+Uso (a partir de backend/):
+    python -m benchmarks.admin --requisicoes 5000 --saida admin.json
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from flask import jsonify, session
+
+from models import Usuario, TipoUsuario
+from routes.admin import require_admin
+from benchmarks.comum import criar_app_benchmark, resumir_latencias, metadados, salvar_json
+
+
+def require_admin_antigo(f):
+    """Autorização como era antes dos tokens: uma consulta por requisição"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user = Usuario.query.get(session.get('user_id'))
+        if not user or user.tipo != TipoUsuario.ADMIN:
+            return jsonify({'success': False}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def registrar_rotas(app):
+    @app.route('/bench/antes')
+    @require_admin_antigo
+    def bench_antes():
+        return jsonify({'success': True})
+
+    @app.route('/bench/depois')
+    @require_admin
+    def bench_depois():
+        return jsonify({'success': True})
+
+
+def medir_rota(cliente, url, requisicoes):
+    latencias = []
+    inicio = time.perf_counter()
+    for _ in range(requisicoes):
+        t = time.perf_counter()
+        response = cliente.get(url)
+        latencias.append(time.perf_counter() - t)
+        assert response.status_code == 200, response.status_code
+    duracao = time.perf_counter() - inicio
+    return {'req_s': round(requisicoes / duracao, 1), **resumir_latencias(latencias)}
+
+
+def medir_rajada_login(app, tentativas, threads):
+    def logar(_):
+        t = time.perf_counter()
+        response = app.test_client().post(
+            '/api/admin/login', json={'username': 'admin', 'password': 'admin123'}
+        )
+        return response.status_code, time.perf_counter() - t
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        resultados = list(executor.map(logar, range(tentativas)))
+    status = {}
+    for codigo, _ in resultados:
+        status[codigo] = status.get(codigo, 0) + 1
+    return {'status': status, **resumir_latencias([d for _, d in resultados])}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark das rotas administrativas')
+    parser.add_argument('--requisicoes', type=int, default=5000)
+    parser.add_argument('--logins', type=int, default=40, help='logins simultâneos na rajada')
+    parser.add_argument('--saida', help='arquivo JSON para salvar os resultados')
+    args = parser.parse_args()
+
+    app, _ = criar_app_benchmark()
+    registrar_rotas(app)
+    cliente = app.test_client()
+    cliente.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+
+    for url in ('/bench/antes', '/bench/depois'):
+        medir_rota(cliente, url, 100)  # aquecimento
+
+    resultados = {
+        'antes (consulta Usuario)': medir_rota(cliente, '/bench/antes', args.requisicoes),
+        'depois (token assinado)': medir_rota(cliente, '/bench/depois', args.requisicoes),
+        'GET /api/admin/dashboard': medir_rota(cliente, '/api/admin/dashboard', args.requisicoes),
+    }
+
+    print(f"\n{'Autorização':28} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for nome, r in resultados.items():
+        print(f"{nome:28} {r['req_s']:>10} {r['p50_ms']:>8} {r['p95_ms']:>8}")
+
+    rajada = medir_rajada_login(app, args.logins, args.logins)
+    print(f"\n🔐 Rajada de {args.logins} logins simultâneos: {rajada['status']} "
+          f"(p50 {rajada['p50_ms']} ms, p95 {rajada['p95_ms']} ms)")
+
+    if args.saida:
+        salvar_json(args.saida, {
+            'meta': {**metadados(), 'parametros': vars(args)},
+            'autorizacao': resultados,
+            'rajada_login': rajada,
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de carga da API da Garagem do Lanche
+
+Popula um banco SQLite temporário, executa uma mistura de requisições
+pelo test client do Flask (sem servidor) e mede latência, vazão e número
+de consultas SQL por endpoint.
+
+Uso (a partir de backend/):
+    python -m benchmarks.carga --pedidos 100000 --movimentacoes 500000 --saida bench.json
+    python -m benchmarks.carga --comparar bench.json    # falha se o p95 piorar
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from models import db
+from benchmarks.comum import (
+    criar_app_benchmark, popular_dados, ContadorSQL, resumir_latencias, metadados, salvar_json
+)
+
+# (nome, peso, função que monta a requisição)
+CENARIOS = [
+    ('GET /api/cardapio', 35, lambda r: ('GET', '/api/cardapio', None)),
+    ('GET /api/acompanhamentos', 10, lambda r: ('GET', '/api/acompanhamentos', None)),
+    ('GET /api/pedidos/cozinha', 25, lambda r: ('GET', '/api/pedidos/cozinha', None)),
+    ('GET /api/pedidos', 8, lambda r: ('GET', '/api/pedidos?limite=50', None)),
+    ('POST /api/pedidos', 10, lambda r: ('POST', '/api/pedidos', {
+        'nome': 'Cliente Benchmark',
+        'telefone': f'(21) 8{r.randrange(10 ** 8):08d}',
+        'rua': 'Rua do Teste',
+        'numero': str(r.randrange(1, 999)),
+        'bairro': r.choice(['Centro', 'Gramacho', 'Jardim Primavera']),
+        'cep': '25000-000',
+        'prato_id': r.randrange(1, 10),
+        'acompanhamento_id': r.randrange(1, 5),
+        'forma_pagamento': r.choice(['Pix', 'Dinheiro', 'Cartão']),
+    })),
+    ('GET /api/caixa/dashboard', 6, lambda r: ('GET', '/api/caixa/dashboard', None)),
+    ('GET /api/caixa/relatorio (mês)', 6, lambda r: ('GET', '/api/caixa/relatorio?data_inicio={}&data_fim={}'.format(
+        (datetime.now() - timedelta(days=30)).date().isoformat(),
+        datetime.now().isoformat()
+    ), None)),
+]
+
+
+def executar(app, requisicoes, threads, semente):
+    """Dispara as requisições e agrupa as medições por cenário"""
+    contador = ContadorSQL(_engine(app))
+    nomes = [c[0] for c in CENARIOS]
+    pesos = [c[1] for c in CENARIOS]
+    montar = {c[0]: c[2] for c in CENARIOS}
+    sorteio = random.Random(semente)
+    plano = sorteio.choices(nomes, pesos, k=requisicoes)
+    medicoes = {nome: {'latencias': [], 'consultas': 0, 'tempo_sql': 0.0, 'erros': 0, 'bytes': 0} for nome in nomes}
+
+    def rodar(indices):
+        cliente = app.test_client()
+        aleatorio = random.Random(semente + indices[0])
+        resultados = []
+        for i in indices:
+            nome = plano[i]
+            metodo, url, corpo = montar[nome](aleatorio)
+            contador.zerar()
+            inicio = time.perf_counter()
+            response = cliente.open(url, method=metodo, json=corpo)
+            dados = response.get_data()
+            duracao = time.perf_counter() - inicio
+            consultas, tempo_sql = contador.ler()
+            resultados.append((nome, duracao, consultas, tempo_sql, response.status_code, len(dados)))
+        return resultados
+
+    blocos = [list(range(i, requisicoes, threads)) for i in range(threads)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        todos = [r for bloco in executor.map(rodar, blocos) for r in bloco]
+    duracao_total = time.perf_counter() - inicio
+    contador.remover()
+
+    for nome, duracao, consultas, tempo_sql, status, tamanho in todos:
+        m = medicoes[nome]
+        m['latencias'].append(duracao)
+        m['consultas'] += consultas
+        m['tempo_sql'] += tempo_sql
+        m['bytes'] += tamanho
+        if status >= 400:
+            m['erros'] += 1
+
+    endpoints = {}
+    for nome, m in medicoes.items():
+        n = len(m['latencias'])
+        if not n:
+            continue
+        endpoints[nome] = {
+            'requisicoes': n,
+            'erros': m['erros'],
+            **resumir_latencias(m['latencias']),
+            'vazao_rps': round(n / sum(m['latencias']), 1),
+            'consultas_sql_por_req': round(m['consultas'] / n, 2),
+            'tempo_sql_ms_por_req': round(m['tempo_sql'] / n * 1000, 3),
+            'bytes_por_req': m['bytes'] // n,
+        }
+
+    return {
+        'requisicoes': len(todos),
+        'duracao_s': round(duracao_total, 3),
+        'vazao_rps': round(len(todos) / duracao_total, 1),
+        **resumir_latencias([r[1] for r in todos]),
+    }, endpoints
+
+
+def _engine(app):
+    with app.app_context():
+        return db.engine
+
+
+def comparar(atual, anterior, tolerancia):
+    """Mostra a variação do p95 e retorna os endpoints que pioraram"""
+    piores = []
+    print(f"\n📈 Comparação com execução anterior (tolerância {tolerancia:.0%})")
+    for nome, dados in atual['endpoints'].items():
+        antes = anterior.get('endpoints', {}).get(nome)
+        if not antes or not antes['p95_ms']:
+            continue
+        variacao = dados['p95_ms'] / antes['p95_ms'] - 1
+        marca = '❌' if variacao > tolerancia else '✅'
+        print(f"   {marca} {nome}: p95 {antes['p95_ms']} → {dados['p95_ms']} ms ({variacao:+.0%})")
+        if variacao > tolerancia:
+            piores.append(nome)
+    return piores
+
+
+def imprimir(resultado):
+    print(f"\n{'Endpoint':34} {'req':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'sql/req':>8}")
+    for nome, d in resultado['endpoints'].items():
+        print(f"{nome:34} {d['requisicoes']:>6} {d['p50_ms']:>8} {d['p95_ms']:>8} {d['p99_ms']:>8} "
+              f"{d['vazao_rps']:>8} {d['consultas_sql_por_req']:>8}")
+    total = resultado['total']
+    print(f"\nTotal: {total['requisicoes']} requisições em {total['duracao_s']}s ({total['vazao_rps']} req/s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de carga da API')
+    parser.add_argument('--pedidos', type=int, default=100000)
+    parser.add_argument('--movimentacoes', type=int, default=500000)
+    parser.add_argument('--abertos', type=int, default=300, help='pedidos aceitos/em preparo')
+    parser.add_argument('--requisicoes', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--aquecimento', type=int, default=50, help='requisições descartadas no início')
+    parser.add_argument('--banco', help='arquivo SQLite a usar (reaproveitado se já existir)')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', help='arquivo JSON para salvar os resultados')
+    parser.add_argument('--comparar', help='JSON de uma execução anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.20, help='piora aceitável no p95')
+    args = parser.parse_args()
+
+    reaproveitar = args.banco is not None and os.path.exists(args.banco)
+    app, caminho = criar_app_benchmark(args.banco)
+
+    inicio = time.perf_counter()
+    if not reaproveitar:
+        print(f"🗄️  Populando {args.pedidos} pedidos e {args.movimentacoes} movimentações em {caminho}...")
+        popular_dados(app, args.pedidos, args.movimentacoes, abertos=args.abertos, semente=args.semente)
+        print(f"   concluído em {time.perf_counter() - inicio:.1f}s")
+
+    if args.aquecimento:
+        executar(app, args.aquecimento, 1, args.semente + 1)
+
+    print(f"🚀 Executando {args.requisicoes} requisições com {args.threads} thread(s)...")
+    total, endpoints = executar(app, args.requisicoes, args.threads, args.semente)
+    resultado = {
+        'meta': {**metadados(), 'parametros': vars(args), 'banco': caminho},
+        'total': total,
+        'endpoints': endpoints,
+    }
+    imprimir(resultado)
+
+    if args.saida:
+        salvar_json(args.saida, resultado)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            piores = comparar(resultado, json.load(arquivo), args.tolerancia)
+        if piores:
+            print(f"\n⚠️  Regressão de latência em: {', '.join(piores)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
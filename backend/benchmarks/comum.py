@@ -0,0 +1,193 @@
+"""
+Utilitários compartilhados pelos benchmarks
+"""
+
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from database import init_database
+from models import db, Cliente, Endereco, Pedido, MovimentacaoCaixa
+from models import StatusPedido, FormaPagamento
+from resumo import reconstruir_resumo_diario
+from migracoes import itens_pedidos_antigos
+
+TAMANHO_BLOCO = 5000
+
+
+def criar_app_benchmark(caminho_banco=None):
+    """Cria a aplicação apontando para um banco SQLite em arquivo"""
+    if caminho_banco is None:
+        caminho_banco = os.path.join(tempfile.mkdtemp(prefix='garagem-bench-'), 'bench.db')
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{os.path.abspath(caminho_banco)}',
+        'TESTING': True
+    })
+    init_database(app)
+    return app, caminho_banco
+
+
+def _em_blocos(linhas, tamanho=TAMANHO_BLOCO):
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= tamanho:
+            yield bloco
+            bloco = []
+    if bloco:
+        yield bloco
+
+
+def popular_dados(app, pedidos, movimentacoes, abertos=300, dias=365, semente=42):
+    """Insere um volume realista de clientes, pedidos e movimentações.
+
+    Os pedidos se espalham pelos últimos `dias`; os `abertos` mais recentes
+    ficam aceitos/em preparo para simular o pico do painel da cozinha.
+    """
+    aleatorio = random.Random(semente)
+    agora = datetime.utcnow()
+    formas = list(FormaPagamento)
+    bairros = ['Centro', 'Gramacho', 'Parque Fluminense', 'Vila Operária', 'Jardim Primavera', 'Mutuá', 'Olavo Bilac']
+    total_clientes = max(1, pedidos // 5)
+
+    with app.app_context():
+        conn = db.session.connection()
+
+        conn.execute(insert(Cliente), [
+            {'nome': f'Cliente {i}', 'telefone': f'(21) 9{i:08d}', 'created_at': agora - timedelta(days=dias)}
+            for i in range(total_clientes)
+        ])
+        cliente_inicial = db.session.query(db.func.min(Cliente.id)).scalar()
+
+        datas = sorted(agora - timedelta(seconds=aleatorio.randint(0, dias * 86400)) for _ in range(pedidos))
+        for bloco in _em_blocos(range(pedidos)):
+            conn.execute(insert(Endereco), [
+                {'rua': f'Rua {i % 500}', 'numero': str(i % 2000), 'bairro': bairros[i % len(bairros)],
+                 'cep': f'25{i % 1000:03d}-000', 'complemento': '', 'taxa_entrega': 2.00 + (i % 4)}
+                for i in bloco
+            ])
+        endereco_inicial = db.session.query(db.func.min(Endereco.id)).scalar()
+
+        for bloco in _em_blocos(range(pedidos)):
+            linhas = []
+            for i in bloco:
+                preco = 8.00 + (i % 9) * 1.75
+                taxa = 2.00 + (i % 4)
+                if i >= pedidos - abertos:
+                    status = aleatorio.choice([StatusPedido.ACEITO, StatusPedido.PREPARO])
+                else:
+                    status = aleatorio.choices(
+                        [StatusPedido.FINALIZADO, StatusPedido.CANCELADO, StatusPedido.ENTREGA], [90, 8, 2]
+                    )[0]
+                linhas.append({
+                    'cliente_id': cliente_inicial + aleatorio.randrange(total_clientes),
+                    'prato_id': (i % 9) + 1,
+                    'acompanhamento_id': (i % 4) + 1,
+                    'endereco_id': endereco_inicial + i,
+                    'status': status,
+                    'forma_pagamento': formas[i % len(formas)],
+                    'valor_prato': preco,
+                    'taxa_entrega': taxa,
+                    'valor_total': preco + taxa,
+                    'observacoes': '',
+                    'created_at': datas[i],
+                    'updated_at': datas[i]
+                })
+            conn.execute(insert(Pedido), linhas)
+        pedido_inicial = db.session.query(db.func.min(Pedido.id)).scalar()
+        itens_pedidos_antigos(conn)  # um item por pedido
+
+        def gerar_movimentacoes():
+            for i in range(movimentacoes):
+                if i < pedidos:
+                    yield {'pedido_id': pedido_inicial + i, 'tipo': 'entrada', 'valor': 20.00,
+                           'descricao': f'Pedido #{pedido_inicial + i}', 'created_at': datas[i]}
+                else:
+                    yield {'pedido_id': None, 'tipo': aleatorio.choice(['entrada', 'saida', 'fiado']),
+                           'valor': round(aleatorio.uniform(5, 150), 2), 'descricao': 'Movimentação avulsa',
+                           'created_at': agora - timedelta(seconds=aleatorio.randint(0, dias * 86400))}
+
+        for bloco in _em_blocos(gerar_movimentacoes()):
+            conn.execute(insert(MovimentacaoCaixa), bloco)
+
+        reconstruir_resumo_diario(conn)
+        db.session.commit()
+
+
+class ContadorSQL:
+    """Conta comandos SQL e o tempo gasto neles, por thread"""
+
+    def __init__(self, engine):
+        self._local = threading.local()
+        self.engine = engine
+        event.listen(engine, 'before_cursor_execute', self._antes)
+        event.listen(engine, 'after_cursor_execute', self._depois)
+
+    def _antes(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.inicio = time.perf_counter()
+
+    def _depois(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.consultas = getattr(self._local, 'consultas', 0) + 1
+        self._local.tempo = getattr(self._local, 'tempo', 0.0) + time.perf_counter() - self._local.inicio
+
+    def zerar(self):
+        self._local.consultas = 0
+        self._local.tempo = 0.0
+
+    def ler(self):
+        return getattr(self._local, 'consultas', 0), getattr(self._local, 'tempo', 0.0)
+
+    def remover(self):
+        event.remove(self.engine, 'before_cursor_execute', self._antes)
+        event.remove(self.engine, 'after_cursor_execute', self._depois)
+
+
+def percentil(valores_ordenados, p):
+    """Percentil pelo método nearest-rank"""
+    if not valores_ordenados:
+        return 0.0
+    indice = max(0, min(len(valores_ordenados) - 1, int(round(p / 100 * len(valores_ordenados) + 0.5)) - 1))
+    return valores_ordenados[indice]
+
+
+def resumir_latencias(latencias):
+    """p50/p95/p99, média e máximo em milissegundos"""
+    ordenadas = sorted(latencias)
+    return {
+        'p50_ms': round(percentil(ordenadas, 50) * 1000, 3),
+        'p95_ms': round(percentil(ordenadas, 95) * 1000, 3),
+        'p99_ms': round(percentil(ordenadas, 99) * 1000, 3),
+        'media_ms': round(sum(ordenadas) / len(ordenadas) * 1000, 3) if ordenadas else 0.0,
+        'max_ms': round(ordenadas[-1] * 1000, 3) if ordenadas else 0.0,
+    }
+
+
+def metadados():
+    """Informações do ambiente para comparar execuções"""
+    try:
+        revisao = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revisao = None
+    return {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'git': revisao,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+    }
+
+
+def salvar_json(caminho, dados):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados salvos em {caminho}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark da codificação JSON e da compressão das respostas
+
+Monta a lista de pedidos completa (a mesma de GET /api/pedidos sem fields)
+e mede o tempo de codificação com o json da biblioteca padrão e com o
+orjson, e o tamanho e o tempo de compressão com gzip e brotli (os dois
+últimos só quando os pacotes estão instalados).
+
+Uso (a partir de backend/):
+    python -m benchmarks.serializacao --pedidos 1000 --repeticoes 50
+"""
+
+import argparse
+import gzip
+import time
+
+from models import db, Pedido
+from serializers import serializar_pedidos
+from provedor_json import ProvedorJSONPadrao, ProvedorOrjson, orjson
+from compressao import brotli
+from benchmarks.comum import criar_app_benchmark, popular_dados, metadados, salvar_json
+
+
+def medir(funcao, repeticoes):
+    """Milissegundos por chamada (mediana das repetições) e o último resultado"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    tempos.sort()
+    return round(tempos[len(tempos) // 2] * 1000, 3), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da codificação JSON e da compressão')
+    parser.add_argument('--pedidos', type=int, default=1000)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    parser.add_argument('--nivel-gzip', type=int, default=6)
+    parser.add_argument('--qualidade-brotli', type=int, default=4)
+    parser.add_argument('--saida', help='arquivo JSON para salvar os resultados')
+    args = parser.parse_args()
+
+    app, _ = criar_app_benchmark()
+    popular_dados(app, args.pedidos, args.pedidos, abertos=0)
+
+    with app.app_context():
+        dados = {'success': True, 'data': serializar_pedidos(Pedido.query.order_by(Pedido.id))}
+        db.session.remove()
+
+    provedores = {'json': ProvedorJSONPadrao(app)}
+    if orjson is not None:
+        provedores['orjson'] = ProvedorOrjson(app)
+
+    codificacao = {}
+    for nome, provedor in provedores.items():
+        ms, corpo = medir(lambda: provedor.dumps(dados).encode('utf-8'), args.repeticoes)
+        codificacao[nome] = {'ms': ms, 'bytes': len(corpo)}
+
+    compressores = {'gzip': lambda: gzip.compress(corpo, compresslevel=args.nivel_gzip)}
+    if brotli is not None:
+        compressores['brotli'] = lambda: brotli.compress(corpo, quality=args.qualidade_brotli)
+
+    compressao = {}
+    for nome, comprimir in compressores.items():
+        ms, comprimido = medir(comprimir, args.repeticoes)
+        compressao[nome] = {'ms': ms, 'bytes': len(comprimido), 'razao': round(len(corpo) / len(comprimido), 2)}
+
+    print(f"\nCodificação de {args.pedidos} pedidos ({len(corpo)} bytes)")
+    for nome, r in codificacao.items():
+        print(f"  {nome:<8} {r['ms']:>9} ms")
+    print('\nCompressão')
+    for nome, r in compressao.items():
+        print(f"  {nome:<8} {r['ms']:>9} ms {r['bytes']:>10} bytes ({r['razao']}x)")
+    if orjson is None:
+        print('\norjson não instalado: pip install orjson')
+    if brotli is None:
+        print('brotli não instalado: pip install brotli')
+
+    if args.saida:
+        salvar_json(args.saida, {
+            'meta': {**metadados(), 'parametros': vars(args)},
+            'bytes_sem_compressao': len(corpo),
+            'codificacao': codificacao,
+            'compressao': compressao,
+        })
+
+
+if __name__ == '__main__':
+    main()
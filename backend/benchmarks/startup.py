@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark do tempo de inicialização de um worker
+
+Cada medição roda em um processo Python novo (como um worker recém-criado)
+e mede separadamente `import app`, `create_app()` e, para comparação, o
+init_database (create_all + migrações + seed) que o boot antigo executava
+a cada inicialização.
+
+Uso (a partir de backend/):
+    python -m benchmarks.startup --execucoes 20 --saida startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.comum import resumir_latencias, metadados, salvar_json
+
+SCRIPT = """
+import json, sys, time
+inicio = time.perf_counter()
+from app import create_app
+importado = time.perf_counter()
+app = create_app({{'SQLALCHEMY_DATABASE_URI': sys.argv[1]}})
+criado = time.perf_counter()
+if {com_init}:
+    from database import init_database
+    init_database(app)
+fim = time.perf_counter()
+print(json.dumps({{'import': importado - inicio, 'create_app': criado - importado,
+                  'init_database': fim - criado, 'total': fim - inicio}}))
+"""
+
+ETAPAS = ('import', 'create_app', 'init_database', 'total')
+
+
+def medir(uri, execucoes, com_init):
+    """Roda o boot em processos novos e resume cada etapa"""
+    diretorio = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = SCRIPT.format(com_init=com_init)
+    tempos = {etapa: [] for etapa in ETAPAS}
+    for _ in range(execucoes):
+        saida = subprocess.run(
+            [sys.executable, '-c', codigo, uri], cwd=diretorio,
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        for etapa, valor in json.loads(saida).items():
+            tempos[etapa].append(valor)
+    return {etapa: resumir_latencias(valores) for etapa, valores in tempos.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de inicialização da aplicação')
+    parser.add_argument('--execucoes', type=int, default=20)
+    parser.add_argument('--saida', help='arquivo JSON para salvar os resultados')
+    args = parser.parse_args()
+
+    caminho = os.path.join(tempfile.mkdtemp(prefix='garagem-startup-'), 'startup.db')
+    uri = f'sqlite:///{caminho}'
+
+    # Banco já inicializado, como em produção depois de `flask db init`
+    medir(uri, 1, True)
+
+    resultados = {
+        'create_app': medir(uri, args.execucoes, False),
+        'create_app + init_database': medir(uri, args.execucoes, True),
+    }
+
+    print(f"\n{'Boot (p50 ms)':30} " + ' '.join(f'{etapa:>14}' for etapa in ETAPAS))
+    for nome, r in resultados.items():
+        print(f"{nome:30} " + ' '.join(f"{r[etapa]['p50_ms']:>14}" for etapa in ETAPAS))
+    print("\nCom preload_app (gunicorn.conf.py) os workers nascem por fork depois do"
+          " import e do create_app: um respawn não paga nenhuma dessas etapas.")
+
+    if args.saida:
+        salvar_json(args.saida, {'meta': {**metadados(), 'parametros': vars(args)}, 'resultados': resultados})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark do cálculo de taxa de entrega
+
+Compila tabelas com milhares de regras de bairro e de prefixo de CEP e
+mede o tempo por consulta de cada caminho (CEP, bairro exato, trecho e
+taxa padrão). Bairro e CEP devem custar o mesmo com 10 ou 10.000 regras;
+os trechos ('contem') são percorridos em ordem e crescem com a sua própria
+quantidade, que costuma ser pequena.
+
+Uso (a partir de backend/):
+    python -m benchmarks.taxas --regras 10 1000 10000 --consultas 200000
+"""
+
+import argparse
+import random
+import time
+
+from taxas import TabelaTaxas, REGRAS_INICIAIS
+from benchmarks.comum import metadados, salvar_json
+
+
+def calculo_fixo(bairro):
+    """Cálculo usado antes da tabela de regras, para referência"""
+    if not bairro:
+        return 5.00
+    nome = bairro.lower()
+    if "gramacho" in nome:
+        return 1.00
+    elif "centro" in nome:
+        return 2.00
+    elif "parque" in nome or "vila" in nome:
+        return 3.00
+    elif "jardim" in nome or "mutuá" in nome:
+        return 4.00
+    else:
+        return 5.00
+
+
+def gerar_regras(quantidade, semente=42):
+    """Metade bairros exatos, metade prefixos de CEP, mais as regras iniciais"""
+    aleatorio = random.Random(semente)
+    bairros = [f'Bairro Sintético {i}' for i in range(quantidade // 2)]
+    ceps = sorted({
+        str(aleatorio.randrange(10 ** 7, 10 ** 8))[:aleatorio.choice((3, 5, 8))]
+        for _ in range(quantidade - len(bairros))
+    })
+    regras = [('bairro', nome, 6.0, 100) for nome in bairros]
+    regras += [('cep', cep, 7.0, 100) for cep in ceps]
+    return regras + REGRAS_INICIAIS, bairros, ceps
+
+
+def medir(funcao, argumentos, consultas):
+    """Nanossegundos por chamada, ciclando pelos argumentos"""
+    total = len(argumentos)
+    for i in range(min(consultas, 10000)):  # aquecimento
+        funcao(*argumentos[i % total])
+    inicio = time.perf_counter()
+    for i in range(consultas):
+        funcao(*argumentos[i % total])
+    return round((time.perf_counter() - inicio) / consultas * 1e9, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cálculo de taxa de entrega')
+    parser.add_argument('--regras', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--consultas', type=int, default=200000)
+    parser.add_argument('--saida', help='arquivo JSON para salvar os resultados')
+    args = parser.parse_args()
+
+    resultados = {}
+    for quantidade in args.regras:
+        regras, bairros, ceps = gerar_regras(quantidade)
+
+        inicio = time.perf_counter()
+        tabela = TabelaTaxas(regras)
+        compilacao_ms = round((time.perf_counter() - inicio) * 1000, 3)
+
+        caminhos = {
+            'cep': [('', cep.ljust(8, '0')) for cep in ceps[:1000]],
+            'bairro': [(nome.upper(), None) for nome in bairros[:1000]],
+            'contem': [('Jardim Primavera', None), ('Vila São Luiz', None), ('Mutuá', None)],
+            'padrao': [('Bairro Desconhecido', None)],
+        }
+        resultados[quantidade] = {
+            'compilacao_ms': compilacao_ms,
+            **{
+                f'{caminho}_ns': medir(tabela.calcular, argumentos, args.consultas)
+                for caminho, argumentos in caminhos.items()
+            },
+        }
+
+    referencia = medir(calculo_fixo, [('Jardim Primavera',), ('Bairro Desconhecido',)], args.consultas)
+
+    print(f"\n{'Regras':>8} {'compilar ms':>12} {'CEP ns':>8} {'bairro ns':>10} "
+          f"{'trecho ns':>10} {'padrão ns':>10}")
+    for quantidade, r in resultados.items():
+        print(f"{quantidade:>8} {r['compilacao_ms']:>12} {r['cep_ns']:>8} {r['bairro_ns']:>10} "
+              f"{r['contem_ns']:>10} {r['padrao_ns']:>10}")
+    print(f"\nCálculo fixo anterior: {referencia} ns por consulta")
+
+    if args.saida:
+        salvar_json(args.saida, {
+            'meta': {**metadados(), 'parametros': vars(args)},
+            'por_quantidade_de_regras': resultados,
+            'calculo_fixo_ns': referencia,
+        })
+
+
+if __name__ == '__main__':
+    main()
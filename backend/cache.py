@@ -0,0 +1,192 @@
+"""
+Caches em memória do processo
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class CacheTTL:
+    """Cache chave/valor em que cada item expira após ttl segundos"""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._itens = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave):
+        """Retorna o valor guardado ou None se não existir/expirou"""
+        item = self._itens.get(chave)
+        if item is None:
+            return None
+        valor, expira_em = item
+        if time.monotonic() >= expira_em:
+            with self._lock:
+                self._itens.pop(chave, None)
+            return None
+        return valor
+
+    def set(self, chave, valor, ttl=None):
+        expira_em = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._itens[chave] = (valor, expira_em)
+
+    def invalidar(self, chave=None):
+        """Remove uma chave, ou tudo se nenhuma for informada"""
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+            else:
+                self._itens.pop(chave, None)
+
+
+class CacheLRU:
+    """Cache com limite de itens (descarta o menos usado) e expiração por TTL.
+
+    Conta acertos e falhas para acompanhar a eficácia do cache. Funções
+    registradas em ao_invalidar são chamadas a cada invalidação, permitindo
+    repassá-la a outros processos (ex.: publicar em um canal Redis e, no
+    receptor, chamar invalidar(chave, propagar=False)).
+    """
+
+    def __init__(self, max_itens, ttl):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._ouvintes = []
+        self._geracao = 0  # incrementada a cada invalidação
+        self.acertos = 0
+        self.falhas = 0
+        self.invalidacoes = 0
+
+    def obter(self, chave, carregar):
+        """Retorna o valor da chave, chamando carregar() em caso de falha.
+
+        Um None devolvido por carregar() não é guardado, nem um valor cuja
+        carga começou antes de uma invalidação (ele pode já estar velho).
+        """
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and item[1] > agora:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[0]
+            self.falhas += 1
+            geracao = self._geracao
+
+        valor = carregar()
+        if valor is not None:
+            self.guardar(chave, valor, geracao)
+        return valor
+
+    def guardar(self, chave, valor, geracao=None):
+        """Guarda um valor já conhecido.
+
+        Com geracao, só guarda se nenhuma invalidação ocorreu desde então.
+        """
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+
+    def invalidar(self, chave=None, propagar=True):
+        """Remove uma chave (ou tudo) e avisa os ouvintes registrados"""
+        with self._lock:
+            if chave is None:
+                self._itens.clear()
+            else:
+                self._itens.pop(chave, None)
+            self._geracao += 1
+            self.invalidacoes += 1
+        if propagar:
+            for ouvinte in self._ouvintes:
+                ouvinte(chave)
+
+    def ao_invalidar(self, ouvinte):
+        """Registra uma função chamada com a chave invalidada"""
+        self._ouvintes.append(ouvinte)
+        return ouvinte
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            'itens': len(self._itens),
+            'max_itens': self.max_itens,
+            'ttl': self.ttl,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / total, 4) if total else 0.0,
+            'invalidacoes': self.invalidacoes,
+        }
+
+
+def invalidar_ao_gravar(cache, *modelos):
+    """Limpa o cache quando uma transação gravar algum dos modelos.
+
+    A limpeza acontece no commit, para que uma leitura concorrente não
+    guarde no cache dados de uma transação que ainda não terminou.
+    """
+    chave_sessao = f'invalidar_cache_{id(cache)}'
+
+    @event.listens_for(Session, 'after_flush')
+    def _marcar(session, flush_context):
+        alterados = list(session.new) + list(session.dirty) + list(session.deleted)
+        if any(isinstance(obj, modelos) for obj in alterados):
+            session.info[chave_sessao] = True
+
+    @event.listens_for(Session, 'do_orm_execute')
+    def _marcar_em_massa(orm_execute_state):
+        # INSERT/UPDATE/DELETE em massa não passam pelo flush
+        if orm_execute_state.is_select:
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, modelos):
+            orm_execute_state.session.info[chave_sessao] = True
+
+    @event.listens_for(Session, 'after_commit')
+    def _limpar(session):
+        if session.info.pop(chave_sessao, False):
+            cache.invalidar()
+
+    @event.listens_for(Session, 'after_rollback')
+    def _descartar(session):
+        session.info.pop(chave_sessao, None)
+
+
+class CacheCardapio:
+    """Respostas do cardápio já serializadas em bytes, com o hash para o ETag.
+
+    A versão é incrementada a cada alteração de prato neste processo; o TTL
+    garante que os outros workers também vejam a alteração em pouco tempo.
+    O ETag é o hash do conteúdo, então é igual em todos os workers.
+    """
+
+    def __init__(self, ttl):
+        self.versao = 0
+        self._itens = CacheTTL(ttl)
+        self._lock = threading.Lock()
+
+    def obter(self, chave, gerar):
+        """Retorna (corpo, etag), gerando o corpo apenas se necessário"""
+        versao = self.versao
+        item = self._itens.get((chave, versao))
+        if item is None:
+            corpo = gerar()
+            item = (corpo, hashlib.sha1(corpo).hexdigest())
+            self._itens.set((chave, versao), item)
+        return item
+
+    def invalidar(self):
+        """Descarta as respostas guardadas (chamado ao alterar o cardápio)"""
+        with self._lock:
+            self.versao += 1
+        self._itens.invalidar()
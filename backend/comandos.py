@@ -0,0 +1,57 @@
+"""
+Comandos de linha de comando (flask db ...)
+"""
+
+import click
+from flask.cli import AppGroup
+from models import db, Prato
+from database import criar_esquema, seed_initial_data
+from resumo import reconstruir_resumo_diario
+from idempotencia import limpar_expiradas
+from arquivo import arquivar as arquivar_pedidos
+from config import Config
+
+db_cli = AppGroup('db', help='Comandos de manutenção do banco de dados')
+
+
+@db_cli.command('init')
+def init():
+    """Cria as tabelas e aplica as migrações pendentes"""
+    novas = criar_esquema()
+    click.echo(f"Esquema pronto ({len(novas)} migrações aplicadas)")
+
+
+@db_cli.command('seed')
+def seed():
+    """Insere os usuários, pratos e acompanhamentos iniciais (se o banco estiver vazio)"""
+    if Prato.query.first() is not None:
+        click.echo("Banco já possui dados - nada a fazer")
+        return
+    seed_initial_data()
+
+
+@db_cli.command('rebuild-resumo')
+def rebuild_resumo():
+    """Recalcula a tabela resumo_diario a partir de movimentacoes_caixa"""
+    with db.engine.begin() as conn:
+        linhas = reconstruir_resumo_diario(conn)
+    click.echo(f"Resumo diário reconstruído: {linhas} linhas")
+
+
+@db_cli.command('limpar-idempotencia')
+def limpar_idempotencia():
+    """Apaga as Idempotency-Keys mais antigas que IDEMPOTENCIA_RETENCAO"""
+    removidas = limpar_expiradas()
+    click.echo(f"Chaves de idempotência removidas: {removidas}")
+
+
+@db_cli.command('arquivar')
+@click.option('--dias', type=int, default=Config.ARQUIVO_IDADE_DIAS, show_default=True,
+              help='Idade mínima (dias) dos pedidos finalizados ou cancelados')
+@click.option('--lote', type=int, default=1000, show_default=True,
+              help='Pedidos movidos por transação')
+def arquivar(dias, lote):
+    """Move pedidos encerrados antigos e suas movimentações para as tabelas de arquivo"""
+    registro = arquivar_pedidos(dias, lote)
+    click.echo(f"Arquivados: {registro.pedidos} pedidos e {registro.movimentacoes} movimentações "
+               f"(criados antes de {registro.limite:%Y-%m-%d %H:%M})")
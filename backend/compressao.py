@@ -0,0 +1,66 @@
+"""
+Compressão das respostas (brotli ou gzip, conforme o Accept-Encoding)
+
+Comprime respostas JSON e de texto a partir de COMPRESSAO_MINIMO bytes;
+abaixo disso os cabeçalhos e a CPU custam mais que os bytes economizados.
+brotli é usado quando o pacote está instalado e o cliente o aceita. Streams
+(SSE, exportações, que têm o próprio gzip) e arquivos ficam de fora.
+
+O corpo comprimido não é byte a byte igual ao original, então um ETag forte
+passa a ser fraco (W/"...") quando a resposta é comprimida.
+"""
+
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # opcional: pip install brotli
+    brotli = None
+
+TIPOS_COMPRESSIVEIS = (
+    'application/json', 'application/x-ndjson', 'application/javascript', 'text/',
+)
+
+
+def _compressivel(response):
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if 'Content-Encoding' in response.headers:
+        return False
+    return (response.mimetype or '').startswith(TIPOS_COMPRESSIVEIS)
+
+
+def registrar_compressao(app):
+    """Liga a compressão das respostas da aplicação"""
+    minimo = app.config['COMPRESSAO_MINIMO']
+    nivel_gzip = app.config['COMPRESSAO_NIVEL_GZIP']
+    qualidade_brotli = app.config['COMPRESSAO_QUALIDADE_BROTLI']
+
+    @app.after_request
+    def comprimir(response):
+        if not minimo or not _compressivel(response):
+            return response
+
+        corpo = response.get_data()
+        if len(corpo) < minimo:
+            return response
+
+        # A resposta muda conforme o Accept-Encoding, mesmo quando sai sem compressão
+        response.vary.add('Accept-Encoding')
+        aceitas = request.accept_encodings
+        if brotli is not None and aceitas['br']:
+            response.set_data(brotli.compress(corpo, quality=qualidade_brotli))
+            response.headers['Content-Encoding'] = 'br'
+        elif aceitas['gzip']:
+            response.set_data(gzip.compress(corpo, compresslevel=nivel_gzip))
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            return response
+
+        etag, fraco = response.get_etag()
+        if etag and not fraco:
+            response.set_etag(etag, weak=True)
+        return response
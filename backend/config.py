@@ -6,8 +6,86 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///garagem_lanche.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Pool de conexões (vira SQLALCHEMY_ENGINE_OPTIONS em create_app)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    
+    # PRAGMAs aplicados em cada conexão SQLite: WAL permite leituras durante
+    # uma escrita e o busy_timeout espera o lock em vez de falhar na hora
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # negativo = KiB (64 MB)
+        'temp_store': 'MEMORY',
+    }
+    
+    # Servidor WSGI de produção (run.py --prod / gunicorn.conf.py)
+    WEB_HOST = os.environ.get('WEB_HOST', '0.0.0.0')
+    WEB_PORT = int(os.environ.get('WEB_PORT', 5000))
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 2))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 8))
+    # Threads extras por worker para os streams SSE abertos (cada um ocupa uma thread)
+    SSE_CONEXOES = int(os.environ.get('SSE_CONEXOES', 8))
+    
+    # Intervalo (segundos) em que cada worker procura eventos de pedidos gravados pelos outros
+    EVENTOS_INTERVALO = float(os.environ.get('EVENTOS_INTERVALO', 0.5))
+    
     # Configurações específicas do sistema
     SENHA_COZINHA = "garagem2025"
     
+    # Validade (segundos) do token de sessão administrativo
+    TOKEN_VALIDADE = int(os.environ.get('TOKEN_VALIDADE', 15 * 60))
+    
+    # Cache (por processo) do tipo/situação de cada usuário nas rotas admin
+    AUTORIZACAO_CACHE_MAX = int(os.environ.get('AUTORIZACAO_CACHE_MAX', 1024))
+    AUTORIZACAO_CACHE_TTL = int(os.environ.get('AUTORIZACAO_CACHE_TTL', 300))
+    
+    # Verificações de senha simultâneas no login e tempo máximo de espera
+    LOGIN_MAX_CONCORRENTES = int(os.environ.get('LOGIN_MAX_CONCORRENTES', 2))
+    LOGIN_TIMEOUT = int(os.environ.get('LOGIN_TIMEOUT', 5))
+    
+    # Tempo (segundos) que as estatísticas do dashboard admin ficam em cache
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+    
+    # Tempo máximo (segundos) que outro worker leva para ver uma alteração no cardápio
+    CARDAPIO_CACHE_TTL = int(os.environ.get('CARDAPIO_CACHE_TTL', 60))
+    
+    # Por quanto tempo (segundos) uma Idempotency-Key de pedido é lembrada
+    IDEMPOTENCIA_RETENCAO = int(os.environ.get('IDEMPOTENCIA_RETENCAO', 24 * 60 * 60))
+    IDEMPOTENCIA_CACHE_MAX = int(os.environ.get('IDEMPOTENCIA_CACHE_MAX', 10000))
+    
+    # Intervalo máximo até outro worker enxergar mudanças nas taxas de entrega
+    TAXAS_RECARGA_TTL = int(os.environ.get('TAXAS_RECARGA_TTL', 60))
+    
+    # Diferença (horas) entre o horário local e o UTC gravado no banco, usada nas análises por hora
+    FUSO_HORARIO = int(os.environ.get('FUSO_HORARIO', -3))
+    
+    # Pedidos encerrados há mais dias que isso vão para as tabelas de arquivo (flask db arquivar)
+    ARQUIVO_IDADE_DIAS = int(os.environ.get('ARQUIVO_IDADE_DIAS', 90))
+    # Tempo (segundos) até os workers notarem um arquivamento feito por outro processo
+    ARQUIVO_CACHE_TTL = int(os.environ.get('ARQUIVO_CACHE_TTL', 60))
+    
+    # Fração das requisições medidas para /api/metrics (0 desliga, 1 mede todas)
+    METRICAS_AMOSTRAGEM = float(os.environ.get('METRICAS_AMOSTRAGEM', 1.0))
+    # Token do coletor (Prometheus) em /api/metrics: Authorization: Bearer <token>
+    METRICAS_TOKEN = os.environ.get('METRICAS_TOKEN')
+    
+    # Consultas SQL acima deste tempo (ms) vão para o log com os parâmetros (0 desliga)
+    CONSULTA_LENTA_MS = float(os.environ.get('CONSULTA_LENTA_MS', 0))
+    
+    # Onde ficam os perfis (.pstats / pilhas) do /api/admin/perfil (padrão: instance/perfis)
+    PERFIL_DIR = os.environ.get('PERFIL_DIR')
+    
+    # Codificação JSON com orjson quando instalado (False força o json padrão)
+    JSON_ORJSON = os.environ.get('JSON_ORJSON', '1') != '0'
+    
+    # Respostas a partir deste tamanho (bytes) saem com brotli/gzip (0 desliga)
+    COMPRESSAO_MINIMO = int(os.environ.get('COMPRESSAO_MINIMO', 1024))
+    COMPRESSAO_NIVEL_GZIP = int(os.environ.get('COMPRESSAO_NIVEL_GZIP', 6))
+    COMPRESSAO_QUALIDADE_BROTLI = int(os.environ.get('COMPRESSAO_QUALIDADE_BROTLI', 4))
+    
     # CORS
     CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:5500", "*"]
@@ -1,12 +1,52 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from models import db, Prato, Acompanhamento, Cliente, Endereco, Pedido, MovimentacaoCaixa, Usuario
 from models import StatusPedido, FormaPagamento, TipoUsuario
+from migracoes import aplicar_migracoes
+from taxas import motor_taxas
 
 def init_database(app):
-    """Inicializa o banco de dados e cria as tabelas"""
+    """Inicializa o banco de dados: esquema, migrações e dados iniciais"""
     with app.app_context():
-        db.create_all()
+        novas = criar_esquema()
+        if novas:
+            print(f"Migrações aplicadas: {novas}")
         seed_initial_data()
 
+def criar_esquema():
+    """Cria as tabelas que faltam e aplica as migrações pendentes"""
+    db.create_all()
+    return aplicar_migracoes(db.engine)
+
+def opcoes_engine(config):
+    """Opções do engine (pool de conexões) a partir da configuração"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # Banco em memória usa uma única conexão compartilhada (StaticPool)
+        return {}
+    return {
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_pre_ping': url.get_backend_name() != 'sqlite',
+    }
+
+def configurar_sqlite(app):
+    """Aplica os PRAGMAs de SQLITE_PRAGMAS em cada nova conexão"""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = app.config['SQLITE_PRAGMAS']
+
+    @event.listens_for(engine, 'connect')
+    def aplicar_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nome, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nome}={valor}')
+        cursor.close()
+
 def seed_initial_data():
     """Popula o banco com dados iniciais"""
 
@@ -66,19 +106,6 @@ def seed_initial_data():
     db.session.commit()
     print("Dados iniciais inseridos no banco de dados!")
 
-def calcular_taxa_entrega(bairro):
-    """Calcula a taxa de entrega baseada no bairro"""
-    if not bairro:
-        return 5.00
-
-    nome = bairro.lower()
-    if "gramacho" in nome:
-        return 1.00
-    elif "centro" in nome:
-        return 2.00
-    elif "parque" in nome or "vila" in nome:
-        return 3.00
-    elif "jardim" in nome or "mutuá" in nome:
-        return 4.00
-    else:
-        return 5.00
+def calcular_taxa_entrega(bairro, cep=None):
+    """Calcula a taxa de entrega pelas regras da tabela taxas_entrega"""
+    return motor_taxas.calcular(bairro, cep)
@@ -0,0 +1,113 @@
+"""
+Endereços de entrega deduplicados
+
+Cada endereço é gravado uma única vez, identificado pelo hash dos seus
+campos normalizados, e reaproveitado pelos pedidos seguintes. A tabela
+clientes_enderecos guarda quais endereços cada cliente já usou.
+"""
+
+import hashlib
+from sqlalchemy import insert, select, update
+
+from models import db, Endereco, ClienteEndereco
+from taxas import normalizar, digitos_cep
+
+
+def hash_endereco(cep, rua, numero, bairro, complemento):
+    """Hash dos campos normalizados (sem acentos, maiúsculas ou espaços extras).
+
+    O bairro entra no hash porque o CEP é opcional: sem ele, 'Rua 1, 10' em
+    bairros diferentes seriam o mesmo endereço.
+    """
+    partes = [digitos_cep(cep)] + [normalizar(parte) for parte in (rua, numero, bairro, complemento)]
+    return hashlib.sha256('|'.join(partes).encode('utf-8')).hexdigest()
+
+
+def linha_endereco(dados, taxa_entrega):
+    """Valores do endereço de um pedido, já com o hash"""
+    linha = {
+        'cep': dados.get('cep', ''),
+        'rua': dados['rua'],
+        'numero': dados['numero'],
+        'bairro': dados['bairro'],
+        'complemento': dados.get('complemento', ''),
+        'taxa_entrega': taxa_entrega
+    }
+    linha['hash'] = hash_endereco(
+        linha['cep'], linha['rua'], linha['numero'], linha['bairro'], linha['complemento']
+    )
+    return linha
+
+
+def _insert_ignorando_existentes(modelo, chaves, atualizar=()):
+    """INSERT que não falha se a chave já existe (atualizando as colunas informadas)"""
+    dialeto = db.session.get_bind().dialect.name
+    if dialeto == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+    elif dialeto == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+    else:
+        return None
+
+    stmt = insert_dialeto(modelo)
+    if atualizar:
+        return stmt.on_conflict_do_update(
+            index_elements=chaves, set_={coluna: stmt.excluded[coluna] for coluna in atualizar}
+        )
+    return stmt.on_conflict_do_nothing(index_elements=chaves)
+
+
+def obter_enderecos(linhas):
+    """Garante que os endereços existam; retorna {hash: endereco_id}.
+
+    Endereços já conhecidos custam uma consulta; os novos, mais um INSERT.
+    """
+    por_hash = {linha['hash']: linha for linha in linhas}
+    ids = dict(
+        db.session.query(Endereco.hash, Endereco.id).filter(Endereco.hash.in_(list(por_hash)))
+    )
+
+    novos = [linha for chave, linha in por_hash.items() if chave not in ids]
+    if novos:
+        # Outra requisição pode gravar o mesmo endereço ao mesmo tempo
+        stmt = _insert_ignorando_existentes(Endereco, ['hash'])
+        db.session.execute(insert(Endereco) if stmt is None else stmt, novos)
+        ids.update(db.session.query(Endereco.hash, Endereco.id).filter(
+            Endereco.hash.in_([linha['hash'] for linha in novos])
+        ))
+    return ids
+
+
+def salvar_enderecos_clientes(pares, usado_em):
+    """Registra (cliente_id, endereco_id) como endereços salvos, atualizando o último uso"""
+    linhas = [
+        {'cliente_id': cliente_id, 'endereco_id': endereco_id, 'ultimo_uso': usado_em}
+        for cliente_id, endereco_id in set(pares)
+    ]
+    stmt = _insert_ignorando_existentes(
+        ClienteEndereco, ['cliente_id', 'endereco_id'], atualizar=['ultimo_uso']
+    )
+    if stmt is not None:
+        db.session.execute(stmt, linhas)
+        return
+
+    for linha in linhas:
+        resultado = db.session.execute(
+            update(ClienteEndereco).where(
+                ClienteEndereco.cliente_id == linha['cliente_id'],
+                ClienteEndereco.endereco_id == linha['endereco_id']
+            ).values(ultimo_uso=usado_em)
+        )
+        if resultado.rowcount == 0:
+            db.session.execute(insert(ClienteEndereco), [linha])
+
+
+def enderecos_salvos(cliente_id, limite=5):
+    """Endereços usados pelo cliente, do mais recente para o mais antigo"""
+    return db.session.scalars(
+        select(Endereco)
+        .join(ClienteEndereco, ClienteEndereco.endereco_id == Endereco.id)
+        .where(ClienteEndereco.cliente_id == cliente_id)
+        .order_by(ClienteEndereco.ultimo_uso.desc())
+        .limit(limite)
+    ).all()
@@ -0,0 +1,237 @@
+"""
+Barramento de eventos dos pedidos para as telas da cozinha e da entrega
+
+Os eventos são gravados na tabela eventos_pedidos, compartilhada por todos
+os workers. Em cada processo com telas conectadas, uma thread lê os eventos
+novos pelo id e os entrega às filas das telas daquele processo.
+"""
+
+import logging
+import queue
+import threading
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from models import db, EventoPedido
+from provedor_json import para_json
+
+log = logging.getLogger('garagem.eventos')
+
+# A cada quantas publicações (neste processo) os eventos mais antigos são apagados
+LIMPEZA_A_CADA = 100
+
+
+class Assinatura:
+    """Fila de eventos de uma tela conectada ao stream"""
+
+    def __init__(self, status, tamanho_fila):
+        self.status = set(status) if status else None
+        self.fila = queue.Queue(maxsize=tamanho_fila)
+        self.precisa_snapshot = True
+
+    def interessa(self, evento):
+        """Indica se o evento afeta os pedidos acompanhados por esta tela"""
+        if self.status is None:
+            return True
+        return evento['status'] in self.status or evento['status_anterior'] in self.status
+
+    def descartar_fila(self):
+        """Esvazia a fila de eventos pendentes"""
+        try:
+            while True:
+                self.fila.get_nowait()
+        except queue.Empty:
+            pass
+
+    def proximo(self, timeout):
+        """Aguarda o próximo evento (retorna None se o tempo acabar)"""
+        try:
+            return self.fila.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class BarramentoPedidos:
+    """Distribui as alterações de pedidos para as telas conectadas.
+
+    publicar grava o evento no banco; a thread leitora de cada worker o
+    encontra em até `intervalo` segundos (na hora, se ele foi publicado no
+    próprio worker). A leitura por id depende de os ids serem confirmados
+    em ordem, o que o SQLite garante por serializar as escritas. A tabela
+    guarda os últimos `tamanho_historico` eventos, usados para reenviar o
+    que uma tela perdeu ao reconectar (Last-Event-ID).
+    """
+
+    def __init__(self, app, tamanho_fila=100, tamanho_historico=500, intervalo=0.5):
+        self._app = app
+        self._lock = threading.Lock()
+        self._assinaturas = set()
+        self._tamanho_fila = tamanho_fila
+        self._tamanho_historico = tamanho_historico
+        self._intervalo = intervalo
+        self._novidade = threading.Event()
+        self._leitor = None
+        self._ultimo_lido = 0
+        self._publicacoes = 0
+
+    def publicar(self, tipo, pedido, status_anterior=None):
+        """Publica um pedido novo ou alterado para todas as telas"""
+        self.publicar_varios(tipo, [pedido], status_anterior)
+
+    def publicar_varios(self, tipo, pedidos, status_anterior=None):
+        """Grava um evento por pedido em um único INSERT e confirma.
+
+        Chamado depois do commit dos pedidos: uma falha aqui vai para o log
+        sem afetar a resposta (as telas se corrigem no próximo snapshot).
+        """
+        agora = datetime.utcnow()
+        with self._lock:
+            self._publicacoes += 1
+            limpar = self._publicacoes % LIMPEZA_A_CADA == 0
+        try:
+            db.session.execute(insert(EventoPedido), [
+                {
+                    'tipo': tipo,
+                    'status': pedido['status'],
+                    'status_anterior': status_anterior,
+                    # Serializa uma única vez, independente do número de telas
+                    'dados': para_json(pedido),
+                    'created_at': agora
+                } for pedido in pedidos
+            ])
+            if limpar:
+                ultimo = select(func.max(EventoPedido.id)).scalar_subquery()
+                db.session.execute(delete(EventoPedido).where(
+                    EventoPedido.id <= ultimo - self._tamanho_historico
+                ))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            log.exception('Falha ao publicar os eventos dos pedidos')
+            return
+        self._novidade.set()
+
+    def assinar(self, status=None, ultimo_evento=None):
+        """Registra uma nova tela; reenvia o que ela perdeu se possível.
+
+        Deve ser chamado dentro de uma requisição (usa a sessão do banco).
+        """
+        assinatura = Assinatura(status, self._tamanho_fila)
+        with self._lock:
+            if self._leitor is None:
+                # Começa do evento mais recente: o snapshot cobre o que veio antes
+                self._ultimo_lido = db.session.scalar(select(func.max(EventoPedido.id))) or 0
+                self._leitor = threading.Thread(
+                    target=self._ler_eventos, name='eventos-pedidos', daemon=True
+                )
+                self._leitor.start()
+
+            if ultimo_evento is not None and ultimo_evento <= self._ultimo_lido:
+                perdidos = self._perdidos(assinatura, ultimo_evento)
+                if perdidos is not None:
+                    assinatura.precisa_snapshot = False
+                    for evento in perdidos:
+                        assinatura.fila.put_nowait(evento)
+            self._assinaturas.add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        """Remove uma tela desconectada"""
+        with self._lock:
+            self._assinaturas.discard(assinatura)
+
+    @property
+    def ultimo_id(self):
+        return self._ultimo_lido
+
+    def _perdidos(self, assinatura, ultimo_evento):
+        """Eventos após ultimo_evento que interessam à tela, ou None se não couberem
+        na fila ou já tiverem sido apagados da tabela"""
+        linhas = db.session.execute(
+            select(EventoPedido)
+            .where(EventoPedido.id > ultimo_evento, EventoPedido.id <= self._ultimo_lido)
+            .order_by(EventoPedido.id)
+            .limit(self._tamanho_historico)
+        ).scalars().all()
+        if ultimo_evento < self._ultimo_lido and (not linhas or linhas[0].id != ultimo_evento + 1):
+            return None
+        perdidos = [evento for evento in map(_evento, linhas) if assinatura.interessa(evento)]
+        return perdidos if len(perdidos) <= self._tamanho_fila else None
+
+    def _ler_eventos(self):
+        """Thread que entrega os eventos gravados às telas deste processo.
+
+        Termina quando a última tela se desconecta; assinar a inicia de novo.
+        """
+        while True:
+            self._novidade.wait(self._intervalo)
+            self._novidade.clear()
+            with self._lock:
+                if not self._assinaturas:
+                    self._leitor = None
+                    return
+                desde = self._ultimo_lido
+
+            try:
+                with self._app.app_context():
+                    eventos = [
+                        _evento(linha) for linha in db.session.execute(
+                            select(EventoPedido).where(EventoPedido.id > desde)
+                            .order_by(EventoPedido.id).limit(self._tamanho_historico)
+                        ).scalars()
+                    ]
+            except Exception:
+                log.exception('Falha ao ler os eventos dos pedidos')
+                continue
+
+            with self._lock:
+                for evento in eventos:
+                    self._ultimo_lido = evento['id']
+                    self._entregar(evento)
+            if len(eventos) == self._tamanho_historico:
+                self._novidade.set()
+
+    def _entregar(self, evento):
+        """Coloca o evento na fila das telas interessadas (com o lock adquirido)"""
+        for assinatura in self._assinaturas:
+            if not assinatura.interessa(evento):
+                continue
+            try:
+                assinatura.fila.put_nowait(evento)
+            except queue.Full:
+                # Tela lenta: descarta a fila e manda um snapshot completo
+                assinatura.descartar_fila()
+                assinatura.precisa_snapshot = True
+                assinatura.fila.put_nowait(evento)
+
+
+def _evento(linha):
+    return {
+        'id': linha.id,
+        'tipo': linha.tipo,
+        'status': linha.status,
+        'status_anterior': linha.status_anterior,
+        'dados': linha.dados
+    }
+
+
+def formatar_sse(evento, dados, evento_id=None):
+    """Formata uma mensagem no padrão Server-Sent Events"""
+    linhas = []
+    if evento_id is not None:
+        linhas.append(f'id: {evento_id}')
+    linhas.append(f'event: {evento}')
+    linhas.append(f'data: {dados}')
+    return '\n'.join(linhas) + '\n\n'
+
+
+def registrar_eventos(app):
+    """Cria o barramento de eventos da aplicação (não acessa o banco)"""
+    app.extensions['eventos'] = BarramentoPedidos(app, intervalo=app.config['EVENTOS_INTERVALO'])
+
+
+def barramento_pedidos():
+    """Barramento de eventos da aplicação atual"""
+    return current_app.extensions['eventos']
@@ -0,0 +1,24 @@
+"""
+Configuração do gunicorn (gunicorn -c gunicorn.conf.py wsgi:app)
+
+Com SQLite poucos processos e várias threads rendem mais que muitos
+processos: as escritas são serializadas pelo arquivo de qualquer forma.
+Cada stream SSE aberto (/api/pedidos/cozinha/stream) ocupa uma thread
+enquanto a tela está conectada, então cada worker recebe SSE_CONEXOES
+threads além das WEB_THREADS que atendem as demais requisições.
+
+Como create_app não abre conexões, a aplicação pode ser carregada uma vez
+no processo mestre (preload_app) e os workers nascem por fork, já prontos.
+O esquema deve ser criado antes, com `flask --app app db init`.
+"""
+
+from config import Config
+
+bind = f'{Config.WEB_HOST}:{Config.WEB_PORT}'
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS + Config.SSE_CONEXOES
+worker_class = 'gthread'
+preload_app = True
+timeout = 60
+keepalive = 5
+accesslog = '-'
@@ -0,0 +1,85 @@
+"""
+Chaves de idempotência (cabeçalho Idempotency-Key) para a criação de pedidos
+
+A resposta de um POST bem-sucedido é gravada na mesma transação do
+pedido, em chaves_idempotencia. Uma repetição dentro de IDEMPOTENCIA_RETENCAO
+recebe a resposta guardada sem nenhuma escrita; o índice único da chave
+garante isso mesmo com duas repetições simultâneas em workers diferentes.
+Um cache LRU por processo evita a consulta ao banco nas repetições seguintes.
+"""
+
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from cache import CacheLRU
+from config import Config
+from models import db, ChaveIdempotencia
+
+CABECALHO = 'Idempotency-Key'
+TAMANHO_MAXIMO_CHAVE = 100
+
+RespostaGuardada = namedtuple('RespostaGuardada', 'hash_requisicao status_code corpo created_at')
+
+cache_idempotencia = CacheLRU(Config.IDEMPOTENCIA_CACHE_MAX, Config.IDEMPOTENCIA_RETENCAO)
+
+
+def hash_requisicao(dados):
+    """Hash do corpo da requisição, independente da ordem das chaves"""
+    texto = json.dumps(dados, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+
+def _limite_retencao():
+    return datetime.utcnow() - timedelta(seconds=Config.IDEMPOTENCIA_RETENCAO)
+
+
+def buscar_resposta(chave):
+    """Resposta guardada para a chave, ou None se ela não foi usada (ou expirou)"""
+    def carregar():
+        registro = ChaveIdempotencia.query.filter_by(chave=chave).first()
+        if registro is None:
+            return None
+        if registro.created_at < _limite_retencao():
+            # Expirada: libera a chave para ser gravada de novo nesta transação
+            db.session.delete(registro)
+            db.session.flush()
+            return None
+        return RespostaGuardada(
+            registro.hash_requisicao, registro.status_code, registro.resposta, registro.created_at
+        )
+
+    guardada = cache_idempotencia.obter(chave, carregar)
+    if guardada is not None and guardada.created_at < _limite_retencao():
+        # O TTL do cache conta da carga, não da gravação: a chave já expirou
+        cache_idempotencia.invalidar(chave)
+        guardada = carregar()
+    return guardada
+
+
+def registrar_resposta(chave, hash_dados, status_code, corpo):
+    """Adiciona a resposta à transação atual; confirme com lembrar_resposta após o commit"""
+    agora = datetime.utcnow()
+    db.session.add(ChaveIdempotencia(
+        chave=chave,
+        hash_requisicao=hash_dados,
+        status_code=status_code,
+        resposta=corpo,
+        created_at=agora
+    ))
+    return RespostaGuardada(hash_dados, status_code, corpo, agora)
+
+
+def lembrar_resposta(chave, resposta):
+    """Guarda no cache do processo uma resposta já gravada no banco"""
+    cache_idempotencia.guardar(chave, resposta)
+
+
+def limpar_expiradas():
+    """Apaga as chaves mais antigas que a retenção; retorna quantas foram removidas"""
+    removidas = ChaveIdempotencia.query.filter(
+        ChaveIdempotencia.created_at < _limite_retencao()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return removidas
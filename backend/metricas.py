@@ -0,0 +1,188 @@
+"""
+Métricas de desempenho por endpoint, expostas em /api/metrics (formato Prometheus)
+
+Em cada requisição amostrada (METRICAS_AMOSTRAGEM) são medidos o tempo
+total, a quantidade e o tempo das consultas SQL e o tamanho da resposta,
+somados por endpoint na memória do processo. Consultas mais lentas que
+CONSULTA_LENTA_MS vão para o log 'garagem.consultas_lentas', com os
+parâmetros, estejam ou não em uma requisição amostrada.
+
+Com vários workers cada processo tem as suas métricas; o Prometheus deve
+coletar cada um (ou somar as séries pelo label de instância).
+"""
+
+import bisect
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from flask import request
+from sqlalchemy import event
+
+from models import db
+
+log_consultas_lentas = logging.getLogger('garagem.consultas_lentas')
+
+# Limites (segundos) dos buckets do histograma de duração
+LIMITES_DURACAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+TAMANHO_MAXIMO_PARAMETROS = 500
+
+# Medição da requisição em andamento nesta thread (None se não foi amostrada).
+# Uma ContextVar custa bem menos por consulta SQL que o proxy de flask.g.
+_medicao_atual = ContextVar('medicao_atual', default=None)
+
+
+class _Medicao:
+    """Contadores da requisição em andamento"""
+    __slots__ = ('inicio', 'consultas', 'tempo_sql')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tempo_sql = 0.0
+
+
+class _Endpoint:
+    """Totais acumulados de um endpoint/método"""
+    __slots__ = ('buckets', 'duracao', 'quantidade', 'consultas', 'tempo_sql', 'bytes')
+
+    def __init__(self):
+        self.buckets = [0] * (len(LIMITES_DURACAO) + 1)  # o último é o +Inf
+        self.duracao = 0.0
+        self.quantidade = 0
+        self.consultas = 0
+        self.tempo_sql = 0.0
+        self.bytes = 0
+
+
+class Metricas:
+    """Agrega as medições das requisições e gera o texto para o Prometheus"""
+
+    def __init__(self, amostragem=1.0, consulta_lenta_ms=0):
+        self.amostragem = amostragem
+        self.consulta_lenta = consulta_lenta_ms / 1000 if consulta_lenta_ms else None
+        self._lock = threading.Lock()
+        self._endpoints = defaultdict(_Endpoint)  # (endpoint, metodo) -> _Endpoint
+        self._status = defaultdict(int)  # (endpoint, metodo, status) -> requisições
+
+    def iniciar_requisicao(self):
+        amostrada = self.amostragem >= 1 or random.random() < self.amostragem
+        _medicao_atual.set(_Medicao() if amostrada else None)
+
+    def finalizar_requisicao(self, response):
+        medicao = _medicao_atual.get()
+        if medicao is None:
+            return response
+        _medicao_atual.set(None)
+
+        duracao = time.perf_counter() - medicao.inicio
+        requisicao = request._get_current_object()  # um único acesso ao proxy
+        chave = (requisicao.endpoint or 'desconhecido', requisicao.method)
+        with self._lock:
+            totais = self._endpoints[chave]
+            totais.quantidade += 1
+            totais.duracao += duracao
+            totais.consultas += medicao.consultas
+            totais.tempo_sql += medicao.tempo_sql
+            # Respostas em stream não têm tamanho conhecido aqui
+            totais.bytes += response.content_length or 0
+            totais.buckets[bisect.bisect_left(LIMITES_DURACAO, duracao)] += 1
+            self._status[chave + (response.status_code,)] += 1
+        return response
+
+    def registrar_consulta(self, duracao, statement, parameters):
+        medicao = _medicao_atual.get()
+        if medicao is not None:
+            medicao.consultas += 1
+            medicao.tempo_sql += duracao
+        if self.consulta_lenta is not None and duracao >= self.consulta_lenta:
+            log_consultas_lentas.warning(
+                'Consulta lenta (%.1f ms): %s | parâmetros: %.*s',
+                duracao * 1000, ' '.join(statement.split()),
+                TAMANHO_MAXIMO_PARAMETROS, repr(parameters)
+            )
+
+    def exportar(self):
+        """Texto no formato de exposição do Prometheus"""
+        with self._lock:
+            endpoints = sorted(
+                (chave, _copiar(totais)) for chave, totais in self._endpoints.items()
+            )
+            status = sorted(self._status.items())
+
+        linhas = [
+            '# HELP garagem_metricas_amostragem Fração das requisições medidas',
+            '# TYPE garagem_metricas_amostragem gauge',
+            f'garagem_metricas_amostragem {self.amostragem}',
+            '# HELP garagem_http_requisicoes_total Requisições medidas por endpoint, método e status',
+            '# TYPE garagem_http_requisicoes_total counter',
+        ]
+        for (endpoint, metodo, codigo), quantidade in status:
+            linhas.append(
+                f'garagem_http_requisicoes_total{{endpoint="{endpoint}",metodo="{metodo}",'
+                f'status="{codigo}"}} {quantidade}'
+            )
+
+        linhas += [
+            '# HELP garagem_http_duracao_segundos Tempo total das requisições medidas',
+            '# TYPE garagem_http_duracao_segundos histogram',
+        ]
+        for (endpoint, metodo), totais in endpoints:
+            rotulos = f'endpoint="{endpoint}",metodo="{metodo}"'
+            acumulado = 0
+            for limite, quantidade in zip(LIMITES_DURACAO, totais.buckets):
+                acumulado += quantidade
+                linhas.append(f'garagem_http_duracao_segundos_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas += [
+                f'garagem_http_duracao_segundos_bucket{{{rotulos},le="+Inf"}} {totais.quantidade}',
+                f'garagem_http_duracao_segundos_sum{{{rotulos}}} {totais.duracao:.6f}',
+                f'garagem_http_duracao_segundos_count{{{rotulos}}} {totais.quantidade}',
+            ]
+
+        for nome, descricao, atributo in (
+            ('garagem_sql_consultas_total', 'Consultas SQL executadas pelas requisições medidas', 'consultas'),
+            ('garagem_sql_duracao_segundos_total', 'Tempo em consultas SQL das requisições medidas', 'tempo_sql'),
+            ('garagem_http_resposta_bytes_total', 'Bytes das respostas medidas (sem streams)', 'bytes'),
+        ):
+            linhas += [f'# HELP {nome} {descricao}', f'# TYPE {nome} counter']
+            for (endpoint, metodo), totais in endpoints:
+                valor = getattr(totais, atributo)
+                valor = f'{valor:.6f}' if isinstance(valor, float) else valor
+                linhas.append(f'{nome}{{endpoint="{endpoint}",metodo="{metodo}"}} {valor}')
+
+        return '\n'.join(linhas) + '\n'
+
+
+def _copiar(totais):
+    copia = _Endpoint()
+    for atributo in _Endpoint.__slots__:
+        valor = getattr(totais, atributo)
+        setattr(copia, atributo, list(valor) if isinstance(valor, list) else valor)
+    return copia
+
+
+def registrar_metricas(app):
+    """Liga as medições às requisições e ao engine da aplicação"""
+    metricas = Metricas(app.config['METRICAS_AMOSTRAGEM'], app.config['CONSULTA_LENTA_MS'])
+    app.extensions['metricas'] = metricas
+    app.before_request(metricas.iniciar_requisicao)
+    app.after_request(metricas.finalizar_requisicao)
+
+    if not metricas.amostragem and metricas.consulta_lenta is None:
+        return metricas
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def antes_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        context.inicio_metricas = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def depois_da_consulta(conn, cursor, statement, parameters, context, executemany):
+        metricas.registrar_consulta(time.perf_counter() - context.inicio_metricas, statement, parameters)
+
+    return metricas
@@ -0,0 +1,217 @@
+"""
+Migrações de esquema para bancos de dados já existentes
+
+O create_all só cria tabelas novas: índices e colunas adicionados depois
+precisam ser aplicados aqui. Cada migração roda uma única vez e fica
+registrada na tabela schema_migracoes.
+"""
+
+import logging
+from datetime import datetime
+from sqlalchemy import bindparam, delete, exists, func, insert, inspect, literal, select, text, update
+from sqlalchemy.schema import CreateTable
+from models import Cliente, Endereco, ClienteEndereco, Pedido, ItemPedido, MovimentacaoCaixa, TaxaEntrega
+from models import HistoricoStatus, TABELAS_ARQUIVO
+from resumo import reconstruir_resumo_diario
+from taxas import REGRAS_INICIAIS
+from enderecos import hash_endereco
+
+log = logging.getLogger('garagem.migracoes')
+
+MIGRACOES = []
+
+
+def migracao(versao, descricao):
+    """Registra uma função de migração com sua versão"""
+    def registrar(aplicar):
+        MIGRACOES.append((versao, descricao, aplicar))
+        return aplicar
+    return registrar
+
+
+def criar_indices(conn, modelo):
+    """Cria os índices declarados no modelo que ainda não existem"""
+    for indice in modelo.__table__.indexes:
+        indice.create(conn, checkfirst=True)
+
+
+@migracao(1, 'Índices das colunas de filtro mais usadas')
+def indices_filtros(conn):
+    # Telefones duplicados impediriam o índice único: une os clientes repetidos
+    conn.execute(text(
+        "UPDATE pedidos SET cliente_id = ("
+        "  SELECT MIN(c2.id) FROM clientes c1"
+        "  JOIN clientes c2 ON c2.telefone = c1.telefone"
+        "  WHERE c1.id = pedidos.cliente_id)"
+    ))
+    conn.execute(text(
+        "DELETE FROM clientes WHERE id NOT IN ("
+        "  SELECT MIN(id) FROM clientes GROUP BY telefone)"
+    ))
+
+    for modelo in (Cliente, Pedido, MovimentacaoCaixa):
+        criar_indices(conn, modelo)
+
+
+@migracao(2, 'Preenche resumo_diario com o histórico do caixa')
+def preencher_resumo_diario(conn):
+    reconstruir_resumo_diario(conn)
+
+
+@migracao(3, 'Regras de taxa de entrega equivalentes ao cálculo fixo')
+def regras_taxa_entrega(conn):
+    if conn.execute(select(func.count()).select_from(TaxaEntrega.__table__)).scalar():
+        return
+    conn.execute(insert(TaxaEntrega.__table__), [
+        {'tipo': tipo, 'padrao': padrao, 'valor': valor, 'prioridade': prioridade, 'ativo': True}
+        for tipo, padrao, valor, prioridade in REGRAS_INICIAIS
+    ])
+
+
+@migracao(4, 'Endereços deduplicados por hash e endereços salvos dos clientes')
+def enderecos_deduplicados(conn):
+    enderecos = Endereco.__table__
+    if 'hash' not in {coluna['name'] for coluna in inspect(conn).get_columns('enderecos')}:
+        conn.execute(text('ALTER TABLE enderecos ADD COLUMN hash VARCHAR(64)'))
+
+    # O primeiro registro de cada endereço fica; os repetidos apontam para ele
+    principais = dict(conn.execute(
+        select(enderecos.c.hash, enderecos.c.id).where(enderecos.c.hash.is_not(None))
+    ).all())
+    hashes, repetidos = [], []
+    for linha in conn.execute(
+        select(enderecos.c.id, enderecos.c.cep, enderecos.c.rua, enderecos.c.numero,
+               enderecos.c.bairro, enderecos.c.complemento)
+        .where(enderecos.c.hash.is_(None)).order_by(enderecos.c.id)
+    ):
+        chave = hash_endereco(linha.cep, linha.rua, linha.numero, linha.bairro, linha.complemento)
+        if chave in principais:
+            repetidos.append({'repetido': linha.id, 'principal': principais[chave]})
+        else:
+            principais[chave] = linha.id
+            hashes.append({'b_id': linha.id, 'b_hash': chave})
+
+    if hashes:
+        conn.execute(
+            update(enderecos).where(enderecos.c.id == bindparam('b_id')).values(hash=bindparam('b_hash')),
+            hashes
+        )
+    if repetidos:
+        pedidos = Pedido.__table__
+        conn.execute(
+            update(pedidos).where(pedidos.c.endereco_id == bindparam('repetido'))
+            .values(endereco_id=bindparam('principal')),
+            repetidos
+        )
+        conn.execute(
+            delete(enderecos).where(enderecos.c.id == bindparam('repetido')),
+            [{'repetido': r['repetido']} for r in repetidos]
+        )
+    criar_indices(conn, Endereco)
+
+    # Endereços salvos a partir do histórico de pedidos
+    pedidos = Pedido.__table__
+    salvos = ClienteEndereco.__table__
+    conn.execute(insert(salvos).from_select(
+        ['cliente_id', 'endereco_id', 'ultimo_uso'],
+        select(pedidos.c.cliente_id, pedidos.c.endereco_id, func.max(pedidos.c.created_at))
+        .where(~exists().where(
+            salvos.c.cliente_id == pedidos.c.cliente_id,
+            salvos.c.endereco_id == pedidos.c.endereco_id
+        ))
+        .group_by(pedidos.c.cliente_id, pedidos.c.endereco_id)
+    ))
+
+
+@migracao(5, 'Itens dos pedidos feitos antes de itens_pedido')
+def itens_pedidos_antigos(conn):
+    pedidos = Pedido.__table__
+    itens = ItemPedido.__table__
+    conn.execute(insert(itens).from_select(
+        ['pedido_id', 'prato_id', 'acompanhamento_id', 'quantidade', 'preco_unitario', 'subtotal', 'observacoes'],
+        select(
+            pedidos.c.id, pedidos.c.prato_id, pedidos.c.acompanhamento_id, literal(1),
+            pedidos.c.valor_prato, pedidos.c.valor_prato, literal('')
+        ).where(~exists().where(itens.c.pedido_id == pedidos.c.id))
+    ))
+
+
+@migracao(6, 'Coluna versao dos pedidos (atualização de status com compare-and-swap)')
+def versao_pedidos(conn):
+    if 'versao' not in {coluna['name'] for coluna in inspect(conn).get_columns('pedidos')}:
+        conn.execute(text('ALTER TABLE pedidos ADD COLUMN versao INTEGER NOT NULL DEFAULT 1'))
+
+
+@migracao(7, 'AUTOINCREMENT nas tabelas com arquivo (ids arquivados não são reaproveitados)')
+def autoincrement_tabelas_arquivadas(conn):
+    if conn.dialect.name != 'sqlite':
+        return
+    for modelo in (Pedido, ItemPedido, HistoricoStatus, MovimentacaoCaixa):
+        tabela = modelo.__table__
+        ddl = conn.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+            {'nome': tabela.name}
+        ).scalar()
+        if 'AUTOINCREMENT' in ddl.upper():
+            continue
+
+        # O SQLite não muda a chave de uma tabela existente: recria e copia as linhas
+        nova = f'{tabela.name}_nova'
+        criar = str(CreateTable(tabela).compile(dialect=conn.dialect))
+        conn.execute(text(criar.replace(f'CREATE TABLE {tabela.name} ', f'CREATE TABLE {nova} ', 1)))
+        colunas = ', '.join(coluna.name for coluna in tabela.c)
+        conn.execute(text(f'INSERT INTO {nova} ({colunas}) SELECT {colunas} FROM {tabela.name}'))
+        conn.execute(text(f'DROP TABLE {tabela.name}'))
+        conn.execute(text(f'ALTER TABLE {nova} RENAME TO {tabela.name}'))
+        criar_indices(conn, modelo)
+
+        # Próximos ids acima de todos os já usados, inclusive os arquivados
+        arquivo = TABELAS_ARQUIVO[tabela.name]
+        maior = max(
+            conn.execute(select(func.max(tabela.c.id))).scalar() or 0,
+            conn.execute(select(func.max(arquivo.c.id))).scalar() or 0
+        )
+        conn.execute(text('DELETE FROM sqlite_sequence WHERE name = :nome'), {'nome': tabela.name})
+        conn.execute(
+            text('INSERT INTO sqlite_sequence (name, seq) VALUES (:nome, :seq)'),
+            {'nome': tabela.name, 'seq': maior}
+        )
+
+
+
+@migracao(8, 'Resumo diário pelo dia local (FUSO_HORARIO) em vez do dia UTC')
+def resumo_dia_local(conn):
+    reconstruir_resumo_diario(conn)
+
+
+@migracao(9, 'Coluna versao_token dos usuários (logout revoga os tokens emitidos)')
+def versao_token_usuarios(conn):
+    if 'versao_token' not in {coluna['name'] for coluna in inspect(conn).get_columns('usuarios')}:
+        conn.execute(text('ALTER TABLE usuarios ADD COLUMN versao_token INTEGER NOT NULL DEFAULT 1'))
+
+def aplicar_migracoes(engine):
+    """Aplica, em ordem, as migrações ainda não registradas no banco; retorna as versões aplicadas"""
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migracoes ("
+            "  versao INTEGER PRIMARY KEY,"
+            "  descricao VARCHAR(200) NOT NULL,"
+            "  aplicada_em DATETIME NOT NULL)"
+        ))
+        aplicadas = {row[0] for row in conn.execute(text("SELECT versao FROM schema_migracoes"))}
+
+    novas = []
+    for versao, descricao, aplicar in sorted(MIGRACOES, key=lambda m: m[0]):
+        if versao in aplicadas:
+            continue
+        with engine.begin() as conn:
+            aplicar(conn)
+            conn.execute(
+                text("INSERT INTO schema_migracoes (versao, descricao, aplicada_em) "
+                     "VALUES (:versao, :descricao, :aplicada_em)"),
+                {'versao': versao, 'descricao': descricao, 'aplicada_em': datetime.utcnow()}
+            )
+        log.info('Migração %d aplicada: %s', versao, descricao)
+        novas.append(versao)
+
+    return novas
@@ -12,6 +12,17 @@ class StatusPedido(Enum):
     FINALIZADO = "finalizado"
     CANCELADO = "cancelado"
 
+# Próximos status permitidos a partir de cada status. Um pedido finalizado
+# não pode ser cancelado: a entrada dele no caixa continuaria contando como
+# receita (devoluções são lançadas no caixa como saída)
+TRANSICOES_STATUS = {
+    StatusPedido.ACEITO: {StatusPedido.PREPARO, StatusPedido.CANCELADO},
+    StatusPedido.PREPARO: {StatusPedido.ENTREGA, StatusPedido.CANCELADO},
+    StatusPedido.ENTREGA: {StatusPedido.FINALIZADO, StatusPedido.CANCELADO},
+    StatusPedido.FINALIZADO: set(),
+    StatusPedido.CANCELADO: set(),
+}
+
 class FormaPagamento(Enum):
     DINHEIRO = "Dinheiro"
     PIX = "Pix"
@@ -32,6 +43,7 @@ class Usuario(db.Model):
     nome_completo = db.Column(db.String(100), nullable=False)
     tipo = db.Column(db.Enum(TipoUsuario), nullable=False, default=TipoUsuario.FUNCIONARIO)
     ativo = db.Column(db.Boolean, default=True)
+    versao_token = db.Column(db.Integer, nullable=False, default=1)  # incrementada para revogar os tokens emitidos
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
 
@@ -51,8 +63,8 @@ class Usuario(db.Model):
             'nome_completo': self.nome_completo,
             'tipo': self.tipo.value,
             'ativo': self.ativo,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None
+            'created_at': self.created_at,
+            'last_login': self.last_login
         }
 
 class Prato(db.Model):
@@ -92,6 +104,9 @@ class Acompanhamento(db.Model):
 
 class Cliente(db.Model):
     __tablename__ = 'clientes'
+    __table_args__ = (
+        db.Index('ix_clientes_telefone', 'telefone', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     nome = db.Column(db.String(100), nullable=False)
@@ -106,13 +121,17 @@ class Cliente(db.Model):
             'id': self.id,
             'nome': self.nome,
             'telefone': self.telefone,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
 
 class Endereco(db.Model):
     __tablename__ = 'enderecos'
+    __table_args__ = (
+        db.Index('ix_enderecos_hash', 'hash', unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
+    hash = db.Column(db.String(64))  # campos normalizados; um registro por endereço
     cep = db.Column(db.String(10))
     rua = db.Column(db.String(200), nullable=False)
     numero = db.Column(db.String(10), nullable=False)
@@ -134,8 +153,23 @@ class Endereco(db.Model):
             'taxa_entrega': self.taxa_entrega
         }
 
+class ClienteEndereco(db.Model):
+    """Endereços já usados por um cliente, para preencher o próximo pedido"""
+    __tablename__ = 'clientes_enderecos'
+
+    cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), primary_key=True)
+    endereco_id = db.Column(db.Integer, db.ForeignKey('enderecos.id'), primary_key=True)
+    ultimo_uso = db.Column(db.DateTime, default=datetime.utcnow)
+
+    endereco = db.relationship('Endereco')
+
 class Pedido(db.Model):
     __tablename__ = 'pedidos'
+    __table_args__ = (
+        db.Index('ix_pedidos_status_created_at', 'status', 'created_at'),
+        db.Index('ix_pedidos_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},  # ids arquivados não são reaproveitados
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     cliente_id = db.Column(db.Integer, db.ForeignKey('clientes.id'), nullable=False)
@@ -144,6 +178,7 @@ class Pedido(db.Model):
     endereco_id = db.Column(db.Integer, db.ForeignKey('enderecos.id'), nullable=False)
 
     status = db.Column(db.Enum(StatusPedido), default=StatusPedido.ACEITO)
+    versao = db.Column(db.Integer, nullable=False, default=1)  # incrementada a cada mudança de status
     forma_pagamento = db.Column(db.Enum(FormaPagamento), nullable=False)
 
     valor_prato = db.Column(db.Float, nullable=False)
@@ -157,6 +192,7 @@ class Pedido(db.Model):
     # Relacionamentos
     prato = db.relationship('Prato', backref='pedidos')
     acompanhamento = db.relationship('Acompanhamento', backref='pedidos')
+    itens = db.relationship('ItemPedido', backref='pedido', lazy=True, order_by='ItemPedido.id')
 
     def to_dict(self):
         return {
@@ -165,18 +201,81 @@ class Pedido(db.Model):
             'prato': self.prato.to_dict(),
             'acompanhamento': self.acompanhamento.to_dict(),
             'endereco': self.endereco.to_dict(),
-            'status': self.status.value,
+            'itens': [item.to_dict() for item in self.itens],
+            'status': self.status.value if self.status else None,
+            'versao': self.versao,
             'forma_pagamento': self.forma_pagamento.value,
             'valor_prato': self.valor_prato,
             'taxa_entrega': self.taxa_entrega,
             'valor_total': self.valor_total,
             'observacoes': self.observacoes,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
+        }
+
+class ItemPedido(db.Model):
+    """Prato (com acompanhamento) de um pedido, com quantidade e preço da época"""
+    __tablename__ = 'itens_pedido'
+    __table_args__ = (
+        db.Index('ix_itens_pedido_pedido_id', 'pedido_id'),
+        {'sqlite_autoincrement': True},  # ids arquivados não são reaproveitados
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False)
+    prato_id = db.Column(db.Integer, db.ForeignKey('pratos.id'), nullable=False)
+    acompanhamento_id = db.Column(db.Integer, db.ForeignKey('acompanhamentos.id'), nullable=False)
+    quantidade = db.Column(db.Integer, nullable=False, default=1)
+    preco_unitario = db.Column(db.Float, nullable=False)
+    subtotal = db.Column(db.Float, nullable=False)
+    observacoes = db.Column(db.Text)
+
+    # Relacionamentos
+    prato = db.relationship('Prato')
+    acompanhamento = db.relationship('Acompanhamento')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'prato': self.prato.to_dict(),
+            'acompanhamento': self.acompanhamento.to_dict(),
+            'quantidade': self.quantidade,
+            'preco_unitario': self.preco_unitario,
+            'subtotal': self.subtotal,
+            'observacoes': self.observacoes
+        }
+
+class HistoricoStatus(db.Model):
+    """Cada mudança de status de um pedido (status_anterior vazio na criação)"""
+    __tablename__ = 'historico_status'
+    __table_args__ = (
+        db.Index('ix_historico_status_pedido_id', 'pedido_id'),
+        db.Index('ix_historico_status_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},  # ids arquivados não são reaproveitados
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=False)
+    status_anterior = db.Column(db.Enum(StatusPedido))
+    status_novo = db.Column(db.Enum(StatusPedido), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'pedido_id': self.pedido_id,
+            'status_anterior': self.status_anterior.value if self.status_anterior else None,
+            'status_novo': self.status_novo.value,
+            'created_at': self.created_at
         }
 
 class MovimentacaoCaixa(db.Model):
     __tablename__ = 'movimentacoes_caixa'
+    __table_args__ = (
+        db.Index('ix_movimentacoes_caixa_tipo_created_at', 'tipo', 'created_at'),
+        db.Index('ix_movimentacoes_caixa_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},  # ids arquivados não são reaproveitados
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     pedido_id = db.Column(db.Integer, db.ForeignKey('pedidos.id'), nullable=True)
@@ -195,5 +294,109 @@ class MovimentacaoCaixa(db.Model):
             'tipo': self.tipo,
             'valor': self.valor,
             'descricao': self.descricao,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
+
+class ResumoDiario(db.Model):
+    """Totais diários do caixa, mantidos a cada movimentação inserida"""
+    __tablename__ = 'resumo_diario'
+    __table_args__ = (
+        db.UniqueConstraint('data', 'tipo', 'forma_pagamento', name='uq_resumo_diario_chave'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.Date, nullable=False)
+    tipo = db.Column(db.String(20), nullable=False)
+    forma_pagamento = db.Column(db.String(20), nullable=False, default='')  # '' = sem pedido
+    total = db.Column(db.Float, nullable=False, default=0)
+    quantidade = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        return {
+            'data': self.data,
+            'tipo': self.tipo,
+            'forma_pagamento': self.forma_pagamento,
+            'total': self.total,
+            'quantidade': self.quantidade
+        }
+
+class TaxaEntrega(db.Model):
+    """Regra de taxa de entrega por bairro, prefixo de CEP ou trecho do nome"""
+    __tablename__ = 'taxas_entrega'
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(10), nullable=False)  # 'bairro', 'cep', 'contem', 'padrao'
+    padrao = db.Column(db.String(100), nullable=False, default='')
+    valor = db.Column(db.Float, nullable=False)
+    prioridade = db.Column(db.Integer, nullable=False, default=100)  # menor vence entre 'contem'
+    ativo = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'padrao': self.padrao,
+            'valor': self.valor,
+            'prioridade': self.prioridade,
+            'ativo': self.ativo,
+            'updated_at': self.updated_at
+        }
+
+class ChaveIdempotencia(db.Model):
+    """Resposta de um POST já processado, reenviada quando o cliente repete a chave"""
+    __tablename__ = 'chaves_idempotencia'
+    __table_args__ = (
+        db.Index('ix_chaves_idempotencia_created_at', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    chave = db.Column(db.String(100), nullable=False, unique=True)
+    hash_requisicao = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer, nullable=False)
+    resposta = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class EventoPedido(db.Model):
+    """Pedido criado ou alterado, lido pelos streams (SSE) de todos os workers"""
+    __tablename__ = 'eventos_pedidos'
+    __table_args__ = {'sqlite_autoincrement': True}  # ids nunca reaproveitados (Last-Event-ID)
+
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(30), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    status_anterior = db.Column(db.String(20))
+    dados = db.Column(db.Text, nullable=False)  # pedido já serializado em JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Arquivamento(db.Model):
+    """Execução do arquivamento de pedidos encerrados (flask db arquivar)"""
+    __tablename__ = 'arquivamentos'
+
+    id = db.Column(db.Integer, primary_key=True)
+    limite = db.Column(db.DateTime, nullable=False)  # pedidos criados antes disso eram candidatos
+    ate = db.Column(db.DateTime)  # created_at mais recente entre as linhas movidas
+    pedidos = db.Column(db.Integer, nullable=False, default=0)
+    movimentacoes = db.Column(db.Integer, nullable=False, default=0)
+    executado_em = db.Column(db.DateTime, default=datetime.utcnow)
+
+def _tabela_arquivo(modelo, *indices):
+    """Mesmas colunas do modelo, sem chaves estrangeiras, para as linhas arquivadas"""
+    nome = f'{modelo.__tablename__}_arquivo'
+    return db.Table(
+        nome,
+        *[
+            db.Column(coluna.name, coluna.type, primary_key=coluna.primary_key, autoincrement=False)
+            for coluna in modelo.__table__.columns
+        ],
+        *[db.Index(f'ix_{nome}_{coluna}', coluna) for coluna in indices]
+    )
+
+# Tabela quente -> tabela de arquivo com as colunas na mesma ordem (para INSERT ... SELECT e UNION ALL)
+TABELAS_ARQUIVO = {
+    'pedidos': _tabela_arquivo(Pedido, 'created_at'),
+    'itens_pedido': _tabela_arquivo(ItemPedido, 'pedido_id'),
+    'historico_status': _tabela_arquivo(HistoricoStatus, 'pedido_id', 'created_at'),
+    'movimentacoes_caixa': _tabela_arquivo(MovimentacaoCaixa, 'created_at', 'pedido_id'),
+}
@@ -0,0 +1,44 @@
+"""
+Paginação por cursor (keyset) para listagens ordenadas por data
+"""
+
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+def ler_limite(valor, padrao=LIMITE_PADRAO, maximo=LIMITE_MAXIMO):
+    """Converte o parâmetro limite, respeitando o máximo permitido"""
+    if not valor:
+        return padrao
+    limite = int(valor)
+    if limite < 1:
+        raise ValueError('Limite deve ser maior que zero')
+    return min(limite, maximo)
+
+
+def codificar_cursor(created_at, registro_id):
+    """Gera o cursor opaco a partir da última linha da página"""
+    bruto = f'{created_at.isoformat()}|{registro_id}'
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Recupera (created_at, id) de um cursor gerado por codificar_cursor"""
+    try:
+        preenchido = cursor + '=' * (-len(cursor) % 4)
+        data, registro_id = base64.urlsafe_b64decode(preenchido).decode().split('|')
+        return datetime.fromisoformat(data), int(registro_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Cursor inválido')
+
+
+def filtro_apos_cursor(coluna_data, coluna_id, cursor, descendente=True):
+    """Filtro das linhas que vêm depois do cursor na ordenação (data, id)"""
+    data, registro_id = cursor
+    if descendente:
+        return or_(coluna_data < data, and_(coluna_data == data, coluna_id < registro_id))
+    return or_(coluna_data > data, and_(coluna_data == data, coluna_id > registro_id))
@@ -0,0 +1,226 @@
+"""
+Perfilamento sob demanda das próximas requisições de um endpoint
+
+Um administrador abre uma sessão para um endpoint e as próximas N
+requisições a ele são perfiladas no próprio servidor, de uma destas formas:
+
+- 'cprofile': cProfile em cada requisição, somados em um arquivo .pstats
+  (abra com `python -m pstats`, snakeviz etc.);
+- 'amostragem': uma thread lê a pilha da requisição a cada intervalo_ms e
+  grava pilhas colapsadas ("a;b;c 12"), o formato de entrada do
+  flamegraph.pl e do speedscope. Custa bem menos que o cProfile em
+  requisições longas.
+
+Só uma sessão fica ativa por vez. As sessões vivem no processo que
+recebeu o pedido: com vários workers, apenas esse worker é perfilado.
+Fora de uma sessão o custo por requisição é uma verificação de atributo.
+
+A coleta termina no teardown_request, antes de o corpo de uma resposta em
+stream ser gerado; por isso rotas marcadas com @resposta_em_stream (SSE,
+exportações) não podem ser perfiladas.
+"""
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from flask import request
+
+MODOS = ('cprofile', 'amostragem')
+LIMITE_REQUISICOES = 100
+INTERVALO_PADRAO_MS = 5
+INTERVALO_MINIMO_MS = 1  # abaixo disso o amostrador vira um laço ocupado
+
+
+class SessaoAtiva(Exception):
+    """Já existe uma sessão de perfilamento em andamento"""
+
+
+def resposta_em_stream(view):
+    """Marca uma rota cujo corpo é gerado em stream (fora do alcance do perfilador)"""
+    view.resposta_em_stream = True
+    return view
+
+
+class _Amostrador:
+    """Lê a pilha de uma thread em intervalos fixos até ser parado"""
+
+    def __init__(self, thread_id, intervalo):
+        self.thread_id = thread_id
+        self.intervalo = intervalo
+        self.pilhas = Counter()
+        self._parar = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name='perfil-amostragem', daemon=True)
+        self._thread.start()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            pilha = []
+            while frame is not None:
+                codigo = frame.f_code
+                pilha.append(
+                    f'{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})'
+                )
+                frame = frame.f_back
+            self.pilhas[';'.join(reversed(pilha))] += 1
+
+    def parar(self):
+        self._parar.set()
+        self._thread.join()
+
+
+class Sessao:
+    """Perfilamento das próximas `requisicoes` chamadas a um endpoint"""
+
+    def __init__(self, sessao_id, endpoint, requisicoes, modo, intervalo_ms, diretorio):
+        self.id = sessao_id
+        self.endpoint = endpoint
+        self.requisicoes = requisicoes
+        self.modo = modo
+        self.intervalo_ms = intervalo_ms
+        extensao = 'pstats' if modo == 'cprofile' else 'txt'
+        self.arquivo = os.path.join(diretorio, f'perfil-{sessao_id}-{endpoint}.{extensao}')
+        self.iniciadas = 0
+        self.concluidas = 0
+        self.status = 'aguardando'
+        self.criada_em = datetime.utcnow()
+        self.concluida_em = None
+        self._stats = None
+        self._pilhas = Counter()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'modo': self.modo,
+            'requisicoes': self.requisicoes,
+            'concluidas': self.concluidas,
+            'status': self.status,
+            'intervalo_ms': self.intervalo_ms if self.modo == 'amostragem' else None,
+            'arquivo': os.path.basename(self.arquivo),
+            'criada_em': self.criada_em,
+            'concluida_em': self.concluida_em
+        }
+
+
+class Perfilador:
+    """Guarda as sessões e liga o perfilamento às requisições escolhidas"""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.ativa = None
+        self.sessoes = {}
+        self._em_coleta = 0  # requisições sendo perfiladas agora
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def iniciar_sessao(self, endpoint, requisicoes, modo='cprofile', intervalo_ms=INTERVALO_PADRAO_MS):
+        if modo not in MODOS:
+            raise ValueError(f"Modo inválido. Use: {', '.join(MODOS)}")
+        if not 1 <= requisicoes <= LIMITE_REQUISICOES:
+            raise ValueError(f'Requisições deve estar entre 1 e {LIMITE_REQUISICOES}')
+        if intervalo_ms < INTERVALO_MINIMO_MS:
+            raise ValueError(f'Intervalo deve ser de pelo menos {INTERVALO_MINIMO_MS} ms')
+
+        os.makedirs(self.diretorio, exist_ok=True)
+        with self._lock:
+            if self.ativa is not None:
+                raise SessaoAtiva(f'Sessão {self.ativa.id} ainda em andamento')
+            sessao = Sessao(next(self._ids), endpoint, requisicoes, modo, intervalo_ms, self.diretorio)
+            self.sessoes[sessao.id] = sessao
+            self.ativa = sessao
+        return sessao
+
+    def cancelar(self, sessao_id):
+        """Encerra a sessão, gravando o que já foi coletado"""
+        with self._lock:
+            sessao = self.sessoes.get(sessao_id)
+            if sessao is None or sessao is not self.ativa:
+                return sessao
+            self.ativa = None
+        self._gravar(sessao, 'cancelada')
+        return sessao
+
+    def antes_da_requisicao(self):
+        sessao = self.ativa
+        if sessao is None or request.endpoint != sessao.endpoint:
+            return
+        with self._lock:
+            if self.ativa is not sessao or sessao.iniciadas >= sessao.requisicoes:
+                return
+            sessao.iniciadas += 1
+            sessao.status = 'coletando'
+            self._em_coleta += 1
+
+        if sessao.modo == 'cprofile':
+            coletor = cProfile.Profile()
+            try:
+                coletor.enable()
+            except ValueError:
+                # Outro profiler já está ativo nesta thread: a vaga fica para a próxima
+                with self._lock:
+                    sessao.iniciadas -= 1
+                    self._em_coleta -= 1
+                return
+        else:
+            coletor = _Amostrador(threading.get_ident(), sessao.intervalo_ms / 1000)
+        request.environ['perfil.coleta'] = (sessao, coletor)
+
+    def ao_encerrar_requisicao(self, erro=None):
+        if not self._em_coleta:
+            return
+        coleta = request.environ.pop('perfil.coleta', None)
+        if coleta is None:
+            return
+        sessao, coletor = coleta
+        if sessao.modo == 'cprofile':
+            coletor.disable()
+        else:
+            coletor.parar()
+
+        with self._lock:
+            self._em_coleta -= 1
+            if self.ativa is not sessao:
+                # Sessão já encerrada (cancelada) e gravada: a coleta é descartada
+                return
+            if sessao.modo == 'amostragem':
+                sessao._pilhas.update(coletor.pilhas)
+            elif sessao._stats is None:
+                sessao._stats = pstats.Stats(coletor, stream=io.StringIO())
+            else:
+                sessao._stats.add(coletor)
+            sessao.concluidas += 1
+            terminou = sessao.concluidas >= sessao.requisicoes
+            if terminou:
+                self.ativa = None
+        if terminou:
+            self._gravar(sessao, 'concluida')
+
+    def _gravar(self, sessao, status):
+        if sessao.modo == 'cprofile':
+            if sessao._stats is not None:
+                sessao._stats.dump_stats(sessao.arquivo)
+        else:
+            with open(sessao.arquivo, 'w', encoding='utf-8') as arquivo:
+                for pilha, amostras in sorted(sessao._pilhas.items()):
+                    arquivo.write(f'{pilha} {amostras}\n')
+        sessao._stats = None
+        sessao.status = status if os.path.exists(sessao.arquivo) else 'vazia'
+        sessao.concluida_em = datetime.utcnow()
+
+
+def registrar_perfilamento(app):
+    """Cria o perfilador da aplicação e liga os ganchos das requisições"""
+    perfilador = Perfilador(app.config.get('PERFIL_DIR') or os.path.join(app.instance_path, 'perfis'))
+    app.extensions['perfilador'] = perfilador
+    app.before_request(perfilador.antes_da_requisicao)
+    app.teardown_request(perfilador.ao_encerrar_requisicao)
+    return perfilador
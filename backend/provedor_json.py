@@ -0,0 +1,86 @@
+"""
+Codificação JSON das respostas (app.json) e dos eventos da cozinha
+
+Usa orjson quando está instalado, várias vezes mais rápido que o json da
+biblioteca padrão nas listas de pedidos, e cai para o json padrão caso
+contrário. Nos dois casos datetime/date saem em ISO 8601 e Enum pelo
+valor, então os to_dict devolvem esses objetos sem convertê-los campo a
+campo. As chaves mantêm a ordem dos dicts (sem ordenação).
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from flask.json.provider import DefaultJSONProvider, _default
+
+try:
+    import orjson
+except ImportError:  # opcional: pip install orjson
+    orjson = None
+
+
+def _padrao(valor):
+    """Tipos que o json padrão não conhece; os demais (Decimal, UUID,
+    dataclasses, __html__) seguem as regras do Flask"""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    return _default(valor)
+
+
+if orjson is not None:
+    _OPCOES_ORJSON = orjson.OPT_NON_STR_KEYS
+
+    def para_json_bytes(dados):
+        """JSON compacto em bytes UTF-8, com datetime, date e Enum"""
+        return orjson.dumps(dados, default=_padrao, option=_OPCOES_ORJSON)
+
+    def para_json(dados):
+        """JSON compacto (str), com datetime, date e Enum"""
+        return para_json_bytes(dados).decode('utf-8')
+else:
+    def para_json(dados):
+        """JSON compacto (str), com datetime, date e Enum"""
+        return json.dumps(dados, default=_padrao, ensure_ascii=False, separators=(',', ':'))
+
+    def para_json_bytes(dados):
+        """JSON compacto em bytes UTF-8, com datetime, date e Enum"""
+        return para_json(dados).encode('utf-8')
+
+
+class ProvedorJSONPadrao(DefaultJSONProvider):
+    """json da biblioteca padrão com datetime em ISO 8601 e Enum pelo valor"""
+    default = staticmethod(_padrao)
+    ensure_ascii = False
+    sort_keys = False
+
+
+class ProvedorOrjson(ProvedorJSONPadrao):
+    """orjson, sem a volta por str na hora de montar a resposta"""
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # Opções do json padrão (indent, sort_keys...) não existem no orjson
+            return super().dumps(obj, **kwargs)
+        return para_json(obj)
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        dados = self._prepare_response_obj(args, kwargs)
+        if self.compact is False or (self.compact is None and self._app.debug):
+            corpo = orjson.dumps(dados, default=_padrao, option=_OPCOES_ORJSON | orjson.OPT_INDENT_2)
+        else:
+            corpo = para_json_bytes(dados)
+        return self._app.response_class(corpo, mimetype=self.mimetype)
+
+
+def criar_provedor_json(app):
+    """orjson se instalado e JSON_ORJSON estiver ligado; senão o json padrão"""
+    if orjson is not None and app.config.get('JSON_ORJSON', True):
+        return ProvedorOrjson(app)
+    return ProvedorJSONPadrao(app)
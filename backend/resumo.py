@@ -0,0 +1,126 @@
+"""
+Manutenção da tabela resumo_diario (totais do caixa por dia)
+
+Cada movimentação inserida soma o seu valor na linha (data, tipo,
+forma_pagamento) dentro da mesma transação, então os dashboards leem
+poucas linhas por dia em vez de todo o histórico de movimentacoes_caixa.
+A data é o dia local (Config.FUSO_HORARIO) da movimentação gravada em UTC;
+depois de mudar o fuso, recalcule com `flask db rebuild-resumo`.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, func, select, delete, update, insert
+from config import Config
+from models import MovimentacaoCaixa, Pedido, ResumoDiario
+from arquivo import tabela_completa
+
+
+def dia_local(momento):
+    """Dia do caixa, no fuso local, de um horário UTC gravado no banco"""
+    return (momento + timedelta(hours=Config.FUSO_HORARIO)).date()
+
+
+def hoje_local():
+    """Dia do caixa atual, no mesmo fuso de dia_local"""
+    return dia_local(datetime.utcnow())
+
+
+def inicio_dia_utc(dia):
+    """Horário UTC em que começa o dia local informado"""
+    return datetime.combine(dia, datetime.min.time()) - timedelta(hours=Config.FUSO_HORARIO)
+
+
+def _dia_local_sql(conn, coluna):
+    """Expressão SQL equivalente a dia_local para a coluna created_at"""
+    if conn.dialect.name == 'sqlite':
+        return func.date(coluna, f'{Config.FUSO_HORARIO:+d} hours')
+    return func.date(coluna + timedelta(hours=Config.FUSO_HORARIO))
+
+
+def _forma_pagamento(forma):
+    return forma.value if forma is not None else ''
+
+
+def registrar_movimentacoes(conn, movimentacoes):
+    """Soma no resumo uma lista de (created_at, tipo, forma_pagamento, valor)"""
+    acumulado = defaultdict(lambda: [0.0, 0])
+    for created_at, tipo, forma, valor in movimentacoes:
+        chave = (dia_local(created_at), tipo, _forma_pagamento(forma))
+        acumulado[chave][0] += valor
+        acumulado[chave][1] += 1
+
+    for (data, tipo, forma), (total, quantidade) in acumulado.items():
+        _somar(conn, data, tipo, forma, total, quantidade)
+
+
+def _somar(conn, data, tipo, forma, total, quantidade):
+    valores = {'data': data, 'tipo': tipo, 'forma_pagamento': forma,
+               'total': total, 'quantidade': quantidade}
+
+    if conn.dialect.name in ('sqlite', 'postgresql'):
+        if conn.dialect.name == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as insert_dialeto
+        else:
+            from sqlalchemy.dialects.postgresql import insert as insert_dialeto
+        stmt = insert_dialeto(ResumoDiario).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['data', 'tipo', 'forma_pagamento'],
+            set_={
+                'total': ResumoDiario.total + stmt.excluded.total,
+                'quantidade': ResumoDiario.quantidade + stmt.excluded.quantidade,
+            }
+        )
+        conn.execute(stmt)
+        return
+
+    resultado = conn.execute(
+        update(ResumoDiario).where(
+            ResumoDiario.data == data,
+            ResumoDiario.tipo == tipo,
+            ResumoDiario.forma_pagamento == forma
+        ).values(
+            total=ResumoDiario.total + total,
+            quantidade=ResumoDiario.quantidade + quantidade
+        )
+    )
+    if resultado.rowcount == 0:
+        conn.execute(insert(ResumoDiario).values(**valores))
+
+
+@event.listens_for(MovimentacaoCaixa, 'after_insert')
+def _atualizar_resumo(mapper, conn, movimentacao):
+    forma = None
+    if movimentacao.pedido_id:
+        forma = conn.execute(
+            select(Pedido.forma_pagamento).where(Pedido.id == movimentacao.pedido_id)
+        ).scalar()
+    registrar_movimentacoes(conn, [(movimentacao.created_at, movimentacao.tipo, forma, movimentacao.valor)])
+
+
+def reconstruir_resumo_diario(conn):
+    """Recalcula todo o resumo a partir de movimentacoes_caixa (incluindo as arquivadas)"""
+    conn.execute(delete(ResumoDiario))
+
+    movimentacoes = tabela_completa(MovimentacaoCaixa, ['id', 'pedido_id', 'tipo', 'valor', 'created_at'])
+    pedidos = tabela_completa(Pedido, ['id', 'forma_pagamento'])
+    dia = _dia_local_sql(conn, movimentacoes.c.created_at)
+    linhas = conn.execute(
+        select(
+            dia,
+            movimentacoes.c.tipo,
+            pedidos.c.forma_pagamento,
+            func.sum(movimentacoes.c.valor),
+            func.count(movimentacoes.c.id)
+        ).select_from(movimentacoes).outerjoin(
+            pedidos, pedidos.c.id == movimentacoes.c.pedido_id
+        ).group_by(dia, movimentacoes.c.tipo, pedidos.c.forma_pagamento)
+    ).all()
+
+    quantidade_linhas = 0
+    for data, tipo, forma, total, quantidade in linhas:
+        if isinstance(data, str):
+            data = date.fromisoformat(data)
+        _somar(conn, data, tipo, _forma_pagamento(forma), total, quantidade)
+        quantidade_linhas += 1
+    return quantidade_linhas
@@ -1,29 +1,64 @@
-from flask import Blueprint, jsonify, request, session
-from models import db, Usuario, Prato, Acompanhamento, Pedido, MovimentacaoCaixa
+from flask import Blueprint, g, jsonify, request, session
+from models import db, Usuario, Prato, Acompanhamento, Pedido, MovimentacaoCaixa, ResumoDiario
 from models import TipoUsuario, StatusPedido
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
+from cache import CacheTTL, invalidar_ao_gravar
+from config import Config
+from autenticacao import verificar_senha, gerar_token, usuario_autenticado, LoginSobrecarregado
+from autenticacao import permissoes_usuario, cache_autorizacao, revogar_tokens
+from analises import tempos_por_etapa
+from arquivo import tabela_periodo
+from resumo import hoje_local, inicio_dia_utc
 
 admin_bp = Blueprint('admin', __name__)
 
+# Estatísticas do dashboard, recalculadas quando expiram ou quando há escrita
+cache_dashboard = CacheTTL(Config.DASHBOARD_CACHE_TTL)
+invalidar_ao_gravar(cache_dashboard, Pedido, MovimentacaoCaixa, Prato, Usuario)
+
 def require_admin(f):
-    """Decorator para rotas que requerem acesso de administrador"""
+    """Decorator para rotas que requerem acesso de administrador.
+
+    Valida o token assinado e confere tipo/situação atuais do usuário no
+    cache de autorização (o banco só é consultado em caso de falha no cache).
+    """
+    return _exigir_usuario(f, somente_admin=True)
+
+def require_usuario(f):
+    """Decorator para rotas da equipe: qualquer usuário ativo logado"""
+    return _exigir_usuario(f, somente_admin=False)
+
+def _exigir_usuario(f, somente_admin):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        user_id = session.get('user_id')
-        if not user_id:
+        usuario = usuario_autenticado()
+        if not usuario:
             return jsonify({
                 'success': False,
                 'error': 'Acesso não autorizado - faça login'
             }), 401
         
-        user = Usuario.query.get(user_id)
-        if not user or user.tipo != TipoUsuario.ADMIN:
+        permissoes = permissoes_usuario(usuario['id'])
+        if not permissoes or not permissoes[1]:
+            return jsonify({
+                'success': False,
+                'error': 'Acesso não autorizado - usuário desativado'
+            }), 401
+        
+        if usuario.get('versao', 1) != permissoes[2]:
+            return jsonify({
+                'success': False,
+                'error': 'Sessão encerrada - faça login novamente'
+            }), 401
+        
+        if somente_admin and permissoes[0] != TipoUsuario.ADMIN.value:
             return jsonify({
                 'success': False,
                 'error': 'Acesso negado - apenas administradores'
             }), 403
         
+        g.usuario = usuario
         return f(*args, **kwargs)
     return decorated_function
 
@@ -41,7 +76,7 @@ def admin_login():
         
         user = Usuario.query.filter_by(username=data['username']).first()
         
-        if not user or not user.check_password(data['password']):
+        if not user or not verificar_senha(user.password_hash, data['password']):
             return jsonify({
                 'success': False,
                 'error': 'Credenciais inválidas'
@@ -57,16 +92,25 @@ def admin_login():
         user.last_login = datetime.utcnow()
         db.session.commit()
         
-        # Criar sessão
+        # Criar sessão com o token assinado
+        token = gerar_token(user.id, user.tipo.value, user.versao_token)
         session['user_id'] = user.id
         session['user_type'] = user.tipo.value
+        session['token'] = token
         
         return jsonify({
             'success': True,
             'message': 'Login realizado com sucesso',
-            'user': user.to_dict()
+            'user': user.to_dict(),
+            'token': token,
+            'expira_em': Config.TOKEN_VALIDADE
         })
         
+    except LoginSobrecarregado:
+        return jsonify({
+            'success': False,
+            'error': 'Muitas tentativas de login simultâneas - tente novamente'
+        }), 429, {'Retry-After': '1'}
     except Exception as e:
         return jsonify({
             'success': False,
@@ -75,8 +119,18 @@ def admin_login():
 
 @admin_bp.route('/api/admin/logout', methods=['POST'])
 def admin_logout():
-    """Logout do administrador"""
+    """Logout do administrador.
+
+    Revoga todos os tokens do usuário, inclusive os enviados como Bearer e
+    os de outros dispositivos logados com o mesmo usuário.
+    """
     try:
+        usuario = usuario_autenticado()
+        if usuario:
+            permissoes = permissoes_usuario(usuario['id'])
+            # Um token já revogado não encerra de novo as sessões atuais
+            if permissoes and usuario.get('versao', 1) == permissoes[2]:
+                revogar_tokens(usuario['id'])
         session.clear()
         return jsonify({
             'success': True,
@@ -93,36 +147,14 @@ def admin_logout():
 def admin_dashboard():
     """Dashboard administrativo com estatísticas gerais"""
     try:
-        # Estatísticas gerais
-        total_pedidos = Pedido.query.count()
-        total_pratos = Prato.query.filter_by(ativo=True).count()
-        total_usuarios = Usuario.query.filter_by(ativo=True).count()
-        
-        # Pedidos por status
-        pedidos_por_status = {}
-        for status in StatusPedido:
-            count = Pedido.query.filter_by(status=status).count()
-            pedidos_por_status[status.value] = count
-        
-        # Receita total
-        receita_total = db.session.query(db.func.sum(MovimentacaoCaixa.valor)).filter(
-            MovimentacaoCaixa.tipo == 'entrada'
-        ).scalar() or 0
-        
-        # Pedidos hoje
-        hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        pedidos_hoje = Pedido.query.filter(Pedido.created_at >= hoje).count()
+        dashboard = cache_dashboard.get('admin')
+        if dashboard is None:
+            dashboard = _estatisticas_dashboard()
+            cache_dashboard.set('admin', dashboard)
         
         return jsonify({
             'success': True,
-            'dashboard': {
-                'total_pedidos': total_pedidos,
-                'total_pratos': total_pratos,
-                'total_usuarios': total_usuarios,
-                'pedidos_por_status': pedidos_por_status,
-                'receita_total': float(receita_total),
-                'pedidos_hoje': pedidos_hoje
-            }
+            'dashboard': dashboard
         })
         
     except Exception as e:
@@ -131,6 +163,78 @@ def admin_dashboard():
             'error': str(e)
         }), 500
 
+def _estatisticas_dashboard():
+    """Calcula as estatísticas do dashboard em duas consultas"""
+    # Início do dia local (FUSO_HORARIO) em UTC, como no dashboard do caixa
+    hoje = inicio_dia_utc(hoje_local())
+    
+    # Pedidos por status e pedidos de hoje em uma única passada; inclui os
+    # arquivados, como a receita total lida do resumo diário
+    pedidos = tabela_periodo(Pedido, None, ['status', 'created_at'])
+    pedidos_por_status = {status.value: 0 for status in StatusPedido}
+    total_pedidos = 0
+    pedidos_hoje = 0
+    linhas = db.session.query(
+        pedidos.c.status,
+        db.func.count(),
+        db.func.sum(db.case((pedidos.c.created_at >= hoje, 1), else_=0))
+    ).group_by(pedidos.c.status).all()
+    for status, quantidade, quantidade_hoje in linhas:
+        if status is not None:
+            pedidos_por_status[status.value] = quantidade
+        total_pedidos += quantidade
+        pedidos_hoje += quantidade_hoje or 0
+    
+    # Demais contadores e receita total (a partir do resumo diário)
+    total_pratos, total_usuarios, receita_total = db.session.query(
+        db.select(db.func.count(Prato.id)).where(Prato.ativo == True).scalar_subquery(),
+        db.select(db.func.count(Usuario.id)).where(Usuario.ativo == True).scalar_subquery(),
+        db.select(db.func.sum(ResumoDiario.total)).where(ResumoDiario.tipo == 'entrada').scalar_subquery()
+    ).one()
+    
+    return {
+        'total_pedidos': total_pedidos,
+        'total_pratos': total_pratos,
+        'total_usuarios': total_usuarios,
+        'pedidos_por_status': pedidos_por_status,
+        'receita_total': float(receita_total or 0),
+        'pedidos_hoje': pedidos_hoje
+    }
+
+@admin_bp.route('/api/admin/analises/tempos', methods=['GET'])
+@require_admin
+def analise_tempos():
+    """p50/p90 dos tempos de espera, preparo e entrega por hora, prato ou bairro"""
+    try:
+        agrupar = request.args.get('agrupar', 'hora')
+        data_fim = request.args.get('data_fim')
+        data_fim = datetime.fromisoformat(data_fim) if data_fim else datetime.utcnow()
+        data_inicio = request.args.get('data_inicio')
+        data_inicio = datetime.fromisoformat(data_inicio) if data_inicio else data_fim - timedelta(days=30)
+        
+        grupos = tempos_por_etapa(agrupar, data_inicio, data_fim, Config.FUSO_HORARIO)
+        
+        return jsonify({
+            'success': True,
+            'agrupar': agrupar,
+            'periodo': {
+                'inicio': data_inicio,
+                'fim': data_fim
+            },
+            'grupos': grupos
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @admin_bp.route('/api/admin/usuarios', methods=['GET'])
 @require_admin
 def listar_usuarios():
@@ -239,8 +343,11 @@ def atualizar_usuario(user_id):
         
         if 'password' in data and data['password']:
             user.set_password(data['password'])
+            # Nova senha: os tokens emitidos com a antiga deixam de valer
+            user.versao_token += 1
         
         db.session.commit()
+        cache_autorizacao.invalidar(user_id)
         
         return jsonify({
             'success': True,
@@ -262,7 +369,7 @@ def deletar_usuario(user_id):
         user = Usuario.query.get_or_404(user_id)
         
         # Não permitir deletar o próprio usuário
-        if user.id == session.get('user_id'):
+        if user.id == g.usuario['id']:
             return jsonify({
                 'success': False,
                 'error': 'Não é possível deletar seu próprio usuário'
@@ -270,6 +377,7 @@ def deletar_usuario(user_id):
         
         user.ativo = False
         db.session.commit()
+        cache_autorizacao.invalidar(user_id)
         
         return jsonify({
             'success': True,
@@ -282,3 +390,12 @@ def deletar_usuario(user_id):
             'success': False,
             'error': str(e)
         }), 500
+
+@admin_bp.route('/api/admin/cache', methods=['GET'])
+@require_admin
+def estatisticas_cache():
+    """Acertos e falhas do cache de autorização deste processo"""
+    return jsonify({
+        'success': True,
+        'autorizacao': cache_autorizacao.estatisticas()
+    })
@@ -1,17 +1,43 @@
 from flask import Blueprint, jsonify, request
-from models import db, MovimentacaoCaixa, Pedido
-from sqlalchemy import func, and_
+from models import db, MovimentacaoCaixa, Pedido, ResumoDiario
+from sqlalchemy import func, and_, case
 from datetime import datetime, timedelta
+from paginacao import ler_limite, codificar_cursor, decodificar_cursor, filtro_apos_cursor
+from arquivo import tabela_periodo
+from resumo import hoje_local, inicio_dia_utc
 
 caixa_bp = Blueprint('caixa', __name__)
 
+CAMPOS_MOVIMENTACAO = ('id', 'pedido_id', 'tipo', 'valor', 'descricao', 'created_at')
+
+def colunas_movimentacao(tabela):
+    """Colunas projetadas de movimentacoes_caixa (ou da sua união com o arquivo)"""
+    return [tabela.c[nome] for nome in CAMPOS_MOVIMENTACAO]
+
+def _movimentacao_dict(linha):
+    """Mesmo formato de MovimentacaoCaixa.to_dict, a partir de uma linha projetada"""
+    return {
+        'id': linha.id,
+        'pedido_id': linha.pedido_id,
+        'tipo': linha.tipo,
+        'valor': linha.valor,
+        'descricao': linha.descricao,
+        'created_at': linha.created_at
+    }
+
 @caixa_bp.route('/api/caixa/relatorio', methods=['GET'])
 def relatorio_caixa():
-    """Gera relatório do caixa com entradas, saídas e fiado"""
+    """Gera relatório do caixa com entradas, saídas e fiado.
+
+    Os totais cobrem todo o período; a lista de movimentações é paginada
+    com limite e cursor (next_cursor da página anterior).
+    """
     try:
         # Parâmetros de filtro
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
+        cursor = request.args.get('cursor')
+        limite = ler_limite(request.args.get('limite'), padrao=100)
         
         # Se não especificado, usar o dia atual
         if not data_inicio:
@@ -24,45 +50,61 @@ def relatorio_caixa():
         else:
             data_fim = datetime.fromisoformat(data_fim)
         
-        # Query base
-        query = MovimentacaoCaixa.query.filter(
-            and_(
-                MovimentacaoCaixa.created_at >= data_inicio,
-                MovimentacaoCaixa.created_at <= data_fim
-            )
+        # Períodos que alcançam pedidos arquivados leem também as tabelas de arquivo
+        movimentacoes = tabela_periodo(MovimentacaoCaixa, data_inicio, CAMPOS_MOVIMENTACAO)
+        pedidos = tabela_periodo(Pedido, data_inicio, ['id', 'created_at'])
+        
+        periodo = and_(
+            movimentacoes.c.created_at >= data_inicio,
+            movimentacoes.c.created_at <= data_fim
         )
         
-        # Calcular totais por tipo
-        entradas = query.filter(MovimentacaoCaixa.tipo == 'entrada').all()
-        saidas = query.filter(MovimentacaoCaixa.tipo == 'saida').all()
-        fiados = query.filter(MovimentacaoCaixa.tipo == 'fiado').all()
+        # Totais por tipo em uma única agregação
+        totais = dict(
+            db.session.query(
+                movimentacoes.c.tipo,
+                func.sum(movimentacoes.c.valor)
+            ).filter(periodo).group_by(movimentacoes.c.tipo).all()
+        )
         
-        total_entradas = sum(mov.valor for mov in entradas)
-        total_saidas = sum(mov.valor for mov in saidas)
-        total_fiados = sum(mov.valor for mov in fiados)
+        total_entradas = totais.get('entrada') or 0
+        total_saidas = totais.get('saida') or 0
+        total_fiados = totais.get('fiado') or 0
         
         saldo = total_entradas - total_saidas
         
-        # Movimentações detalhadas
-        todas_movimentacoes = query.order_by(MovimentacaoCaixa.created_at.desc()).all()
-        
         # Estatísticas de pedidos
-        pedidos_periodo = Pedido.query.filter(
+        total_pedidos = db.session.query(func.count(pedidos.c.id)).filter(
             and_(
-                Pedido.created_at >= data_inicio,
-                Pedido.created_at <= data_fim
+                pedidos.c.created_at >= data_inicio,
+                pedidos.c.created_at <= data_fim
             )
-        ).all()
+        ).scalar()
         
-        total_pedidos = len(pedidos_periodo)
         ticket_medio = total_entradas / total_pedidos if total_pedidos > 0 else 0
         
+        # Movimentações detalhadas, paginadas por cursor
+        filtros = [periodo]
+        if cursor:
+            filtros.append(filtro_apos_cursor(
+                movimentacoes.c.created_at, movimentacoes.c.id, decodificar_cursor(cursor)
+            ))
+        
+        linhas = db.session.query(*colunas_movimentacao(movimentacoes)).filter(*filtros).order_by(
+            movimentacoes.c.created_at.desc(), movimentacoes.c.id.desc()
+        ).limit(limite + 1).all()
+        
+        next_cursor = None
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            next_cursor = codificar_cursor(linhas[-1].created_at, linhas[-1].id)
+        
         return jsonify({
             'success': True,
             'relatorio': {
                 'periodo': {
-                    'inicio': data_inicio.isoformat(),
-                    'fim': data_fim.isoformat()
+                    'inicio': data_inicio,
+                    'fim': data_fim
                 },
                 'resumo': {
                     'total_entradas': total_entradas,
@@ -72,10 +114,16 @@ def relatorio_caixa():
                     'total_pedidos': total_pedidos,
                     'ticket_medio': round(ticket_medio, 2)
                 },
-                'movimentacoes': [mov.to_dict() for mov in todas_movimentacoes]
+                'movimentacoes': [_movimentacao_dict(linha) for linha in linhas],
+                'next_cursor': next_cursor
             }
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -126,46 +174,42 @@ def criar_movimentacao():
 def dashboard_caixa():
     """Retorna dados para dashboard do caixa"""
     try:
-        hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-        fim_hoje = hoje.replace(hour=23, minute=59, second=59, microsecond=999999)
-        
-        # Vendas de hoje
-        vendas_hoje = MovimentacaoCaixa.query.filter(
-            and_(
-                MovimentacaoCaixa.tipo == 'entrada',
-                MovimentacaoCaixa.created_at >= hoje,
-                MovimentacaoCaixa.created_at <= fim_hoje
-            )
-        ).all()
-        
-        total_hoje = sum(venda.valor for venda in vendas_hoje)
+        # Dia local (FUSO_HORARIO), o mesmo usado nas datas do resumo diário
+        hoje = hoje_local()
+        inicio_hoje = inicio_dia_utc(hoje)
+        fim_hoje = inicio_hoje + timedelta(days=1)
+        
+        # Vendas de hoje e fiados a partir do resumo diário
+        total_hoje, total_fiados = db.session.query(
+            func.coalesce(func.sum(case(
+                (and_(ResumoDiario.tipo == 'entrada', ResumoDiario.data == hoje), ResumoDiario.total),
+                else_=0
+            )), 0),
+            func.coalesce(func.sum(case(
+                (ResumoDiario.tipo == 'fiado', ResumoDiario.total),
+                else_=0
+            )), 0)
+        ).one()
         
         # Pedidos de hoje
-        pedidos_hoje = Pedido.query.filter(
+        pedidos_hoje = db.session.query(func.count(Pedido.id)).filter(
             and_(
-                Pedido.created_at >= hoje,
-                Pedido.created_at <= fim_hoje
+                Pedido.created_at >= inicio_hoje,
+                Pedido.created_at < fim_hoje
             )
-        ).count()
-        
-        # Fiados pendentes
-        fiados_pendentes = MovimentacaoCaixa.query.filter(
-            MovimentacaoCaixa.tipo == 'fiado'
-        ).all()
-        
-        total_fiados = sum(fiado.valor for fiado in fiados_pendentes)
+        ).scalar()
         
         # Vendas dos últimos 7 dias
         sete_dias_atras = hoje - timedelta(days=7)
         vendas_semana = db.session.query(
-            func.date(MovimentacaoCaixa.created_at).label('data'),
-            func.sum(MovimentacaoCaixa.valor).label('total')
+            ResumoDiario.data.label('data'),
+            func.sum(ResumoDiario.total).label('total')
         ).filter(
             and_(
-                MovimentacaoCaixa.tipo == 'entrada',
-                MovimentacaoCaixa.created_at >= sete_dias_atras
+                ResumoDiario.tipo == 'entrada',
+                ResumoDiario.data >= sete_dias_atras
             )
-        ).group_by(func.date(MovimentacaoCaixa.created_at)).all()
+        ).group_by(ResumoDiario.data).order_by(ResumoDiario.data).all()
         
         return jsonify({
             'success': True,
@@ -176,7 +220,7 @@ def dashboard_caixa():
                 'ticket_medio_hoje': round(total_hoje / pedidos_hoje, 2) if pedidos_hoje > 0 else 0,
                 'vendas_semana': [
                     {
-                        'data': venda.data.isoformat(),
+                        'data': venda.data,
                         'total': float(venda.total)
                     } for venda in vendas_semana
                 ]
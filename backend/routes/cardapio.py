@@ -1,16 +1,38 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, current_app, jsonify, request
 from models import db, Prato, Acompanhamento
+from cache import CacheCardapio
+from config import Config
 
 cardapio_bp = Blueprint('cardapio', __name__)
 
+cache_cardapio = CacheCardapio(Config.CARDAPIO_CACHE_TTL)
+
+def _resposta_cacheada(chave, gerar):
+    """Responde com o JSON do cache, ou 304 se o cliente já tem a versão atual.
+
+    O ETag é fraco: o mesmo conteúdo pode sair comprimido ou não.
+    """
+    def serializar():
+        return current_app.json.dumps(gerar()).encode('utf-8')
+    
+    corpo, etag = cache_cardapio.obter(chave, serializar)
+    
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(corpo, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response
+
 @cardapio_bp.route('/api/cardapio', methods=['GET'])
 def get_cardapio():
     """Retorna todos os pratos ativos do cardápio"""
     try:
-        pratos = Prato.query.filter_by(ativo=True).all()
-        return jsonify({
+        return _resposta_cacheada('pratos', lambda: {
             'success': True,
-            'pratos': [prato.to_dict() for prato in pratos]
+            'pratos': [prato.to_dict() for prato in Prato.query.filter_by(ativo=True).all()]
         })
     except Exception as e:
         return jsonify({
@@ -37,10 +59,11 @@ def get_prato(prato_id):
 def get_acompanhamentos():
     """Retorna todos os acompanhamentos ativos"""
     try:
-        acompanhamentos = Acompanhamento.query.filter_by(ativo=True).all()
-        return jsonify({
+        return _resposta_cacheada('acompanhamentos', lambda: {
             'success': True,
-            'acompanhamentos': [acomp.to_dict() for acomp in acompanhamentos]
+            'acompanhamentos': [
+                acomp.to_dict() for acomp in Acompanhamento.query.filter_by(ativo=True).all()
+            ]
         })
     except Exception as e:
         return jsonify({
@@ -69,6 +92,7 @@ def criar_prato():
         
         db.session.add(prato)
         db.session.commit()
+        cache_cardapio.invalidar()
         
         return jsonify({
             'success': True,
@@ -99,6 +123,7 @@ def atualizar_prato(prato_id):
             prato.ativo = data['ativo']
         
         db.session.commit()
+        cache_cardapio.invalidar()
         
         return jsonify({
             'success': True,
@@ -119,6 +144,7 @@ def deletar_prato(prato_id):
         prato = Prato.query.get_or_404(prato_id)
         prato.ativo = False
         db.session.commit()
+        cache_cardapio.invalidar()
         
         return jsonify({
             'success': True,
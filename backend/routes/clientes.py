@@ -0,0 +1,49 @@
+from flask import Blueprint, jsonify, request
+from models import Cliente
+from database import calcular_taxa_entrega
+from enderecos import enderecos_salvos
+from routes.admin import require_usuario
+
+clientes_bp = Blueprint('clientes', __name__)
+
+@clientes_bp.route('/api/clientes/enderecos', methods=['GET'])
+@require_usuario
+def enderecos_cliente():
+    """Dados e endereços salvos do cliente, para preencher o formulário do pedido.
+
+    Exige um usuário logado: sem isso, qualquer um obteria nome e endereços
+    de um cliente apenas testando números de telefone.
+    """
+    try:
+        telefone = request.args.get('telefone', '').strip()
+        if not telefone:
+            return jsonify({
+                'success': False,
+                'error': 'Telefone é obrigatório'
+            }), 400
+        
+        cliente = Cliente.query.filter_by(telefone=telefone).first()
+        if not cliente:
+            return jsonify({
+                'success': False,
+                'error': 'Cliente não encontrado'
+            }), 404
+        
+        enderecos = []
+        for endereco in enderecos_salvos(cliente.id):
+            dados = endereco.to_dict()
+            # A taxa pode ter mudado desde o último pedido
+            dados['taxa_entrega'] = calcular_taxa_entrega(endereco.bairro, endereco.cep)
+            enderecos.append(dados)
+        
+        return jsonify({
+            'success': True,
+            'cliente': {'nome': cliente.nome, 'telefone': cliente.telefone},
+            'enderecos': enderecos
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
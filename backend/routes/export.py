@@ -0,0 +1,172 @@
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from models import db, Pedido, Cliente, Endereco, MovimentacaoCaixa
+from routes.admin import require_admin
+from routes.caixa import colunas_movimentacao
+from arquivo import tabela_periodo
+from provedor_json import para_json
+from perfilamento import resposta_em_stream
+from sqlalchemy import select
+from datetime import datetime
+from enum import Enum
+import csv
+import io
+import logging
+import zlib
+
+export_bp = Blueprint('export', __name__)
+
+log = logging.getLogger('garagem.exportacao')
+
+# Último registro de uma exportação interrompida no meio por um erro
+MENSAGEM_INCOMPLETA = 'Exportação interrompida - arquivo incompleto'
+
+FORMATOS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+# Linhas buscadas do cursor por vez; cada lote vira um bloco da resposta
+LINHAS_POR_LOTE = 1000
+
+CAMPOS_PEDIDO = ('id', 'created_at', 'updated_at', 'status', 'forma_pagamento')
+CAMPOS_VALORES_PEDIDO = ('valor_prato', 'taxa_entrega', 'valor_total', 'observacoes')
+
+def _no_periodo(stmt, tabela, data_inicio, data_fim):
+    """Filtra por created_at e ordena pelo índice (created_at, id)"""
+    if data_inicio:
+        stmt = stmt.where(tabela.c.created_at >= data_inicio)
+    if data_fim:
+        stmt = stmt.where(tabela.c.created_at <= data_fim)
+    return stmt.order_by(tabela.c.created_at, tabela.c.id)
+
+def _consulta_pedidos(data_inicio, data_fim):
+    pedidos = tabela_periodo(Pedido, data_inicio)
+    stmt = select(
+        *[pedidos.c[nome] for nome in CAMPOS_PEDIDO],
+        Cliente.nome.label('cliente'),
+        Cliente.telefone,
+        Endereco.rua,
+        Endereco.numero,
+        Endereco.bairro,
+        Endereco.cep,
+        Endereco.complemento,
+        *[pedidos.c[nome] for nome in CAMPOS_VALORES_PEDIDO],
+    ).select_from(pedidos) \
+        .join(Cliente, Cliente.id == pedidos.c.cliente_id) \
+        .join(Endereco, Endereco.id == pedidos.c.endereco_id)
+    return _no_periodo(stmt, pedidos, data_inicio, data_fim)
+
+def _consulta_movimentacoes(data_inicio, data_fim):
+    movimentacoes = tabela_periodo(MovimentacaoCaixa, data_inicio)
+    return _no_periodo(
+        select(*colunas_movimentacao(movimentacoes)), movimentacoes, data_inicio, data_fim
+    )
+
+EXPORTACOES = {
+    'pedidos': _consulta_pedidos,
+    'movimentacoes': _consulta_movimentacoes,
+}
+
+def _valor(valor):
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, Enum):
+        return valor.value
+    return valor
+
+def _blocos_csv(resultado):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(resultado.keys())
+    for lote in resultado.partitions():
+        escritor.writerows([_valor(valor) for valor in linha] for linha in lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _blocos_ndjson(resultado):
+    colunas = list(resultado.keys())
+    for lote in resultado.partitions():
+        yield ''.join(
+            para_json(dict(zip(colunas, linha))) + '\n'
+            for linha in lote
+        )
+
+def _marcar_interrupcao(blocos, tipo, formato):
+    """Repassa os blocos; se a leitura falhar no meio, registra o erro no log,
+    termina o arquivo com um registro de erro e derruba a conexão (a resposta
+    já saiu com 200, então o cliente só percebe o corte assim)"""
+    try:
+        yield from blocos
+    except Exception:
+        log.exception('Exportação de %s interrompida', tipo)
+        if formato == 'csv':
+            buffer = io.StringIO()
+            csv.writer(buffer).writerow(['erro', MENSAGEM_INCOMPLETA])
+            yield buffer.getvalue()
+        else:
+            yield para_json({'erro': MENSAGEM_INCOMPLETA}) + '\n'
+        raise
+
+def _gzip(blocos):
+    """Compacta os blocos à medida que são gerados"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for bloco in blocos:
+        dados = compressor.compress(bloco.encode('utf-8'))
+        if dados:
+            yield dados
+    yield compressor.flush()
+
+@export_bp.route('/api/export/<tipo>', methods=['GET'])
+@resposta_em_stream
+@require_admin
+def exportar(tipo):
+    """Exporta pedidos ou movimentações do caixa em CSV ou NDJSON.
+
+    As linhas são lidas do banco em lotes (yield_per) e enviadas conforme
+    chegam, então a memória não cresce com o tamanho do período. Pedidos
+    arquivados entram quando o período os alcança.
+    """
+    if tipo not in EXPORTACOES:
+        return jsonify({
+            'success': False,
+            'error': f"Exportação inválida. Use: {', '.join(EXPORTACOES)}"
+        }), 404
+    
+    try:
+        formato = request.args.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato inválido. Use: {', '.join(FORMATOS)}")
+        
+        data_inicio = request.args.get('data_inicio')
+        data_inicio = datetime.fromisoformat(data_inicio) if data_inicio else None
+        data_fim = request.args.get('data_fim')
+        data_fim = datetime.fromisoformat(data_fim) if data_fim else None
+        compactar = request.args.get('gzip', '').lower() in ('1', 'true', 'sim')
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    stmt = EXPORTACOES[tipo](data_inicio, data_fim).execution_options(yield_per=LINHAS_POR_LOTE)
+    
+    def gerar():
+        try:
+            resultado = db.session.execute(stmt)
+            blocos = _blocos_csv(resultado) if formato == 'csv' else _blocos_ndjson(resultado)
+            blocos = _marcar_interrupcao(blocos, tipo, formato)
+            # Com gzip, o arquivo cortado também fica sem o trailer e falha ao descompactar
+            yield from _gzip(blocos) if compactar else blocos
+        finally:
+            db.session.close()
+    
+    nome_arquivo = f"{tipo}.{formato}" + ('.gz' if compactar else '')
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='application/gzip' if compactar else FORMATOS[formato],
+        headers={
+            'Content-Disposition': f'attachment; filename="{nome_arquivo}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
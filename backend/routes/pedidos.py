@@ -1,42 +1,79 @@
-from flask import Blueprint, jsonify, request
-from models import db, Pedido, Cliente, Endereco, Prato, Acompanhamento, MovimentacaoCaixa
-from models import StatusPedido, FormaPagamento
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from models import db, Pedido, ItemPedido, Cliente, Prato, Acompanhamento, MovimentacaoCaixa, HistoricoStatus
+from models import StatusPedido, FormaPagamento, TRANSICOES_STATUS
 from database import calcular_taxa_entrega
+from eventos import barramento_pedidos, formatar_sse
+from serializers import consulta_pedidos_completos, serializar_pedidos, projetar_pedidos
+from paginacao import ler_limite, codificar_cursor, decodificar_cursor, filtro_apos_cursor
+from resumo import registrar_movimentacoes
+from enderecos import linha_endereco, obter_enderecos, salvar_enderecos_clientes
+from idempotencia import CABECALHO, TAMANHO_MAXIMO_CHAVE, hash_requisicao
+from idempotencia import buscar_resposta, registrar_resposta, lembrar_resposta
+from provedor_json import para_json
+from perfilamento import resposta_em_stream
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 
 pedidos_bp = Blueprint('pedidos', __name__)
 
+STATUS_COZINHA = [StatusPedido.ACEITO, StatusPedido.PREPARO]
+
+CAMPOS_OBRIGATORIOS = ['nome', 'telefone', 'rua', 'numero', 'bairro', 'forma_pagamento']
+
+# Itens diferentes por pedido e unidades de cada item
+LIMITE_ITENS = 30
+LIMITE_QUANTIDADE = 50
+
+# Máximo de pedidos aceitos em POST /api/pedidos/batch
+LIMITE_LOTE = 500
+
+# Intervalo (segundos) entre comentários de keepalive no stream
+INTERVALO_KEEPALIVE = 15
+
+def _repetir_resposta(guardada, hash_dados):
+    """Reenvia a resposta de uma Idempotency-Key já usada"""
+    if guardada.hash_requisicao != hash_dados:
+        return jsonify({
+            'success': False,
+            'error': f'{CABECALHO} já usada com outro conteúdo'
+        }), 422
+    
+    response = Response(guardada.corpo, status=guardada.status_code, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
 @pedidos_bp.route('/api/pedidos', methods=['POST'])
 def criar_pedido():
-    """Cria um novo pedido"""
+    """Cria um novo pedido.
+
+    Com o cabeçalho Idempotency-Key, repetições da mesma requisição recebem
+    a resposta original em vez de criar outro pedido.
+    """
     try:
         data = request.get_json()
         
-        # Validações básicas
-        required_fields = ['nome', 'telefone', 'rua', 'numero', 'bairro', 
-                          'prato_id', 'acompanhamento_id', 'forma_pagamento']
-        
-        for field in required_fields:
-            if not data.get(field):
+        chave = request.headers.get(CABECALHO)
+        if chave:
+            if len(chave) > TAMANHO_MAXIMO_CHAVE:
                 return jsonify({
                     'success': False,
-                    'error': f'Campo {field} é obrigatório'
+                    'error': f'{CABECALHO} deve ter até {TAMANHO_MAXIMO_CHAVE} caracteres'
                 }), 400
+            hash_dados = hash_requisicao(data)
+            guardada = buscar_resposta(chave)
+            if guardada:
+                return _repetir_resposta(guardada, hash_dados)
         
-        # Verificar se prato e acompanhamento existem
-        prato = Prato.query.get(data['prato_id'])
-        acompanhamento = Acompanhamento.query.get(data['acompanhamento_id'])
-        
-        if not prato or not prato.ativo:
-            return jsonify({
-                'success': False,
-                'error': 'Prato não encontrado ou inativo'
-            }), 400
-            
-        if not acompanhamento or not acompanhamento.ativo:
+        # Validar os itens e calcular o valor em uma passada
+        pratos = _mapa_por_id(Prato, _ids_dos_itens([data], 'prato_id'))
+        acompanhamentos = _mapa_por_id(Acompanhamento, _ids_dos_itens([data], 'acompanhamento_id'))
+        try:
+            itens, valor_itens = _preparar_pedido(data, pratos, acompanhamentos)
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': 'Acompanhamento não encontrado ou inativo'
+                'error': str(e)
             }), 400
         
         # Criar ou buscar cliente
@@ -50,32 +87,24 @@ def criar_pedido():
             db.session.flush()  # Para obter o ID
         
         # Calcular taxa de entrega
-        taxa_entrega = calcular_taxa_entrega(data['bairro'])
-        
-        # Criar endereço
-        endereco = Endereco(
-            cep=data.get('cep', ''),
-            rua=data['rua'],
-            numero=data['numero'],
-            bairro=data['bairro'],
-            complemento=data.get('complemento', ''),
-            taxa_entrega=taxa_entrega
-        )
-        db.session.add(endereco)
-        db.session.flush()
+        taxa_entrega = calcular_taxa_entrega(data['bairro'], data.get('cep'))
+        
+        # Reaproveitar o endereço se já foi usado e salvá-lo para o cliente
+        endereco = linha_endereco(data, taxa_entrega)
+        endereco_id = obter_enderecos([endereco])[endereco['hash']]
+        salvar_enderecos_clientes([(cliente.id, endereco_id)], datetime.utcnow())
         
         # Calcular valores
-        valor_prato = prato.preco
-        valor_total = valor_prato + taxa_entrega
+        valor_total = valor_itens + taxa_entrega
         
-        # Criar pedido
+        # Criar pedido (prato e acompanhamento do pedido são os do primeiro item)
         pedido = Pedido(
             cliente_id=cliente.id,
-            prato_id=prato.id,
-            acompanhamento_id=acompanhamento.id,
-            endereco_id=endereco.id,
+            prato_id=itens[0]['prato_id'],
+            acompanhamento_id=itens[0]['acompanhamento_id'],
+            endereco_id=endereco_id,
             forma_pagamento=FormaPagamento(data['forma_pagamento']),
-            valor_prato=valor_prato,
+            valor_prato=valor_itens,
             taxa_entrega=taxa_entrega,
             valor_total=valor_total,
             observacoes=data.get('observacoes', ''),
@@ -85,21 +114,105 @@ def criar_pedido():
         db.session.add(pedido)
         db.session.flush()
         
+        db.session.execute(insert(ItemPedido), [{**item, 'pedido_id': pedido.id} for item in itens])
+        db.session.add(HistoricoStatus(pedido_id=pedido.id, status_novo=StatusPedido.ACEITO))
+        
         # Registrar movimentação no caixa
         movimentacao = MovimentacaoCaixa(
             pedido_id=pedido.id,
             tipo='entrada',
             valor=valor_total,
-            descricao=f'Pedido #{pedido.id} - {prato.nome}'
+            descricao=_descricao_movimentacao(pedido.id, itens, pratos)
         )
         db.session.add(movimentacao)
         
-        db.session.commit()
+        pedido_dict = pedido.to_dict()
+        corpo = {
+            'success': True,
+            'pedido': pedido_dict
+        }
+        if chave:
+            # Gravada na mesma transação: ou o pedido e a chave existem, ou nenhum
+            guardada = registrar_resposta(chave, hash_dados, 201, current_app.json.dumps(corpo))
+        
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Outra requisição com a mesma chave gravou primeiro
+            db.session.rollback()
+            guardada = buscar_resposta(chave) if chave else None
+            if guardada is None:
+                raise
+            return _repetir_resposta(guardada, hash_dados)
+        
+        if chave:
+            lembrar_resposta(chave, guardada)
+        barramento_pedidos().publicar('pedido_criado', pedido_dict)
         
+        return jsonify(corpo), 201
+        
+    except Exception as e:
+        db.session.rollback()
         return jsonify({
-            'success': True,
-            'pedido': pedido.to_dict()
-        }), 201
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@pedidos_bp.route('/api/pedidos/batch', methods=['POST'])
+def criar_pedidos_lote():
+    """Cria vários pedidos de uma vez, em uma única transação.
+
+    Corpo: {"pedidos": [...]} com os mesmos campos de POST /api/pedidos.
+    Pedidos inválidos são recusados individualmente; a resposta traz um
+    resultado por pedido, na ordem recebida.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('pedidos'), list) or not data['pedidos']:
+            return jsonify({
+                'success': False,
+                'error': 'Lista de pedidos é obrigatória'
+            }), 400
+        
+        dados_pedidos = data['pedidos']
+        if len(dados_pedidos) > LIMITE_LOTE:
+            return jsonify({
+                'success': False,
+                'error': f'Máximo de {LIMITE_LOTE} pedidos por lote'
+            }), 400
+        
+        # Pratos e acompanhamentos citados, em uma consulta cada
+        pratos = _mapa_por_id(Prato, _ids_dos_itens(dados_pedidos, 'prato_id'))
+        acompanhamentos = _mapa_por_id(Acompanhamento, _ids_dos_itens(dados_pedidos, 'acompanhamento_id'))
+        
+        resultados = [None] * len(dados_pedidos)
+        validos = []
+        for indice, dados in enumerate(dados_pedidos):
+            try:
+                validos.append((indice, dados, *_preparar_pedido(dados, pratos, acompanhamentos)))
+            except ValueError as e:
+                resultados[indice] = {'indice': indice, 'success': False, 'error': str(e)}
+        
+        criados = []
+        if validos:
+            criados = _inserir_lote(validos, pratos)
+            db.session.commit()
+            
+            pedidos = {
+                pedido['id']: pedido for pedido in
+                serializar_pedidos(Pedido.query.filter(Pedido.id.in_([pid for _, pid in criados])))
+            }
+            for indice, pedido_id in criados:
+                resultados[indice] = {'indice': indice, 'success': True, 'pedido': pedidos[pedido_id]}
+            barramento_pedidos().publicar_varios('pedido_criado', [pedidos[pid] for _, pid in criados])
+        
+        return jsonify({
+            'success': bool(criados),
+            'criados': len(criados),
+            'recusados': len(dados_pedidos) - len(criados),
+            'resultados': resultados
+        }), 201 if criados else 400
         
     except Exception as e:
         db.session.rollback()
@@ -108,35 +221,257 @@ def criar_pedido():
             'error': str(e)
         }), 500
 
+def _ler_id(valor):
+    """Id informado como número ou texto ('1'); None se não for um inteiro"""
+    if isinstance(valor, bool) or (isinstance(valor, float) and not valor.is_integer()):
+        return None
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+def _mapa_por_id(modelo, ids):
+    """Busca os registros informados de uma vez e indexa por id"""
+    ids = {_ler_id(i) for i in ids} - {None}
+    if not ids:
+        return {}
+    return {registro.id: registro for registro in modelo.query.filter(modelo.id.in_(ids))}
+
+def _ids_dos_itens(dados_pedidos, campo):
+    """Ids citados nos itens dos pedidos, para buscar todos de uma vez"""
+    for dados in dados_pedidos:
+        if not isinstance(dados, dict):
+            continue
+        # No formato antigo (sem 'itens') o próprio pedido tem prato_id/acompanhamento_id
+        itens = dados['itens'] if isinstance(dados.get('itens'), list) else [dados]
+        for item in itens:
+            if isinstance(item, dict):
+                yield item.get(campo)
+
+def _itens_informados(dados):
+    """Itens do pedido: a lista 'itens' ou, no formato antigo, um item com prato_id/acompanhamento_id"""
+    if 'itens' not in dados:
+        for field in ('prato_id', 'acompanhamento_id'):
+            if not dados.get(field):
+                raise ValueError(f'Campo {field} é obrigatório')
+        return [{'prato_id': dados['prato_id'], 'acompanhamento_id': dados['acompanhamento_id']}]
+    
+    itens = dados['itens']
+    if not isinstance(itens, list) or not itens:
+        raise ValueError('Informe ao menos um item')
+    if len(itens) > LIMITE_ITENS:
+        raise ValueError(f'Máximo de {LIMITE_ITENS} itens por pedido')
+    return itens
+
+def _preparar_pedido(dados, pratos, acompanhamentos):
+    """Valida o pedido e calcula os itens em uma passada.
+
+    Retorna (itens, valor_itens); erros de validação levantam ValueError.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('Pedido deve ser um objeto')
+    
+    for field in CAMPOS_OBRIGATORIOS:
+        if not dados.get(field):
+            raise ValueError(f'Campo {field} é obrigatório')
+    
+    itens = []
+    valor_itens = 0.0
+    for item in _itens_informados(dados):
+        if not isinstance(item, dict):
+            raise ValueError('Item deve ser um objeto')
+        
+        prato = pratos.get(_ler_id(item.get('prato_id')))
+        if not prato or not prato.ativo:
+            raise ValueError('Prato não encontrado ou inativo')
+        
+        acompanhamento = acompanhamentos.get(_ler_id(item.get('acompanhamento_id')))
+        if not acompanhamento or not acompanhamento.ativo:
+            raise ValueError('Acompanhamento não encontrado ou inativo')
+        
+        quantidade = item.get('quantidade', 1)
+        if type(quantidade) is not int or not 1 <= quantidade <= LIMITE_QUANTIDADE:
+            raise ValueError(f'Quantidade deve ser um número inteiro de 1 a {LIMITE_QUANTIDADE}')
+        
+        subtotal = round(prato.preco * quantidade, 2)
+        itens.append({
+            'prato_id': prato.id,
+            'acompanhamento_id': acompanhamento.id,
+            'quantidade': quantidade,
+            'preco_unitario': prato.preco,
+            'subtotal': subtotal,
+            'observacoes': item.get('observacoes', '')
+        })
+        valor_itens += subtotal
+    
+    try:
+        FormaPagamento(dados['forma_pagamento'])
+    except ValueError:
+        raise ValueError('Forma de pagamento inválida')
+    
+    return itens, round(valor_itens, 2)
+
+def _descricao_movimentacao(pedido_id, itens, pratos):
+    """Descrição da entrada no caixa: 'Pedido #1 - X-Burger' ou 'Pedido #1 - 2x X-Burger, 1x ...'"""
+    if len(itens) == 1 and itens[0]['quantidade'] == 1:
+        descricao = f"Pedido #{pedido_id} - {pratos[itens[0]['prato_id']].nome}"
+    else:
+        descricao = f"Pedido #{pedido_id} - " + ', '.join(
+            f"{item['quantidade']}x {pratos[item['prato_id']].nome}" for item in itens
+        )
+    return descricao[:200]
+
+def _inserir_lote(validos, pratos):
+    """Insere clientes, endereços, pedidos, itens e movimentações com INSERTs em massa.
+
+    validos: lista de (indice, dados, itens, valor_itens) já validados.
+    Retorna a lista de (indice, pedido_id) dos pedidos criados.
+    """
+    agora = datetime.utcnow()
+    
+    # Clientes: reaproveita pelo telefone e cria os que faltam
+    telefones = {dados['telefone'] for _, dados, _, _ in validos}
+    clientes = dict(
+        db.session.query(Cliente.telefone, Cliente.id).filter(Cliente.telefone.in_(telefones))
+    )
+    novos_clientes = {}
+    for _, dados, _, _ in validos:
+        if dados['telefone'] not in clientes:
+            novos_clientes.setdefault(dados['telefone'], {
+                'nome': dados['nome'], 'telefone': dados['telefone'], 'created_at': agora
+            })
+    if novos_clientes:
+        clientes.update(db.session.execute(
+            insert(Cliente).returning(Cliente.telefone, Cliente.id),
+            list(novos_clientes.values())
+        ).all())
+    
+    # Endereços: reaproveita os já gravados (pelo hash) e salva para os clientes
+    taxas = [calcular_taxa_entrega(dados['bairro'], dados.get('cep')) for _, dados, _, _ in validos]
+    linhas_enderecos = [linha_endereco(dados, taxa) for (_, dados, _, _), taxa in zip(validos, taxas)]
+    enderecos = obter_enderecos(linhas_enderecos)
+    endereco_ids = [enderecos[linha['hash']] for linha in linhas_enderecos]
+    salvar_enderecos_clientes(
+        [(clientes[dados['telefone']], endereco_id) for (_, dados, _, _), endereco_id in zip(validos, endereco_ids)],
+        agora
+    )
+    
+    # Pedidos
+    linhas_pedidos = []
+    for (_, dados, itens, valor_itens), taxa, endereco_id in zip(validos, taxas, endereco_ids):
+        linhas_pedidos.append({
+            'cliente_id': clientes[dados['telefone']],
+            'prato_id': itens[0]['prato_id'],
+            'acompanhamento_id': itens[0]['acompanhamento_id'],
+            'endereco_id': endereco_id,
+            'forma_pagamento': FormaPagamento(dados['forma_pagamento']),
+            'valor_prato': valor_itens,
+            'taxa_entrega': taxa,
+            'valor_total': valor_itens + taxa,
+            'observacoes': dados.get('observacoes', ''),
+            'status': StatusPedido.ACEITO,
+            'created_at': agora,
+            'updated_at': agora
+        })
+    pedido_ids = _ids_inseridos(insert(Pedido).returning(Pedido.id), linhas_pedidos)
+    
+    # Itens de todos os pedidos em um único INSERT
+    db.session.execute(insert(ItemPedido), [
+        {**item, 'pedido_id': pedido_id}
+        for (_, _, itens, _), pedido_id in zip(validos, pedido_ids) for item in itens
+    ])
+    
+    db.session.execute(insert(HistoricoStatus), [
+        {'pedido_id': pedido_id, 'status_novo': StatusPedido.ACEITO, 'created_at': agora}
+        for pedido_id in pedido_ids
+    ])
+    
+    # Movimentações no caixa (o resumo diário é somado de uma vez)
+    movimentacoes = [
+        {
+            'pedido_id': pedido_id,
+            'tipo': 'entrada',
+            'valor': linha['valor_total'],
+            'descricao': _descricao_movimentacao(pedido_id, itens, pratos),
+            'created_at': agora
+        } for pedido_id, linha, (_, _, itens, _) in zip(pedido_ids, linhas_pedidos, validos)
+    ]
+    db.session.execute(insert(MovimentacaoCaixa), movimentacoes)
+    registrar_movimentacoes(db.session.connection(), [
+        (agora, 'entrada', linha['forma_pagamento'], linha['valor_total']) for linha in linhas_pedidos
+    ])
+    
+    return [(indice, pedido_id) for (indice, _, _, _), pedido_id in zip(validos, pedido_ids)]
+
+def _ids_inseridos(stmt, linhas):
+    """Executa o INSERT em massa e devolve os ids na ordem das linhas.
+
+    Os ids são gerados na ordem das linhas do INSERT, então ordená-los
+    reconstrói a correspondência com os parâmetros sem que o SQLite precise
+    executar uma linha por vez (sort_by_parameter_order).
+    """
+    return sorted(db.session.scalars(stmt, linhas).all())
+
 @pedidos_bp.route('/api/pedidos', methods=['GET'])
 def listar_pedidos():
-    """Lista todos os pedidos com filtros opcionais"""
+    """Lista os pedidos com filtros opcionais, paginados por cursor.
+
+    Parâmetros: status, data_inicio, data_fim, limite, cursor (next_cursor da
+    página anterior) e fields (ex.: fields=id,status,endereco.bairro).
+    """
     try:
         # Parâmetros de filtro
         status = request.args.get('status')
         data_inicio = request.args.get('data_inicio')
         data_fim = request.args.get('data_fim')
+        cursor = request.args.get('cursor')
+        campos = request.args.get('fields')
+        limite = ler_limite(request.args.get('limite'))
         
-        query = Pedido.query
+        filtros = []
         
         if status:
-            query = query.filter(Pedido.status == StatusPedido(status))
+            filtros.append(Pedido.status == StatusPedido(status))
         
         if data_inicio:
             data_inicio = datetime.fromisoformat(data_inicio)
-            query = query.filter(Pedido.created_at >= data_inicio)
+            filtros.append(Pedido.created_at >= data_inicio)
             
         if data_fim:
             data_fim = datetime.fromisoformat(data_fim)
-            query = query.filter(Pedido.created_at <= data_fim)
+            filtros.append(Pedido.created_at <= data_fim)
+        
+        if cursor:
+            filtros.append(filtro_apos_cursor(Pedido.created_at, Pedido.id, decodificar_cursor(cursor)))
+        
+        ordem = (Pedido.created_at.desc(), Pedido.id.desc())
         
-        pedidos = query.order_by(Pedido.created_at.desc()).all()
+        # Busca uma linha a mais para saber se existe próxima página
+        if campos:
+            linhas = projetar_pedidos(campos.split(','), filtros, ordem, limite + 1)
+        else:
+            query = consulta_pedidos_completos(Pedido.query.filter(*filtros))
+            linhas = [
+                (pedido.to_dict(), (pedido.created_at, pedido.id))
+                for pedido in query.order_by(*ordem).limit(limite + 1)
+            ]
+        
+        next_cursor = None
+        if len(linhas) > limite:
+            linhas = linhas[:limite]
+            next_cursor = codificar_cursor(*linhas[-1][1])
         
         return jsonify({
             'success': True,
-            'pedidos': [pedido.to_dict() for pedido in pedidos]
+            'pedidos': [pedido for pedido, _ in linhas],
+            'next_cursor': next_cursor
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -147,7 +482,7 @@ def listar_pedidos():
 def get_pedido(pedido_id):
     """Retorna um pedido específico"""
     try:
-        pedido = Pedido.query.get_or_404(pedido_id)
+        pedido = consulta_pedidos_completos().get_or_404(pedido_id)
         return jsonify({
             'success': True,
             'pedido': pedido.to_dict()
@@ -160,9 +495,14 @@ def get_pedido(pedido_id):
 
 @pedidos_bp.route('/api/pedidos/<int:pedido_id>/status', methods=['PUT'])
 def atualizar_status_pedido(pedido_id):
-    """Atualiza o status de um pedido"""
+    """Atualiza o status de um pedido.
+
+    Só aceita as transições de TRANSICOES_STATUS. A gravação é um
+    compare-and-swap pela versão do pedido: se outra tela mudou o pedido
+    depois da leitura (ou da versão enviada em "versao"), responde 409 com
+    o pedido atual em vez de sobrescrever.
+    """
     try:
-        pedido = Pedido.query.get_or_404(pedido_id)
         data = request.get_json()
         
         if not data or 'status' not in data:
@@ -171,15 +511,66 @@ def atualizar_status_pedido(pedido_id):
                 'error': 'Status é obrigatório'
             }), 400
         
-        novo_status = StatusPedido(data['status'])
-        pedido.status = novo_status
-        pedido.updated_at = datetime.utcnow()
+        try:
+            novo_status = StatusPedido(data['status'])
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Status inválido'
+            }), 400
+        
+        versao = data.get('versao')
+        if versao is not None:
+            try:
+                versao = int(versao)
+            except (TypeError, ValueError):
+                return jsonify({
+                    'success': False,
+                    'error': 'Versão inválida'
+                }), 400
         
+        pedido = Pedido.query.get_or_404(pedido_id)
+        status_anterior = pedido.status
+        if versao is None:
+            versao = pedido.versao
+        
+        if versao != pedido.versao:
+            return _conflito_status(pedido, 'Pedido foi alterado por outra tela')
+        
+        if status_anterior is None:
+            # Pedidos antigos gravados sem status não têm transição definida
+            return _conflito_status(pedido, 'Pedido sem status definido - transição não permitida')
+        
+        if novo_status not in TRANSICOES_STATUS.get(status_anterior, set()):
+            return _conflito_status(
+                pedido, f'Transição de {status_anterior.value} para {novo_status.value} não permitida'
+            )
+        
+        resultado = db.session.execute(
+            update(Pedido)
+            .where(Pedido.id == pedido_id, Pedido.versao == versao)
+            .values(status=novo_status, versao=Pedido.versao + 1, updated_at=datetime.utcnow()),
+            execution_options={'synchronize_session': False}
+        )
+        if resultado.rowcount == 0:
+            # Outra requisição gravou entre a leitura e o UPDATE
+            db.session.rollback()
+            return _conflito_status(pedido, 'Pedido foi alterado por outra tela')
+        
+        db.session.add(HistoricoStatus(
+            pedido_id=pedido_id, status_anterior=status_anterior, status_novo=novo_status
+        ))
         db.session.commit()
         
+        pedido_dict = pedido.to_dict()
+        barramento_pedidos().publicar(
+            'pedido_atualizado', pedido_dict,
+            status_anterior=status_anterior.value
+        )
+        
         return jsonify({
             'success': True,
-            'pedido': pedido.to_dict()
+            'pedido': pedido_dict
         })
         
     except Exception as e:
@@ -189,17 +580,22 @@ def atualizar_status_pedido(pedido_id):
             'error': str(e)
         }), 500
 
+def _conflito_status(pedido, mensagem):
+    """Resposta 409 com o estado atual do pedido, para a tela se atualizar"""
+    db.session.refresh(pedido)
+    return jsonify({
+        'success': False,
+        'error': mensagem,
+        'pedido': pedido.to_dict()
+    }), 409
+
 @pedidos_bp.route('/api/pedidos/cozinha', methods=['GET'])
 def pedidos_cozinha():
     """Retorna pedidos para o painel da cozinha (aceitos e em preparo)"""
     try:
-        pedidos = Pedido.query.filter(
-            Pedido.status.in_([StatusPedido.ACEITO, StatusPedido.PREPARO])
-        ).order_by(Pedido.created_at.asc()).all()
-        
         return jsonify({
             'success': True,
-            'pedidos': [pedido.to_dict() for pedido in pedidos]
+            'pedidos': _pedidos_por_status(STATUS_COZINHA)
         })
         
     except Exception as e:
@@ -207,3 +603,59 @@ def pedidos_cozinha():
             'success': False,
             'error': str(e)
         }), 500
+
+@pedidos_bp.route('/api/pedidos/cozinha/stream', methods=['GET'])
+@resposta_em_stream
+def stream_pedidos_cozinha():
+    """Stream (SSE) com os pedidos novos e alterados para cozinha e entrega.
+
+    Envia um snapshot inicial e, depois, apenas os pedidos que mudaram.
+    O parâmetro status (ex.: ?status=entrega) escolhe os pedidos acompanhados.
+    """
+    try:
+        status_param = request.args.get('status')
+        if status_param:
+            status = [StatusPedido(s.strip()) for s in status_param.split(',') if s.strip()]
+        else:
+            status = STATUS_COZINHA
+        ultimo_evento = request.headers.get('Last-Event-ID', type=int)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    barramento = barramento_pedidos()
+    assinatura = barramento.assinar([s.value for s in status], ultimo_evento)
+    
+    def gerar():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                if assinatura.precisa_snapshot:
+                    assinatura.precisa_snapshot = False
+                    ultimo_id = barramento.ultimo_id
+                    pedidos = _pedidos_por_status(status)
+                    # Devolve a conexão ao pool enquanto o stream fica aberto
+                    db.session.close()
+                    yield formatar_sse('snapshot', para_json(pedidos), ultimo_id)
+                
+                evento = assinatura.proximo(timeout=INTERVALO_KEEPALIVE)
+                if evento is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield formatar_sse(evento['tipo'], evento['dados'], evento['id'])
+        finally:
+            barramento.cancelar(assinatura)
+    
+    return Response(
+        stream_with_context(gerar()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def _pedidos_por_status(status):
+    """Pedidos com os status informados, do mais antigo para o mais novo"""
+    return serializar_pedidos(
+        Pedido.query.filter(Pedido.status.in_(status)).order_by(Pedido.created_at.asc())
+    )
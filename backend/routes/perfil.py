@@ -0,0 +1,121 @@
+from flask import Blueprint, current_app, jsonify, request, send_file
+from werkzeug.exceptions import HTTPException
+from routes.admin import require_admin
+from perfilamento import SessaoAtiva, INTERVALO_PADRAO_MS
+import os
+
+perfil_bp = Blueprint('perfil', __name__)
+
+def _perfilador():
+    return current_app.extensions['perfilador']
+
+def _resolver_endpoint(valor, metodo):
+    """Aceita o nome do endpoint ('caixa.relatorio_caixa') ou a rota ('/api/caixa/relatorio')"""
+    if not valor:
+        raise ValueError('Endpoint é obrigatório')
+    if valor.startswith('/'):
+        try:
+            endpoint, _ = current_app.url_map.bind('localhost').match(valor, method=metodo)
+        except HTTPException:
+            raise ValueError(f'Rota não encontrada: {metodo} {valor}')
+    elif valor in current_app.view_functions:
+        endpoint = valor
+    else:
+        raise ValueError(f'Endpoint não encontrado: {valor}')
+    if getattr(current_app.view_functions[endpoint], 'resposta_em_stream', False):
+        raise ValueError(f'{endpoint} responde em stream e não pode ser perfilado')
+    return endpoint
+
+def _sessao_nao_encontrada():
+    return jsonify({
+        'success': False,
+        'error': 'Sessão de perfilamento não encontrada'
+    }), 404
+
+@perfil_bp.route('/api/admin/perfil', methods=['POST'])
+@require_admin
+def iniciar_perfil():
+    """Perfila as próximas N requisições de um endpoint (cProfile ou amostragem)"""
+    try:
+        data = request.get_json() or {}
+        endpoint = _resolver_endpoint(data.get('endpoint'), data.get('metodo', 'GET').upper())
+        sessao = _perfilador().iniciar_sessao(
+            endpoint,
+            int(data.get('requisicoes', 10)),
+            data.get('modo', 'cprofile'),
+            float(data.get('intervalo_ms', INTERVALO_PADRAO_MS))
+        )
+        
+        return jsonify({
+            'success': True,
+            'sessao': sessao.to_dict()
+        }), 201
+        
+    except SessaoAtiva as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 409
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@perfil_bp.route('/api/admin/perfil', methods=['GET'])
+@require_admin
+def listar_perfis():
+    """Sessões de perfilamento deste processo, da mais recente para a mais antiga"""
+    sessoes = sorted(_perfilador().sessoes.values(), key=lambda s: s.id, reverse=True)
+    return jsonify({
+        'success': True,
+        'sessoes': [sessao.to_dict() for sessao in sessoes]
+    })
+
+@perfil_bp.route('/api/admin/perfil/<int:sessao_id>', methods=['GET'])
+@require_admin
+def obter_perfil(sessao_id):
+    """Andamento de uma sessão de perfilamento"""
+    sessao = _perfilador().sessoes.get(sessao_id)
+    if sessao is None:
+        return _sessao_nao_encontrada()
+    return jsonify({
+        'success': True,
+        'sessao': sessao.to_dict()
+    })
+
+@perfil_bp.route('/api/admin/perfil/<int:sessao_id>', methods=['DELETE'])
+@require_admin
+def cancelar_perfil(sessao_id):
+    """Encerra a sessão antes das N requisições, gravando o que já foi coletado"""
+    sessao = _perfilador().cancelar(sessao_id)
+    if sessao is None:
+        return _sessao_nao_encontrada()
+    return jsonify({
+        'success': True,
+        'sessao': sessao.to_dict()
+    })
+
+@perfil_bp.route('/api/admin/perfil/<int:sessao_id>/arquivo', methods=['GET'])
+@require_admin
+def baixar_perfil(sessao_id):
+    """Baixa o .pstats (cProfile) ou as pilhas colapsadas (amostragem)"""
+    sessao = _perfilador().sessoes.get(sessao_id)
+    if sessao is None:
+        return _sessao_nao_encontrada()
+    if sessao.status not in ('concluida', 'cancelada') or not os.path.exists(sessao.arquivo):
+        return jsonify({
+            'success': False,
+            'error': f'Perfil ainda não disponível (status: {sessao.status})'
+        }), 409
+    return send_file(
+        sessao.arquivo,
+        mimetype='application/octet-stream' if sessao.modo == 'cprofile' else 'text/plain',
+        as_attachment=True,
+        download_name=os.path.basename(sessao.arquivo)
+    )
@@ -0,0 +1,151 @@
+from flask import Blueprint, jsonify, request
+from models import db, TaxaEntrega
+from database import calcular_taxa_entrega
+from taxas import TIPOS_TAXA, normalizar_padrao
+from routes.admin import require_admin
+
+taxas_bp = Blueprint('taxas', __name__)
+
+def _aplicar_campos(taxa, data):
+    """Copia os campos enviados para a regra, validando tipo, padrão e valor"""
+    if 'tipo' in data:
+        if data['tipo'] not in TIPOS_TAXA:
+            raise ValueError(f"Tipo inválido. Use: {', '.join(TIPOS_TAXA)}")
+        taxa.tipo = data['tipo']
+    if 'padrao' in data:
+        taxa.padrao = (data['padrao'] or '').strip()
+    if 'valor' in data:
+        taxa.valor = float(data['valor'])
+        if taxa.valor < 0:
+            raise ValueError('Valor não pode ser negativo')
+    if 'prioridade' in data:
+        taxa.prioridade = int(data['prioridade'])
+    if 'ativo' in data:
+        taxa.ativo = bool(data['ativo'])
+    
+    if taxa.tipo != 'padrao' and not normalizar_padrao(taxa.tipo, taxa.padrao):
+        raise ValueError('Padrão é obrigatório para este tipo de regra')
+
+@taxas_bp.route('/api/taxa-entrega', methods=['GET'])
+def consultar_taxa_entrega():
+    """Taxa de entrega para um bairro e/ou CEP"""
+    try:
+        bairro = request.args.get('bairro', '')
+        cep = request.args.get('cep')
+        
+        return jsonify({
+            'success': True,
+            'bairro': bairro,
+            'cep': cep,
+            'taxa_entrega': calcular_taxa_entrega(bairro, cep)
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@taxas_bp.route('/api/admin/taxas', methods=['GET'])
+@require_admin
+def listar_taxas():
+    """Lista as regras de taxa de entrega na ordem em que são avaliadas"""
+    try:
+        taxas = TaxaEntrega.query.order_by(TaxaEntrega.prioridade, TaxaEntrega.id).all()
+        
+        return jsonify({
+            'success': True,
+            'taxas': [taxa.to_dict() for taxa in taxas]
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@taxas_bp.route('/api/admin/taxas', methods=['POST'])
+@require_admin
+def criar_taxa():
+    """Cria uma regra de taxa de entrega"""
+    try:
+        data = request.get_json()
+        
+        if not data or not data.get('tipo') or data.get('valor') is None:
+            return jsonify({
+                'success': False,
+                'error': 'Tipo e valor são obrigatórios'
+            }), 400
+        
+        taxa = TaxaEntrega(padrao='', prioridade=100, ativo=True)
+        _aplicar_campos(taxa, data)
+        
+        db.session.add(taxa)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'taxa': taxa.to_dict()
+        }), 201
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@taxas_bp.route('/api/admin/taxas/<int:taxa_id>', methods=['PUT'])
+@require_admin
+def atualizar_taxa(taxa_id):
+    """Atualiza uma regra de taxa de entrega"""
+    try:
+        taxa = TaxaEntrega.query.get_or_404(taxa_id)
+        _aplicar_campos(taxa, request.get_json() or {})
+        
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'taxa': taxa.to_dict()
+        })
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@taxas_bp.route('/api/admin/taxas/<int:taxa_id>', methods=['DELETE'])
+@require_admin
+def deletar_taxa(taxa_id):
+    """Desativa uma regra de taxa de entrega (soft delete)"""
+    try:
+        taxa = TaxaEntrega.query.get_or_404(taxa_id)
+        taxa.ativo = False
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Regra de taxa desativada com sucesso'
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
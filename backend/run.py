@@ -6,6 +6,8 @@ Script para inicializar a API da Garagem do Lanche
 import os
 import sys
 from app import create_app
+from config import Config
+from database import init_database
 
 if __name__ == '__main__':
     # Verificar se o arquivo de banco existe
@@ -13,14 +15,23 @@ if __name__ == '__main__':
     if not os.path.exists(db_path):
         print("🗄️  Criando banco de dados SQLite...")
     
-    # Criar aplicação
+    # Criar aplicação e garantir esquema/dados iniciais
     app = create_app()
+    init_database(app)
     
     # Configurações de desenvolvimento
     if len(sys.argv) > 1 and sys.argv[1] == '--prod':
         # Modo produção
         print("🚀 Iniciando em modo PRODUÇÃO")
-        app.run(host='0.0.0.0', port=5000, debug=False)
+        try:
+            from waitress import serve
+        except ImportError:
+            print("⚠️  waitress não instalado - usando o servidor de desenvolvimento do Flask")
+            print("   Para produção: pip install waitress ou gunicorn -c gunicorn.conf.py wsgi:app")
+            app.run(host=Config.WEB_HOST, port=Config.WEB_PORT, debug=False, threaded=True)
+        else:
+            print(f"🧵 waitress com {Config.WEB_THREADS} threads em {Config.WEB_HOST}:{Config.WEB_PORT}")
+            serve(app, host=Config.WEB_HOST, port=Config.WEB_PORT, threads=Config.WEB_THREADS)
     else:
         # Modo desenvolvimento
         print("🔧 Iniciando em modo DESENVOLVIMENTO")
@@ -0,0 +1,99 @@
+"""
+Serialização de listas de pedidos sem consultas N+1
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Pedido, ItemPedido, Cliente, Prato, Acompanhamento, Endereco
+
+
+def opcoes_pedido_completo():
+    """Carrega junto com o pedido todos os relacionamentos usados em to_dict.
+
+    Os itens de todos os pedidos da página vêm em um segundo SELECT (IN).
+    """
+    return (
+        joinedload(Pedido.cliente),
+        joinedload(Pedido.prato),
+        joinedload(Pedido.acompanhamento),
+        joinedload(Pedido.endereco),
+        selectinload(Pedido.itens).options(
+            joinedload(ItemPedido.prato),
+            joinedload(ItemPedido.acompanhamento),
+        ),
+    )
+
+
+def consulta_pedidos_completos(query=None):
+    """Aplica o carregamento antecipado a uma consulta de pedidos"""
+    if query is None:
+        query = Pedido.query
+    return query.options(*opcoes_pedido_completo())
+
+
+def serializar_pedidos(query):
+    """Executa a consulta com um número fixo de SELECTs e converte os pedidos em dicts"""
+    return [pedido.to_dict() for pedido in consulta_pedidos_completos(query)]
+
+
+# Relacionamentos que podem ser projetados com fields=relacao.coluna
+RELACOES_PEDIDO = {
+    'cliente': (Cliente, Pedido.cliente_id),
+    'prato': (Prato, Pedido.prato_id),
+    'acompanhamento': (Acompanhamento, Pedido.acompanhamento_id),
+    'endereco': (Endereco, Pedido.endereco_id),
+}
+
+
+def _campos_disponiveis():
+    campos = {coluna.name: coluna for coluna in Pedido.__table__.columns}
+    for nome, (modelo, _) in RELACOES_PEDIDO.items():
+        for coluna in modelo.__table__.columns:
+            campos[f'{nome}.{coluna.name}'] = coluna
+    return campos
+
+
+def _expandir_campos(campos, disponiveis):
+    """Valida os campos pedidos e expande relações inteiras (ex.: fields=cliente)"""
+    expandidos = []
+    for campo in campos:
+        campo = campo.strip()
+        if not campo:
+            continue
+        if campo in RELACOES_PEDIDO:
+            expandidos.extend(c for c in disponiveis if c.startswith(f'{campo}.'))
+        elif campo in disponiveis:
+            expandidos.append(campo)
+        else:
+            raise ValueError(f'Campo {campo} não existe')
+    if not expandidos:
+        raise ValueError('Informe ao menos um campo')
+    return list(dict.fromkeys(expandidos))
+
+
+def projetar_pedidos(campos, filtros, ordem, limite):
+    """Busca apenas as colunas pedidas, sem carregar objetos do ORM.
+
+    Retorna uma lista de (dict, (created_at, id)) para permitir a paginação.
+    """
+    disponiveis = _campos_disponiveis()
+    campos = _expandir_campos(campos, disponiveis)
+
+    colunas = [disponiveis[campo].label(campo.replace('.', '__')) for campo in campos]
+    query = db.session.query(*colunas, Pedido.created_at, Pedido.id).select_from(Pedido)
+
+    relacoes = {campo.split('.')[0] for campo in campos if '.' in campo}
+    for nome in relacoes:
+        modelo, chave = RELACOES_PEDIDO[nome]
+        query = query.join(modelo, modelo.id == chave)
+
+    resultado = []
+    for linha in query.filter(*filtros).order_by(*ordem).limit(limite):
+        pedido = {}
+        for indice, campo in enumerate(campos):
+            destino = pedido
+            *caminho, nome = campo.split('.')
+            for parte in caminho:
+                destino = destino.setdefault(parte, {})
+            destino[nome] = linha[indice]
+        resultado.append((pedido, (linha[-2], linha[-1])))
+    return resultado
@@ -0,0 +1,165 @@
+"""
+Cálculo da taxa de entrega a partir das regras da tabela taxas_entrega
+
+As regras são compiladas em uma estrutura de consulta: um dicionário de
+bairros normalizados, uma árvore de prefixos de CEP e a lista ordenada
+de trechos do nome do bairro. A estrutura é recarregada quando a tabela
+muda neste processo (commit) e, nos demais workers, após o TTL.
+"""
+
+import re
+import time
+import unicodedata
+from functools import lru_cache
+from sqlalchemy import select
+
+from cache import invalidar_ao_gravar
+from config import Config
+from models import db, TaxaEntrega
+
+TIPOS_TAXA = ('bairro', 'cep', 'contem', 'padrao')
+TAXA_PADRAO = 5.00
+_NAO_DIGITOS = re.compile(r'\D')
+
+# Regras equivalentes ao cálculo fixo usado antes da tabela
+REGRAS_INICIAIS = [
+    ('contem', 'gramacho', 1.00, 10),
+    ('contem', 'centro', 2.00, 20),
+    ('contem', 'parque', 3.00, 30),
+    ('contem', 'vila', 3.00, 30),
+    ('contem', 'jardim', 4.00, 40),
+    ('contem', 'mutua', 4.00, 40),
+    ('padrao', '', TAXA_PADRAO, 100),
+]
+
+
+@lru_cache(maxsize=4096)
+def _normalizar(texto):
+    if not texto.isascii():
+        decomposto = unicodedata.normalize('NFKD', texto)
+        texto = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples ('  Mutuá ' -> 'mutua')"""
+    return _normalizar(texto or '')
+
+
+def digitos_cep(cep):
+    """Apenas os dígitos do CEP ('25000-000' -> '25000000')"""
+    return _NAO_DIGITOS.sub('', cep or '')
+
+
+def normalizar_padrao(tipo, padrao):
+    """Forma canônica do padrão de uma regra, como ele é comparado"""
+    if tipo == 'cep':
+        return digitos_cep(padrao)
+    if tipo == 'padrao':
+        return ''
+    return normalizar(padrao)
+
+
+class TabelaTaxas:
+    """Regras compiladas para consulta; não é alterada depois de montada.
+
+    Ordem de precedência: prefixo de CEP mais longo, nome exato do bairro,
+    primeiro trecho contido no nome (pela prioridade) e, por fim, a taxa
+    padrão.
+    """
+
+    def __init__(self, regras):
+        """regras: (tipo, padrao, valor, prioridade), na ordem de desempate"""
+        self.bairros = {}
+        self.ceps = {}
+        self.trechos = []
+        self.padrao = TAXA_PADRAO
+
+        padrao_definido = False
+        for tipo, padrao, valor, _ in sorted(regras, key=lambda r: r[3]):
+            chave = normalizar_padrao(tipo, padrao)
+            if tipo == 'bairro' and chave:
+                self.bairros.setdefault(chave, valor)
+            elif tipo == 'cep' and chave:
+                no = self.ceps
+                for digito in chave:
+                    no = no.setdefault(digito, {})
+                no.setdefault(None, valor)
+            elif tipo == 'contem' and chave:
+                self.trechos.append((chave, valor))
+            elif tipo == 'padrao' and not padrao_definido:
+                self.padrao = valor
+                padrao_definido = True
+
+    def _por_cep(self, cep):
+        valor = None
+        no = self.ceps
+        for digito in digitos_cep(cep):
+            no = no.get(digito)
+            if no is None:
+                break
+            valor = no.get(None, valor)
+        return valor
+
+    def calcular(self, bairro, cep=None):
+        """Taxa de entrega para o bairro/CEP informados"""
+        if cep and self.ceps:
+            valor = self._por_cep(cep)
+            if valor is not None:
+                return valor
+
+        nome = normalizar(bairro)
+        if not nome:
+            return self.padrao
+
+        valor = self.bairros.get(nome)
+        if valor is not None:
+            return valor
+
+        for trecho, valor in self.trechos:
+            if trecho in nome:
+                return valor
+        return self.padrao
+
+
+def carregar_tabela():
+    """Compila as regras ativas do banco"""
+    linhas = db.session.execute(
+        select(TaxaEntrega.tipo, TaxaEntrega.padrao, TaxaEntrega.valor, TaxaEntrega.prioridade)
+        .where(TaxaEntrega.ativo.is_(True))
+        .order_by(TaxaEntrega.prioridade, TaxaEntrega.id)
+    ).all()
+    return TabelaTaxas(linhas)
+
+
+class MotorTaxas:
+    """Mantém a tabela compilada e a recarrega quando fica desatualizada"""
+
+    def __init__(self, ttl, carregar=carregar_tabela):
+        self.ttl = ttl
+        self._carregar = carregar
+        self._versao = 0
+        self._atual = None  # (tabela, versao, carregada_em)
+
+    def tabela(self):
+        atual = self._atual
+        if atual is not None and atual[1] == self._versao and \
+                time.monotonic() - atual[2] < self.ttl:
+            return atual[0]
+
+        # Uma invalidação durante a carga muda a versão e força outra carga
+        versao = self._versao
+        tabela = self._carregar()
+        self._atual = (tabela, versao, time.monotonic())
+        return tabela
+
+    def invalidar(self):
+        """Descarta a tabela compilada (chamado no commit de uma regra)"""
+        self._versao += 1
+
+    def calcular(self, bairro, cep=None):
+        return self.tabela().calcular(bairro, cep)
+
+
+motor_taxas = MotorTaxas(Config.TAXAS_RECARGA_TTL)
+invalidar_ao_gravar(motor_taxas, TaxaEntrega)
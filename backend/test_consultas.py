@@ -0,0 +1,1065 @@
+#!/usr/bin/env python3
+"""
+Testes das consultas da API da Garagem do Lanche
+
+Executados em processo, com banco SQLite em memória (não precisam do servidor).
+"""
+
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import pstats
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+from sqlalchemy import event, select, text
+from werkzeug.security import generate_password_hash
+
+import autenticacao
+from app import create_app
+from database import init_database, calcular_taxa_entrega
+from models import db, Cliente, Endereco, ClienteEndereco, Pedido, ItemPedido, MovimentacaoCaixa, ResumoDiario
+from models import HistoricoStatus, Prato, Usuario
+from idempotencia import cache_idempotencia
+from cache import CacheLRU
+from config import Config
+from models import StatusPedido, FormaPagamento
+from migracoes import aplicar_migracoes
+from resumo import reconstruir_resumo_diario, hoje_local, inicio_dia_utc
+from analises import tempos_por_etapa
+from arquivo import arquivar
+from eventos import barramento_pedidos
+from routes.export import _marcar_interrupcao
+from routes.pedidos import LIMITE_LOTE
+from routes.admin import cache_dashboard
+from autenticacao import gerar_token, verificar_senha, LoginSobrecarregado
+
+
+def criar_app_teste():
+    """Cria a aplicação com um banco em memória já inicializado"""
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True})
+    init_database(app)
+    return app
+
+
+@contextmanager
+def contar_consultas(app):
+    """Conta os comandos SQL executados dentro do bloco"""
+    consultas = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', registrar)
+
+
+def inserir_pedidos(app, quantidade, status=StatusPedido.ACEITO):
+    """Insere pedidos com cliente e endereço próprios"""
+    with app.app_context():
+        inicio = Pedido.query.count()
+        for i in range(inicio, inicio + quantidade):
+            cliente = Cliente(nome=f'Cliente {i}', telefone=f'(21) 9{i:08d}')
+            endereco = Endereco(rua='Rua Teste', numero=str(i), bairro='Centro', taxa_entrega=2.00)
+            db.session.add_all([cliente, endereco])
+            db.session.flush()
+            pedido = Pedido(
+                cliente_id=cliente.id,
+                prato_id=(i % 9) + 1,
+                acompanhamento_id=(i % 4) + 1,
+                endereco_id=endereco.id,
+                forma_pagamento=FormaPagamento.PIX,
+                valor_prato=15.00,
+                taxa_entrega=2.00,
+                valor_total=17.00,
+                status=status
+            )
+            pedido.itens = [
+                ItemPedido(prato_id=(i % 9) + 1, acompanhamento_id=(i % 4) + 1,
+                           quantidade=1, preco_unitario=7.50, subtotal=7.50),
+                ItemPedido(prato_id=((i + 1) % 9) + 1, acompanhamento_id=1,
+                           quantidade=1, preco_unitario=7.50, subtotal=7.50),
+            ]
+            db.session.add(pedido)
+        db.session.commit()
+
+
+def test_listagem_pedidos_consultas_constantes():
+    """A listagem de pedidos não pode fazer uma consulta por pedido"""
+    print("\n📋 Testando número de consultas da listagem de pedidos...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    contagens = {}
+    inseridos = 0
+    for total in (1, 10, 50):
+        inserir_pedidos(app, total - inseridos)
+        inseridos = total
+        with contar_consultas(app) as consultas:
+            response = client.get('/api/pedidos')
+        assert response.status_code == 200
+        pedidos = response.get_json()['pedidos']
+        assert len(pedidos) == total
+        assert all(len(pedido['itens']) == 2 for pedido in pedidos)
+        contagens[total] = len(consultas)
+
+    print(f"Consultas por tamanho da lista: {contagens}")
+    assert len(set(contagens.values())) == 1, contagens
+
+
+def test_listagem_pedidos_paginada():
+    """next_cursor percorre todos os pedidos, mesmo com created_at repetido"""
+    print("\n📑 Testando paginação e projeção da listagem de pedidos...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    inserir_pedidos(app, 12)
+    with app.app_context():
+        # Metade dos pedidos no mesmo instante: o desempate é pelo id
+        mesmo_instante = datetime(2025, 1, 10, 12, 0, 0)
+        for pedido in Pedido.query.all():
+            pedido.created_at = mesmo_instante if pedido.id % 2 else mesmo_instante - timedelta(minutes=pedido.id)
+        db.session.commit()
+        esperados = [
+            pedido.id for pedido in
+            Pedido.query.order_by(Pedido.created_at.desc(), Pedido.id.desc())
+        ]
+
+    vistos = []
+    paginas = 0
+    parametros = {'limite': 5}
+    while True:
+        response = client.get('/api/pedidos', query_string=parametros)
+        assert response.status_code == 200
+        dados = response.get_json()
+        assert len(dados['pedidos']) <= 5
+        vistos.extend(pedido['id'] for pedido in dados['pedidos'])
+        paginas += 1
+        if dados['next_cursor'] is None:
+            break
+        parametros = {'limite': 5, 'cursor': dados['next_cursor']}
+
+    print(f"Páginas: {paginas}, pedidos: {len(vistos)}")
+    assert paginas == 3
+    assert vistos == esperados
+
+    # Projeção: só as chaves pedidas, com a mesma paginação
+    response = client.get('/api/pedidos', query_string={'fields': 'id,status,endereco.bairro', 'limite': 5})
+    dados = response.get_json()
+    assert response.status_code == 200 and dados['next_cursor'] is not None
+    assert [pedido['id'] for pedido in dados['pedidos']] == esperados[:5]
+    for pedido in dados['pedidos']:
+        assert set(pedido) == {'id', 'status', 'endereco'}
+        assert pedido['endereco'] == {'bairro': 'Centro'}
+    seguinte = client.get('/api/pedidos', query_string={
+        'fields': 'id', 'limite': 5, 'cursor': dados['next_cursor']
+    }).get_json()
+    assert [pedido['id'] for pedido in seguinte['pedidos']] == esperados[5:10]
+
+    for invalidos in ({'cursor': 'nao-e-cursor'}, {'limite': '0'}, {'limite': 'abc'},
+                      {'fields': 'id,senha'}, {'fields': ','}):
+        assert client.get('/api/pedidos', query_string=invalidos).status_code == 400, invalidos
+
+
+def test_cozinha_consultas_constantes():
+    """O painel da cozinha não pode fazer uma consulta por pedido"""
+    print("\n🍳 Testando número de consultas do painel da cozinha...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    inserir_pedidos(app, 5)
+    with contar_consultas(app) as poucos:
+        client.get('/api/pedidos/cozinha')
+
+    inserir_pedidos(app, 40, status=StatusPedido.PREPARO)
+    with contar_consultas(app) as muitos:
+        response = client.get('/api/pedidos/cozinha')
+
+    assert len(response.get_json()['pedidos']) == 45
+    print(f"Consultas: 5 pedidos = {len(poucos)}, 45 pedidos = {len(muitos)}")
+    assert len(poucos) == len(muitos)
+
+
+def plano_consulta(stmt):
+    """Retorna o EXPLAIN QUERY PLAN do SQLite para a consulta"""
+    sql = stmt.compile(db.engine, compile_kwargs={'literal_binds': True})
+    linhas = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+    return ' | '.join(linha[-1] for linha in linhas)
+
+
+def test_consultas_quentes_usam_indices():
+    """Cada consulta frequente precisa usar o seu índice"""
+    print("\n🗂️  Testando planos das consultas frequentes...")
+    app = criar_app_teste()
+    agora = datetime.utcnow()
+    ontem = agora - timedelta(days=1)
+
+    consultas = {
+        'ix_pedidos_status_created_at': select(Pedido.id).where(
+            Pedido.status.in_([StatusPedido.ACEITO, StatusPedido.PREPARO])
+        ).order_by(Pedido.created_at.asc()),
+        'ix_pedidos_created_at': select(Pedido.id).where(
+            Pedido.created_at >= ontem
+        ).order_by(Pedido.created_at.desc(), Pedido.id.desc()),
+        'ix_movimentacoes_caixa_tipo_created_at': select(MovimentacaoCaixa.valor).where(
+            MovimentacaoCaixa.tipo == 'entrada',
+            MovimentacaoCaixa.created_at >= ontem,
+            MovimentacaoCaixa.created_at <= agora
+        ),
+        'ix_movimentacoes_caixa_created_at': select(MovimentacaoCaixa.id).where(
+            MovimentacaoCaixa.created_at >= ontem
+        ).order_by(MovimentacaoCaixa.created_at.desc()),
+        'ix_clientes_telefone': select(Cliente.id).where(Cliente.telefone == '(21) 99999-9999'),
+    }
+
+    with app.app_context():
+        for indice, stmt in consultas.items():
+            plano = plano_consulta(stmt)
+            print(f"{indice}: {plano}")
+            assert indice in plano, plano
+
+
+def test_migracao_cria_indices_em_banco_existente():
+    """Bancos criados antes dos índices recebem os índices pela migração"""
+    print("\n🔧 Testando migração de índices...")
+    app = criar_app_teste()
+
+    with app.app_context():
+        # Simula um banco antigo: sem índices e sem migrações registradas
+        for tabela in (Cliente, Pedido, MovimentacaoCaixa):
+            for indice in tabela.__table__.indexes:
+                db.session.execute(text(f'DROP INDEX {indice.name}'))
+        db.session.execute(text('DROP TABLE schema_migracoes'))
+        db.session.commit()
+
+        aplicar_migracoes(db.engine)
+
+        existentes = {
+            linha[0] for linha in db.session.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index'")
+            )
+        }
+        assert 'ix_clientes_telefone' in existentes
+        assert 'ix_pedidos_status_created_at' in existentes
+        assert 'ix_movimentacoes_caixa_tipo_created_at' in existentes
+
+        # Rodar de novo não faz nada
+        assert aplicar_migracoes(db.engine) == []
+
+
+def test_pragmas_sqlite_em_cada_conexao():
+    """As conexões de um banco em arquivo saem com WAL e o busy_timeout configurado"""
+    print("\n⚙️  Testando PRAGMAs do SQLite...")
+    caminho = os.path.join(tempfile.mkdtemp(), 'pragmas.db')
+    pragmas = {**Config.SQLITE_PRAGMAS, 'busy_timeout': 1234}
+    app = create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}', 'TESTING': True,
+                      'SQLITE_PRAGMAS': pragmas})
+
+    with app.app_context():
+        with db.engine.connect() as conn:
+            valores = {
+                nome: conn.exec_driver_sql(f'PRAGMA {nome}').scalar()
+                for nome in ('journal_mode', 'busy_timeout', 'synchronous')
+            }
+    print(f"PRAGMAs: {valores}")
+    assert valores['journal_mode'] == 'wal'
+    assert valores['busy_timeout'] == 1234
+    assert valores['synchronous'] == 1  # NORMAL
+
+
+def test_resumo_diario_acompanha_movimentacoes():
+    """O resumo incremental precisa bater com o recalculado do zero"""
+    print("\n📊 Testando resumo diário do caixa...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    pedido = {
+        'nome': 'Cliente Resumo', 'telefone': '(21) 98888-0000', 'rua': 'Rua A',
+        'numero': '1', 'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1
+    }
+    for forma in ('Pix', 'Pix', 'Dinheiro'):
+        assert client.post('/api/pedidos', json={**pedido, 'forma_pagamento': forma}).status_code == 201
+    client.post('/api/caixa/movimentacao', json={'tipo': 'fiado', 'valor': 12.5})
+    client.post('/api/caixa/movimentacao', json={'tipo': 'saida', 'valor': 4})
+
+    # 22h locais ainda são hoje no caixa (no UTC já é o dia seguinte); 23h59 de ontem não
+    inicio_hoje = inicio_dia_utc(hoje_local())
+    with app.app_context():
+        db.session.add_all([
+            MovimentacaoCaixa(tipo='entrada', valor=5.0, created_at=inicio_hoje + timedelta(hours=22)),
+            MovimentacaoCaixa(tipo='entrada', valor=7.0, created_at=inicio_hoje - timedelta(minutes=1))
+        ])
+        db.session.commit()
+
+    def linhas_resumo():
+        return sorted(
+            (r.data, r.tipo, r.forma_pagamento, round(r.total, 2), r.quantidade)
+            for r in ResumoDiario.query.all()
+        )
+
+    with app.app_context():
+        incremental = linhas_resumo()
+        with db.engine.begin() as conn:
+            reconstruir_resumo_diario(conn)
+        db.session.expire_all()
+        assert incremental == linhas_resumo(), incremental
+        ontem = ResumoDiario.query.filter_by(data=hoje_local() - timedelta(days=1)).one()
+        assert ontem.total == 7.0
+
+    dashboard = client.get('/api/caixa/dashboard').get_json()['dashboard']
+    print(f"Dashboard: {dashboard}")
+    assert dashboard['vendas_hoje'] == 17.00 * 2 + 17.00 + 5.0
+    assert dashboard['fiados_pendentes'] == 12.5
+
+
+def test_taxa_entrega_por_regras():
+    """Taxas vêm da tabela, ignoram acentos e mudam sem reiniciar"""
+    print("\n🛵 Testando regras de taxa de entrega...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    def taxa(bairro, cep=None):
+        return client.get('/api/taxa-entrega', query_string={'bairro': bairro, 'cep': cep}) \
+            .get_json()['taxa_entrega']
+
+    assert taxa('Mutuá') == taxa('MUTUA') == 4.00
+    assert taxa('Vila Nova') == 3.00
+    assert taxa('Bairro Novo') == 5.00
+
+    client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+    nova = client.post('/api/admin/taxas', json={'tipo': 'cep', 'padrao': '25070', 'valor': 6.5})
+    assert nova.status_code == 201
+    assert taxa('Bairro Novo', '25070-120') == 6.50
+    assert taxa('Bairro Novo', '25080-000') == 5.00
+
+    client.delete(f"/api/admin/taxas/{nova.get_json()['taxa']['id']}")
+    assert taxa('Bairro Novo', '25070-120') == 5.00
+
+
+def test_pedido_idempotente():
+    """Repetir um POST com a mesma Idempotency-Key não grava nada de novo"""
+    print("\n🔁 Testando Idempotency-Key na criação de pedidos...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    pedido = {
+        'nome': 'Cliente Repetido', 'telefone': '(21) 97777-0000', 'rua': 'Rua B',
+        'numero': '2', 'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1,
+        'forma_pagamento': 'Pix'
+    }
+    cabecalho = {'Idempotency-Key': 'pedido-teste-1'}
+    original = client.post('/api/pedidos', json=pedido, headers=cabecalho)
+    assert original.status_code == 201
+
+    # Do cache do processo e, simulando outro worker, do banco
+    for limpar_cache in (False, True):
+        if limpar_cache:
+            cache_idempotencia.invalidar()
+        with contar_consultas(app) as consultas:
+            repetido = client.post('/api/pedidos', json=pedido, headers=cabecalho)
+        assert repetido.status_code == 201
+        assert repetido.get_json() == original.get_json()
+        assert repetido.headers['Idempotent-Replayed'] == 'true'
+        escritas = [sql for sql in consultas if not sql.lstrip().upper().startswith('SELECT')]
+        assert escritas == [], escritas
+
+    outro = client.post('/api/pedidos', json={**pedido, 'numero': '3'}, headers=cabecalho)
+    assert outro.status_code == 422
+
+    with app.app_context():
+        assert Pedido.query.count() == 1
+        assert MovimentacaoCaixa.query.count() == 1
+
+    # Ids enviados como texto continuam aceitos, como antes dos itens
+    texto = client.post('/api/pedidos', json={**pedido, 'prato_id': '2', 'acompanhamento_id': '1'})
+    assert texto.status_code == 201 and texto.get_json()['pedido']['prato']['id'] == 2
+    assert client.post('/api/pedidos', json={**pedido, 'prato_id': 'x'}).status_code == 400
+    lote = client.post('/api/pedidos/batch', json={'pedidos': [{**pedido, 'prato_id': '3'}]})
+    assert lote.status_code == 201 and lote.get_json()['criados'] == 1
+
+    # Ainda no cache do processo, a chave expira com a retenção contada da gravação
+    retencao = Config.IDEMPOTENCIA_RETENCAO
+    Config.IDEMPOTENCIA_RETENCAO = 0
+    try:
+        expirada = client.post('/api/pedidos', json={**pedido, 'numero': '3'}, headers=cabecalho)
+    finally:
+        Config.IDEMPOTENCIA_RETENCAO = retencao
+    assert expirada.status_code == 201 and 'Idempotent-Replayed' not in expirada.headers
+    assert expirada.get_json()['pedido']['id'] != original.get_json()['pedido']['id']
+
+
+def test_pedido_com_itens():
+    """Pedido com vários itens soma os subtotais e gera uma única entrada no caixa"""
+    print("\n🍔 Testando pedido com itens...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    pedido = {
+        'nome': 'Cliente Com Fome', 'telefone': '(21) 94444-0000', 'rua': 'Rua C',
+        'numero': '3', 'bairro': 'Centro', 'forma_pagamento': 'Dinheiro',
+        'itens': [
+            {'prato_id': 1, 'acompanhamento_id': 1, 'quantidade': 2},
+            {'prato_id': 2, 'acompanhamento_id': 2}
+        ]
+    }
+    response = client.post('/api/pedidos', json=pedido)
+    assert response.status_code == 201
+    criado = response.get_json()['pedido']
+
+    with app.app_context():
+        taxa = calcular_taxa_entrega('Centro')
+        movimentacoes = MovimentacaoCaixa.query.all()
+    itens = {item['prato']['id']: item for item in criado['itens']}
+    print(f"Itens: {[(i['prato']['nome'], i['quantidade'], i['subtotal']) for i in criado['itens']]}")
+    assert itens[1]['quantidade'] == 2 and itens[1]['subtotal'] == 30.00
+    assert itens[2]['quantidade'] == 1 and itens[2]['subtotal'] == 18.00
+    assert criado['valor_prato'] == sum(item['subtotal'] for item in criado['itens']) == 48.00
+    assert criado['taxa_entrega'] == taxa
+    assert criado['valor_total'] == criado['valor_prato'] + taxa
+    assert len(movimentacoes) == 1 and movimentacoes[0].valor == criado['valor_total']
+
+    item = {'prato_id': 1, 'acompanhamento_id': 1}
+    invalidos = [
+        [],
+        [item] * 31,
+        [{**item, 'quantidade': 0}],
+        [{**item, 'quantidade': 51}],
+        [{**item, 'quantidade': 2.0}],
+        [{**item, 'prato_id': 999}]
+    ]
+    for itens_invalidos in invalidos:
+        response = client.post('/api/pedidos', json={**pedido, 'itens': itens_invalidos})
+        assert response.status_code == 400, (itens_invalidos[:1], response.get_json())
+
+    with app.app_context():
+        assert Pedido.query.count() == 1
+        assert MovimentacaoCaixa.query.count() == 1
+
+
+def test_pedidos_em_lote_parcial():
+    """Um pedido inválido no lote é recusado sem impedir os demais"""
+    print("\n📦 Testando lote com pedidos inválidos...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    pedido = {
+        'nome': 'Cliente Lote', 'telefone': '(21) 93333-0000', 'rua': 'Rua D',
+        'numero': '4', 'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1,
+        'forma_pagamento': 'Pix'
+    }
+    lote = [
+        {**pedido, 'numero': '1'},
+        {**pedido, 'prato_id': 999},
+        {**pedido, 'numero': '3', 'telefone': '(21) 93333-0003'},
+        'não é um pedido',
+        {**pedido, 'numero': '5'}
+    ]
+    response = client.post('/api/pedidos/batch', json={'pedidos': lote})
+    assert response.status_code == 201
+    dados = response.get_json()
+    assert dados['criados'] == 3 and dados['recusados'] == 2
+
+    resultados = dados['resultados']
+    assert [r['indice'] for r in resultados] == list(range(len(lote)))
+    assert [r['success'] for r in resultados] == [True, False, True, False, True]
+    ids = [r['pedido']['id'] for r in resultados if r['success']]
+    assert ids == sorted(ids)
+    assert [r['pedido']['endereco']['numero'] for r in resultados if r['success']] == ['1', '3', '5']
+
+    with app.app_context():
+        assert Pedido.query.count() == 3
+        assert MovimentacaoCaixa.query.count() == 3
+
+    grande = client.post('/api/pedidos/batch', json={'pedidos': [pedido] * (LIMITE_LOTE + 1)})
+    assert grande.status_code == 400
+    for corpo in ({}, {'pedidos': []}, {'pedidos': pedido}, {'pedidos': 'x'}):
+        assert client.post('/api/pedidos/batch', json=corpo).status_code == 400, corpo
+
+    with app.app_context():
+        assert Pedido.query.count() == 3
+
+
+def test_enderecos_deduplicados():
+    """Pedidos no mesmo endereço reaproveitam um único registro"""
+    print("\n🏠 Testando deduplicação de endereços...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    pedido = {
+        'nome': 'Cliente Fiel', 'telefone': '(21) 96666-0000', 'rua': 'Rua das Flores',
+        'numero': '10', 'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1,
+        'forma_pagamento': 'Pix'
+    }
+    for variacao in ({}, {'rua': ' rua das  flores '}, {'numero': '12'}):
+        assert client.post('/api/pedidos', json={**pedido, **variacao}).status_code == 201
+    lote = client.post('/api/pedidos/batch', json={'pedidos': [pedido, {**pedido, 'telefone': '(21) 95555-0000'}]})
+    assert lote.status_code == 201
+
+    with app.app_context():
+        assert Endereco.query.count() == 2
+        assert ClienteEndereco.query.count() == 3
+
+    consulta = {'telefone': pedido['telefone']}
+    assert client.get('/api/clientes/enderecos', query_string=consulta).status_code == 401
+    client.post('/api/admin/login', json={'username': 'cozinha', 'password': 'garagem2025'})
+    salvos = client.get('/api/clientes/enderecos', query_string=consulta).get_json()
+    print(f"Endereços salvos: {[e['numero'] for e in salvos['enderecos']]}")
+    assert [e['numero'] for e in salvos['enderecos']] == ['10', '12']
+
+
+def test_migracao_deduplica_enderecos():
+    """A migração une endereços repetidos de bancos antigos"""
+    print("\n🔧 Testando migração de endereços...")
+    app = criar_app_teste()
+    inserir_pedidos(app, 3)
+
+    with app.app_context():
+        # Simula um banco antigo: um endereço por pedido, sem hash
+        db.session.execute(text('DROP INDEX ix_enderecos_hash'))
+        db.session.execute(text("UPDATE enderecos SET numero = '1', hash = NULL"))
+        db.session.execute(text('DELETE FROM clientes_enderecos'))
+        db.session.execute(text('DELETE FROM schema_migracoes WHERE versao = 4'))
+        db.session.commit()
+
+        assert aplicar_migracoes(db.engine) == [4]
+
+        assert Endereco.query.count() == 1
+        endereco_id = Endereco.query.one().id
+        assert {p.endereco_id for p in Pedido.query} == {endereco_id}
+        assert ClienteEndereco.query.count() == 3
+
+
+def test_dashboard_admin_em_cache():
+    """O dashboard faz duas consultas e, dentro do TTL, nenhuma"""
+    print("\n📈 Testando dashboard administrativo e o seu cache...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    inserir_pedidos(app, 6)
+    inserir_pedidos(app, 3, status=StatusPedido.PREPARO)
+    pedido = {
+        'nome': 'Cliente Dashboard', 'telefone': '(21) 92222-0000', 'rua': 'Rua E',
+        'numero': '5', 'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1,
+        'forma_pagamento': 'Pix'
+    }
+    assert client.post('/api/pedidos', json=pedido).status_code == 201
+    assert client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'}).status_code == 200
+
+    # A primeira chamada também carrega as permissões do usuário no cache
+    client.get('/api/admin/dashboard')
+    cache_dashboard.invalidar()
+    with contar_consultas(app) as calculo:
+        dashboard = client.get('/api/admin/dashboard').get_json()['dashboard']
+    with contar_consultas(app) as em_cache:
+        repetido = client.get('/api/admin/dashboard').get_json()['dashboard']
+    print(f"Consultas: cálculo = {len(calculo)}, dentro do TTL = {len(em_cache)}")
+    assert len(calculo) == 2, calculo
+    assert em_cache == [] and repetido == dashboard
+
+    with app.app_context():
+        assert dashboard['total_pedidos'] == Pedido.query.count() == 10
+        assert dashboard['pedidos_por_status'] == {
+            status.value: Pedido.query.filter_by(status=status).count() for status in StatusPedido
+        }
+        assert dashboard['total_pratos'] == Prato.query.filter_by(ativo=True).count()
+        assert dashboard['total_usuarios'] == Usuario.query.filter_by(ativo=True).count()
+        assert dashboard['receita_total'] == sum(
+            m.valor for m in MovimentacaoCaixa.query.filter_by(tipo='entrada')
+        )
+
+    # Uma escrita invalida o cache antes do TTL
+    assert client.post('/api/pedidos', json={**pedido, 'numero': '6'}).status_code == 201
+    atualizado = client.get('/api/admin/dashboard').get_json()['dashboard']
+    assert atualizado['total_pedidos'] == 11
+    assert atualizado['pedidos_por_status']['aceito'] == dashboard['pedidos_por_status']['aceito'] + 1
+
+
+def test_tokens_admin_logout_expiracao_e_rajada():
+    """Logout revoga o Bearer, token expirado é recusado e rajadas de login recebem 429"""
+    print("\n🔑 Testando tokens administrativos...")
+    app = criar_app_teste()
+    client = app.test_client()
+
+    def dashboard(token):
+        return app.test_client().get('/api/admin/dashboard', headers={'Authorization': f'Bearer {token}'})
+
+    credenciais = {'username': 'admin', 'password': 'admin123'}
+    token = client.post('/api/admin/login', json=credenciais).get_json()['token']
+    assert dashboard(token).status_code == 200
+
+    # Logout pelo próprio Bearer: o token deixa de valer antes de expirar
+    saida = app.test_client().post('/api/admin/logout', headers={'Authorization': f'Bearer {token}'})
+    assert saida.status_code == 200
+    assert dashboard(token).status_code == 401
+    assert client.get('/api/admin/dashboard').status_code == 401
+    novo = client.post('/api/admin/login', json=credenciais).get_json()['token']
+    assert dashboard(novo).status_code == 200
+
+    # Assinado há mais de TOKEN_VALIDADE segundos
+    with app.app_context():
+        usuario = Usuario.query.filter_by(username='admin').one()
+        emitido_em = time.time() - app.config['TOKEN_VALIDADE'] - 60
+        with mock.patch('time.time', return_value=emitido_em):
+            expirado = gerar_token(usuario.id, usuario.tipo.value, usuario.versao_token)
+    assert dashboard(expirado).status_code == 401
+
+    # Sem vagas para verificar a senha, o login é recusado na hora
+    vagas = 0
+    while autenticacao._vagas_login.acquire(blocking=False):
+        vagas += 1
+    try:
+        recusado = client.post('/api/admin/login', json=credenciais)
+    finally:
+        for _ in range(vagas):
+            autenticacao._vagas_login.release()
+    assert recusado.status_code == 429 and recusado.headers['Retry-After'] == '1'
+
+    # Rajada real acima de LOGIN_MAX_CONCORRENTES (mais a fila)
+    senha_hash = generate_password_hash('admin123')
+    total = Config.LOGIN_MAX_CONCORRENTES * 10
+    largada = threading.Barrier(total)
+    resultados = []
+
+    def tentar():
+        largada.wait()
+        try:
+            resultados.append(verificar_senha(senha_hash, 'admin123'))
+        except LoginSobrecarregado:
+            resultados.append('429')
+
+    threads = [threading.Thread(target=tentar) for _ in range(total)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"Rajada de {total} logins: {resultados.count(True)} verificados, {resultados.count('429')} recusados")
+    assert resultados.count('429') > 0 and resultados.count(True) > 0
+    assert verificar_senha(senha_hash, 'admin123') is True
+
+    # O cache é do processo: os próximos testes usam outro banco, com a versão inicial
+    autenticacao.cache_autorizacao.invalidar()
+
+
+def test_status_transicoes_e_versao():
+    """Status só avança pelo grafo e uma versão velha recebe 409"""
+    print("\n🚦 Testando transições de status...")
+    app = criar_app_teste()
+    client = app.test_client()
+    inserir_pedidos(app, 1)
+
+    def mudar(status, versao=None):
+        corpo = {'status': status} if versao is None else {'status': status, 'versao': versao}
+        return client.put('/api/pedidos/1/status', json=corpo)
+
+    assert mudar('entrega').status_code == 409
+    assert mudar('preparo', versao='x').status_code == 400
+    assert mudar('preparo', versao='1').status_code == 200
+
+    # Duas telas leram a versão 1: a segunda não volta o pedido nem sobrescreve
+    conflito = mudar('entrega', versao=1)
+    assert conflito.status_code == 409
+    assert conflito.get_json()['pedido']['versao'] == 2
+
+    assert mudar('entrega', versao=2).status_code == 200
+    assert mudar('preparo').status_code == 409
+    assert mudar('cancelado').status_code == 200
+
+    with app.app_context():
+        historico = [
+            (h.status_anterior.value, h.status_novo.value)
+            for h in HistoricoStatus.query.order_by(HistoricoStatus.id)
+        ]
+        assert historico == [('aceito', 'preparo'), ('preparo', 'entrega'), ('entrega', 'cancelado')]
+        assert Pedido.query.get(1).versao == 4
+
+    # Pedido finalizado não é cancelado; pedido antigo sem status recebe 409, não 500
+    inserir_pedidos(app, 2, status=StatusPedido.FINALIZADO)
+    assert client.put('/api/pedidos/2/status', json={'status': 'cancelado'}).status_code == 409
+    with app.app_context():
+        db.session.execute(text('UPDATE pedidos SET status = NULL WHERE id = 3'))
+        db.session.commit()
+    assert client.put('/api/pedidos/3/status', json={'status': 'preparo'}).status_code == 409
+
+
+def test_cache_lru_ignora_carga_invalidada():
+    """Um valor carregado antes de uma invalidação não fica no cache"""
+    cache = CacheLRU(10, 300)
+
+    def carregar_e_invalidar():
+        cache.invalidar(1)  # ex.: usuário desativado enquanto a consulta rodava
+        return 'admin'
+
+    assert cache.obter(1, carregar_e_invalidar) == 'admin'
+    assert cache.obter(1, lambda: 'cozinha') == 'cozinha'
+    assert cache.obter(1, lambda: 'outro') == 'cozinha'
+
+
+def test_tempos_por_etapa():
+    """p50/p90 do preparo vêm das transições; cancelamentos ficam de fora"""
+    print("\n⏱️ Testando tempos por etapa...")
+    app = criar_app_teste()
+    inserir_pedidos(app, 5)
+
+    with app.app_context():
+        base = datetime(2026, 1, 5, 12, 0)
+        preparo = [60, 120, 180, 600, 30]
+        for pedido_id, segundos in enumerate(preparo, start=1):
+            passos = [
+                (None, StatusPedido.ACEITO, 0),
+                (StatusPedido.ACEITO, StatusPedido.PREPARO, 300),
+                (StatusPedido.PREPARO, StatusPedido.ENTREGA, 300 + segundos),
+                (StatusPedido.ENTREGA, StatusPedido.FINALIZADO, 900 + segundos),
+            ]
+            if pedido_id == 5:
+                # Cancelado no preparo: nenhuma etapa de preparo ou entrega
+                passos = passos[:2] + [(StatusPedido.PREPARO, StatusPedido.CANCELADO, 330)]
+            db.session.add_all(
+                HistoricoStatus(pedido_id=pedido_id, status_anterior=de, status_novo=para,
+                                created_at=base + timedelta(seconds=depois))
+                for de, para, depois in passos
+            )
+        db.session.commit()
+
+        grupos = tempos_por_etapa('bairro', base - timedelta(days=1), datetime.utcnow() + timedelta(days=1))
+        assert [grupo['bairro'] for grupo in grupos] == ['Centro']
+        etapas = grupos[0]['etapas']
+        assert etapas['espera'] == {'quantidade': 5, 'media_s': 300.0, 'p50_s': 300.0, 'p90_s': 300.0}
+        assert etapas['preparo'] == {'quantidade': 4, 'media_s': 240.0, 'p50_s': 120.0, 'p90_s': 600.0}
+        assert etapas['entrega']['quantidade'] == 4 and etapas['entrega']['p90_s'] == 600.0
+
+        por_hora = tempos_por_etapa('hora', base - timedelta(days=1), datetime.utcnow() + timedelta(days=1), -3)
+        assert [grupo['hora'] for grupo in por_hora] == [9]
+
+        por_prato = tempos_por_etapa('prato', base - timedelta(days=1), datetime.utcnow() + timedelta(days=1))
+        assert len(por_prato) > 1
+        # Cada pedido tem dois pratos diferentes e conta em ambos
+        assert sum(
+            grupo['etapas'].get('preparo', {}).get('quantidade', 0) for grupo in por_prato
+        ) == 8
+
+
+def test_exportacao_em_stream():
+    """Exportação devolve todas as linhas do período, em CSV ou NDJSON compactado"""
+    print("\n📤 Testando exportação em stream...")
+    app = criar_app_teste()
+    client = app.test_client()
+    inserir_pedidos(app, 2100)
+
+    assert client.get('/api/export/pedidos').status_code == 401
+    client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+
+    with contar_consultas(app) as consultas:
+        resposta = client.get('/api/export/pedidos')
+        linhas = list(csv.DictReader(io.StringIO(resposta.get_data(as_text=True))))
+    assert resposta.status_code == 200
+    assert len(linhas) == 2100 and linhas[0]['status'] == 'aceito'
+    assert len([c for c in consultas if 'FROM pedidos' in c]) == 1
+
+    with app.app_context():
+        limite = Pedido.query.get(1000).created_at.isoformat()
+    resposta = client.get(f'/api/export/pedidos?formato=ndjson&gzip=1&data_fim={limite}')
+    assert resposta.mimetype == 'application/gzip'
+    registros = [json.loads(linha) for linha in gzip.decompress(resposta.data).decode('utf-8').splitlines()]
+    assert [r['id'] for r in registros] == list(range(1, 1001))
+
+    assert client.get('/api/export/pedidos?formato=xml').status_code == 400
+    assert client.get('/api/export/clientes').status_code == 404
+
+    # Uma falha no meio termina o arquivo com um registro de erro e repassa a exceção
+    def falhar_no_meio():
+        yield '{"id": 1}\n'
+        raise RuntimeError('conexão com o banco perdida')
+
+    recebidos = []
+    try:
+        for bloco in _marcar_interrupcao(falhar_no_meio(), 'pedidos', 'ndjson'):
+            recebidos.append(bloco)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError('a exceção deveria chegar ao servidor')
+    assert json.loads(recebidos[-1]) == {'erro': 'Exportação interrompida - arquivo incompleto'}
+
+
+def test_arquivamento_mantem_relatorios():
+    """Pedidos encerrados antigos saem das tabelas quentes e continuam nos relatórios"""
+    print("\n🗄️ Testando arquivamento de pedidos...")
+    app = criar_app_teste()
+    client = app.test_client()
+    inserir_pedidos(app, 10)
+    antigo = datetime.utcnow() - timedelta(days=200)
+
+    with app.app_context():
+        for pedido in Pedido.query.all():
+            if pedido.id <= 6:
+                pedido.status = StatusPedido.FINALIZADO
+                pedido.created_at = antigo + timedelta(hours=pedido.id)
+            db.session.add(MovimentacaoCaixa(pedido_id=pedido.id, tipo='entrada', valor=17.0,
+                                             created_at=pedido.created_at))
+        db.session.add(MovimentacaoCaixa(tipo='saida', valor=5.0, created_at=antigo))
+        db.session.add(MovimentacaoCaixa(tipo='saida', valor=1.0))
+        db.session.commit()
+
+        registro = arquivar(90, lote=4)
+        assert (registro.pedidos, registro.movimentacoes) == (6, 7)
+        assert Pedido.query.count() == 4 and ItemPedido.query.count() == 8
+        assert MovimentacaoCaixa.query.count() == 5
+
+    historico = client.get('/api/caixa/relatorio', query_string={
+        'data_inicio': (antigo - timedelta(days=1)).isoformat(),
+        'data_fim': (datetime.utcnow() + timedelta(days=1)).isoformat()
+    }).get_json()['relatorio']
+    assert historico['resumo']['total_pedidos'] == 10
+    assert historico['resumo']['total_entradas'] == 170.0
+    assert historico['resumo']['total_saidas'] == 6.0
+    assert len(historico['movimentacoes']) == 12
+
+    # Períodos recentes não tocam nas tabelas de arquivo
+    with contar_consultas(app) as consultas:
+        client.get('/api/caixa/relatorio')
+    assert not any('_arquivo' in c for c in consultas)
+
+    client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+    exportados = client.get('/api/export/pedidos').get_data(as_text=True).splitlines()
+    assert len(exportados) == 11
+
+    dashboard = client.get('/api/admin/dashboard').get_json()['dashboard']
+    assert dashboard['total_pedidos'] == 10 and dashboard['pedidos_por_status']['finalizado'] == 6
+
+
+def test_ids_arquivados_nao_se_repetem():
+    """Com AUTOINCREMENT (também em bancos migrados) um id arquivado não volta a ser usado"""
+    print("\n🔢 Testando ids após o arquivamento...")
+    app = criar_app_teste()
+    client = app.test_client()
+    inserir_pedidos(app, 3, status=StatusPedido.FINALIZADO)
+
+    with app.app_context():
+        # Simula um banco antigo: pedidos sem AUTOINCREMENT e migração 7 pendente
+        ddl = db.session.scalar(text("SELECT sql FROM sqlite_master WHERE name = 'pedidos'"))
+        db.session.execute(text(ddl.replace('pedidos', 'pedidos_velha', 1).replace(' AUTOINCREMENT', '')))
+        db.session.execute(text('INSERT INTO pedidos_velha SELECT * FROM pedidos'))
+        db.session.execute(text('DROP TABLE pedidos'))
+        db.session.execute(text('ALTER TABLE pedidos_velha RENAME TO pedidos'))
+        db.session.execute(text('DELETE FROM schema_migracoes WHERE versao = 7'))
+        db.session.commit()
+        assert aplicar_migracoes(db.engine) == [7]
+
+        Pedido.query.update({'created_at': datetime.utcnow() - timedelta(days=200)})
+        db.session.commit()
+        assert arquivar(90).pedidos == 3
+
+    pedido = {
+        'nome': 'Cliente Novo', 'telefone': '(21) 95555-0000', 'rua': 'Rua C', 'numero': '3',
+        'bairro': 'Centro', 'prato_id': 1, 'acompanhamento_id': 1, 'forma_pagamento': 'Pix'
+    }
+    assert client.post('/api/pedidos', json=pedido).get_json()['pedido']['id'] == 4
+
+
+def test_metricas_por_endpoint():
+    """/api/metrics soma requisições, consultas SQL e bytes por endpoint"""
+    print("\n📈 Testando métricas por endpoint...")
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'CONSULTA_LENTA_MS': 0.001})
+    init_database(app)
+    inserir_pedidos(app, 5)
+    client = app.test_client()
+
+    registros = []
+    tratador = logging.Handler()
+    tratador.emit = registros.append
+    logging.getLogger('garagem.consultas_lentas').addHandler(tratador)
+    try:
+        with contar_consultas(app) as consultas:
+            respostas = [client.get('/api/pedidos/1') for _ in range(2)]
+    finally:
+        logging.getLogger('garagem.consultas_lentas').removeHandler(tratador)
+
+    assert client.get('/api/metrics').status_code == 401
+    client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+    texto = client.get('/api/metrics').get_data(as_text=True)
+    rotulos = 'endpoint="pedidos.get_pedido",metodo="GET"'
+    assert f'garagem_http_requisicoes_total{{{rotulos},status="200"}} 2' in texto
+    assert f'garagem_http_duracao_segundos_count{{{rotulos}}} 2' in texto
+    assert f'garagem_sql_consultas_total{{{rotulos}}} {len(consultas)}' in texto
+    tamanho = sum(len(resposta.data) for resposta in respostas)
+    assert f'garagem_http_resposta_bytes_total{{{rotulos}}} {tamanho}' in texto
+    assert len(registros) == len(consultas) and 'parâmetros' in registros[0].getMessage()
+
+    # Sem amostragem nada é medido
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'METRICAS_AMOSTRAGEM': 0,
+        'METRICAS_TOKEN': 'coletor'
+    })
+    init_database(app)
+    client = app.test_client()
+    client.get('/api/cardapio')
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer outro'}).status_code == 401
+    metricas = client.get('/api/metrics', headers={'Authorization': 'Bearer coletor'})
+    assert metricas.status_code == 200 and 'cardapio' not in metricas.get_data(as_text=True)
+
+
+def test_perfilamento_proximas_requisicoes():
+    """Uma sessão perfila só as N requisições seguintes do endpoint escolhido"""
+    print("\n🔬 Testando perfilamento sob demanda...")
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'PERFIL_DIR': tempfile.mkdtemp()
+    })
+    init_database(app)
+    client = app.test_client()
+    client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+
+    resposta = client.post('/api/admin/perfil', json={'endpoint': '/api/caixa/relatorio', 'requisicoes': 2})
+    assert resposta.status_code == 201
+    sessao_id = resposta.get_json()['sessao']['id']
+    assert client.post('/api/admin/perfil', json={'endpoint': 'pedidos.listar_pedidos'}).status_code == 409
+    assert client.get(f'/api/admin/perfil/{sessao_id}/arquivo').status_code == 409
+
+    for _ in range(3):
+        client.get('/api/pedidos')
+        client.get('/api/caixa/relatorio')
+
+    sessao = client.get(f'/api/admin/perfil/{sessao_id}').get_json()['sessao']
+    assert (sessao['status'], sessao['concluidas']) == ('concluida', 2)
+
+    arquivo = client.get(f'/api/admin/perfil/{sessao_id}/arquivo')
+    assert arquivo.status_code == 200
+    caminho = os.path.join(tempfile.mkdtemp(), 'perfil.pstats')
+    with open(caminho, 'wb') as destino:
+        destino.write(arquivo.data)
+    funcoes = {nome for _, _, nome in pstats.Stats(caminho).stats}
+    assert 'relatorio_caixa' in funcoes and 'listar_pedidos' not in funcoes
+
+    assert client.post('/api/admin/perfil', json={'endpoint': '/api/nada'}).status_code == 400
+    assert client.post('/api/admin/perfil', json={'endpoint': '/api/export/pedidos'}).status_code == 400
+    assert client.post('/api/admin/perfil', json={
+        'endpoint': '/api/pedidos', 'modo': 'amostragem', 'intervalo_ms': 0.001
+    }).status_code == 400
+
+
+def test_json_e_compressao_das_respostas():
+    """orjson e json padrão geram o mesmo formato; respostas grandes saem comprimidas"""
+    print("\n🗜️ Testando codificação JSON e compressão...")
+    for usar_orjson in (True, False):
+        app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'JSON_ORJSON': usar_orjson})
+        init_database(app)
+        inserir_pedidos(app, 30)
+        client = app.test_client()
+
+        pedido = client.get('/api/pedidos/1').get_json()['pedido']
+        assert datetime.fromisoformat(pedido['created_at']) and pedido['status'] == 'aceito'
+        assert '\\u' not in client.get('/api/cardapio').get_data(as_text=True)
+
+        normal = client.get('/api/pedidos?limite=30')
+        comprimida = client.get('/api/pedidos?limite=30', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in normal.headers
+        assert comprimida.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in comprimida.headers['Vary']
+        assert len(comprimida.data) < len(normal.data)
+        assert gzip.decompress(comprimida.data) == normal.data
+
+        # Abaixo de COMPRESSAO_MINIMO a resposta sai como está
+        pequena = client.get('/api/health', headers={'Accept-Encoding': 'gzip'})
+        assert 'Content-Encoding' not in pequena.headers
+
+        # Tipos que o Flask já sabia codificar continuam funcionando
+        with app.app_context():
+            assert json.loads(app.json.dumps({'valor': Decimal('1.50')})) == {'valor': '1.50'}
+
+    # O ETag do cardápio é fraco e vale para as duas codificações
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'TESTING': True, 'COMPRESSAO_MINIMO': 500})
+    init_database(app)
+    client = app.test_client()
+    cardapio = client.get('/api/cardapio', headers={'Accept-Encoding': 'gzip'})
+    assert cardapio.headers['Content-Encoding'] == 'gzip' and cardapio.headers['ETag'].startswith('W/')
+    assert client.get('/api/cardapio', headers={'If-None-Match': cardapio.headers['ETag']}).status_code == 304
+
+
+def test_eventos_entre_workers():
+    """Uma alteração feita em um worker chega à tela conectada em outro"""
+    print("\n📡 Testando eventos entre workers...")
+    caminho = os.path.join(tempfile.mkdtemp(), 'eventos.db')
+    workers = [
+        create_app({'SQLALCHEMY_DATABASE_URI': f'sqlite:///{caminho}', 'TESTING': True, 'EVENTOS_INTERVALO': 0.05})
+        for _ in range(2)
+    ]
+    init_database(workers[0])
+    inserir_pedidos(workers[0], 1)
+
+    with workers[0].test_request_context():
+        barramento = barramento_pedidos()
+        assinatura = barramento.assinar(['aceito', 'preparo'])
+    try:
+        resposta = workers[1].test_client().put('/api/pedidos/1/status', json={'status': 'preparo'})
+        assert resposta.status_code == 200
+        evento = assinatura.proximo(timeout=5)
+        assert evento is not None and evento['tipo'] == 'pedido_atualizado'
+        assert json.loads(evento['dados'])['status'] == 'preparo'
+
+        # Reconectando com Last-Event-ID a tela recebe só o que perdeu
+        with workers[0].test_request_context():
+            retomada = barramento.assinar(['aceito', 'preparo'], ultimo_evento=evento['id'] - 1)
+        assert not retomada.precisa_snapshot and retomada.proximo(timeout=1)['id'] == evento['id']
+        barramento.cancelar(retomada)
+    finally:
+        barramento.cancelar(assinatura)
+
+
+def main():
+    """Executa todos os testes"""
+    print("🧪 Iniciando testes de consultas da Garagem do Lanche")
+    print("=" * 50)
+
+    tests = [
+        ("Listagem de pedidos", test_listagem_pedidos_consultas_constantes),
+        ("Paginação de pedidos", test_listagem_pedidos_paginada),
+        ("Painel da cozinha", test_cozinha_consultas_constantes),
+        ("Índices das consultas", test_consultas_quentes_usam_indices),
+        ("Migração de índices", test_migracao_cria_indices_em_banco_existente),
+        ("PRAGMAs do SQLite", test_pragmas_sqlite_em_cada_conexao),
+        ("Resumo diário", test_resumo_diario_acompanha_movimentacoes),
+        ("Taxa de entrega", test_taxa_entrega_por_regras),
+        ("Pedido idempotente", test_pedido_idempotente),
+        ("Pedido com itens", test_pedido_com_itens),
+        ("Lote com pedidos inválidos", test_pedidos_em_lote_parcial),
+        ("Endereços deduplicados", test_enderecos_deduplicados),
+        ("Migração de endereços", test_migracao_deduplica_enderecos),
+        ("Dashboard administrativo", test_dashboard_admin_em_cache),
+        ("Tokens administrativos", test_tokens_admin_logout_expiracao_e_rajada),
+        ("Transições de status", test_status_transicoes_e_versao),
+        ("Cache LRU e invalidação", test_cache_lru_ignora_carga_invalidada),
+        ("Tempos por etapa", test_tempos_por_etapa),
+        ("Exportação em stream", test_exportacao_em_stream),
+        ("Arquivamento de pedidos", test_arquivamento_mantem_relatorios),
+        ("Ids após o arquivamento", test_ids_arquivados_nao_se_repetem),
+        ("Métricas por endpoint", test_metricas_por_endpoint),
+        ("Perfilamento sob demanda", test_perfilamento_proximas_requisicoes),
+        ("JSON e compressão", test_json_e_compressao_das_respostas),
+        ("Eventos entre workers", test_eventos_entre_workers),
+    ]
+
+    passed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            print(f"{test_name}: ✅ PASSOU")
+            passed += 1
+        except AssertionError as e:
+            print(f"{test_name}: ❌ FALHOU {e}")
+
+    print(f"\n🎯 {passed}/{len(tests)} testes passaram")
+
+
+if __name__ == "__main__":
+    main()
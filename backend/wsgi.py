@@ -0,0 +1,10 @@
+"""
+Ponto de entrada WSGI para produção
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --host=0.0.0.0 --port=5000 --threads=8 wsgi:app
+"""
+
+from app import create_app
+
+app = create_app()
@@ -4,6 +4,33 @@
 
 const API_BASE_URL = 'http://localhost:5000/api';
 
+/**
+ * UUID v4 para a Idempotency-Key. crypto.randomUUID só existe em contextos
+ * seguros (HTTPS ou localhost); na rede local em HTTP usa getRandomValues
+ * e, sem ele, data e Math.random.
+ */
+function gerarChaveIdempotencia() {
+    if (window.crypto && typeof crypto.randomUUID === 'function') {
+        return crypto.randomUUID();
+    }
+    const bytes = new Uint8Array(16);
+    if (window.crypto && typeof crypto.getRandomValues === 'function') {
+        crypto.getRandomValues(bytes);
+    } else {
+        for (let i = 0; i < bytes.length; i++) {
+            bytes[i] = Math.floor(Math.random() * 256);
+        }
+        const agora = Date.now();
+        for (let i = 0; i < 6; i++) {
+            bytes[i] ^= Math.floor(agora / 2 ** (8 * i)) & 0xff;
+        }
+    }
+    bytes[6] = (bytes[6] & 0x0f) | 0x40;
+    bytes[8] = (bytes[8] & 0x3f) | 0x80;
+    const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, '0')).join('');
+    return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+}
+
 class GaragemAPI {
     constructor() {
         this.baseURL = API_BASE_URL;
@@ -15,12 +42,12 @@ class GaragemAPI {
     async request(endpoint, options = {}) {
         const url = `${this.baseURL}${endpoint}`;
         const config = {
+            credentials: 'include', // Para incluir cookies de sessão
+            ...options,
             headers: {
                 'Content-Type': 'application/json',
                 ...options.headers
-            },
-            credentials: 'include', // Para incluir cookies de sessão
-            ...options
+            }
         };
 
         try {
@@ -52,11 +79,33 @@ class GaragemAPI {
     }
 
     // === PEDIDOS ===
-    async criarPedido(dadosPedido) {
-        return this.request('/pedidos', {
-            method: 'POST',
-            body: JSON.stringify(dadosPedido)
-        });
+    /**
+     * Cria um pedido. Se a conexão falhar, tenta de novo com a mesma
+     * Idempotency-Key, então o pedido nunca é criado duas vezes.
+     */
+    async criarPedido(dadosPedido, tentativas = 3) {
+        const chave = gerarChaveIdempotencia();
+        for (let tentativa = 1; ; tentativa++) {
+            try {
+                return await this.request('/pedidos', {
+                    method: 'POST',
+                    headers: { 'Idempotency-Key': chave },
+                    body: JSON.stringify(dadosPedido)
+                });
+            } catch (error) {
+                // fetch lança TypeError quando a resposta não chega (falha de rede)
+                if (!(error instanceof TypeError) || tentativa >= tentativas) {
+                    throw error;
+                }
+            }
+        }
+    }
+
+    /**
+     * Endereços já usados pelo cliente, para preencher o formulário
+     */
+    async getEnderecosCliente(telefone) {
+        return this.request(`/clientes/enderecos?telefone=${encodeURIComponent(telefone)}`);
     }
 
     async listarPedidos(filtros = {}) {
@@ -69,10 +118,15 @@ class GaragemAPI {
         return this.request(`/pedidos/${id}`);
     }
 
-    async atualizarStatusPedido(id, status) {
+    /**
+     * Muda o status do pedido. Envie a versao recebida junto com o pedido:
+     * se outra tela já o alterou, a API responde 409 em vez de sobrescrever.
+     */
+    async atualizarStatusPedido(id, status, versao = null) {
+        const corpo = versao === null ? { status } : { status, versao };
         return this.request(`/pedidos/${id}/status`, {
             method: 'PUT',
-            body: JSON.stringify({ status })
+            body: JSON.stringify(corpo)
         });
     }
 
@@ -80,6 +134,21 @@ class GaragemAPI {
         return this.request('/pedidos/cozinha');
     }
 
+    /**
+     * Assina o stream de pedidos (SSE) em vez de consultar periodicamente.
+     * onSnapshot recebe a lista completa; onPedido recebe cada pedido alterado.
+     */
+    assinarPedidosCozinha(onSnapshot, onPedido, status = null) {
+        const params = status ? `?status=${encodeURIComponent(status)}` : '';
+        const fonte = new EventSource(`${this.baseURL}/pedidos/cozinha/stream${params}`, {
+            withCredentials: true
+        });
+        fonte.addEventListener('snapshot', (e) => onSnapshot(JSON.parse(e.data)));
+        fonte.addEventListener('pedido_criado', (e) => onPedido(JSON.parse(e.data)));
+        fonte.addEventListener('pedido_atualizado', (e) => onPedido(JSON.parse(e.data)));
+        return fonte;
+    }
+
     // === CAIXA ===
     async getRelatorioCaixa(dataInicio = null, dataFim = null) {
         const params = new URLSearchParams();
@@ -90,6 +159,16 @@ class GaragemAPI {
         return this.request(endpoint);
     }
 
+    // URL para baixar o histórico completo ('pedidos' ou 'movimentacoes') em CSV/NDJSON
+    urlExportacao(tipo, { formato = 'csv', dataInicio = null, dataFim = null, gzip = false } = {}) {
+        const params = new URLSearchParams({ formato });
+        if (dataInicio) params.append('data_inicio', dataInicio);
+        if (dataFim) params.append('data_fim', dataFim);
+        if (gzip) params.append('gzip', '1');
+        
+        return `${this.baseURL}/export/${tipo}?${params.toString()}`;
+    }
+
     async getDashboardCaixa() {
         return this.request('/caixa/dashboard');
     }